@@ -0,0 +1,415 @@
+"""Headless HTTP API for the tailoring and resume generation pipelines.
+
+Run with:
+    uvicorn api:app --host 127.0.0.1 --port 8000
+
+All endpoints take and return JSON. Endpoints that call the LLM stream
+newline-delimited JSON events instead when called with ?stream=true:
+{"event": "partial", ...} as parts of the answer complete, then a final
+{"event": "result", "data": ...} or {"event": "error", "error": ...}.
+
+The tailor, its models and caches, the stage DAG memo, the rate limiter and
+the coalescing group are the same process-wide instances the Streamlit app
+uses. Send "priority": "batch" to queue LLM calls behind interactive users.
+
+Without credentials the API only answers loopback clients, and
+`python api.py` refuses to listen on another address. To serve a network,
+set TAILOR_API_KEYS to "user:key" pairs (comma-separated): a request with
+"Authorization: Bearer <key>" acts as that user, and a user_id in its body
+must be that user. TAILOR_API_KEY is a service key for a trusted backend,
+which may send any user_id. Job URLs must be http(s) URLs of public hosts.
+"""
+import asyncio
+import hmac
+import io
+import ipaddress
+import json
+import os
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from bullet_bank import requirement_texts
+from job_corpus import IncompatibleCorpus
+from main import (ResumeTailor, build_tailor_dag, collect_tailor_results, get_results_store, get_tailor,
+                  get_tailor_dag, tailor_input_hash)
+from rate_limiter import BATCH, get_shared_limiter
+from hedging import get_hedge_budget
+from llm_routing import get_routing_stats
+from prefork import process_memory
+from request_coalescer import get_shared_group
+from resume_generator import ResumeGenerator
+from resume_structure import normalize_resume_data
+from skill_analytics import get_skill_analytics
+from stage_dag import StageDAG
+from url_guard import UnsafeURL, check_public_url
+
+DOCX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+# JSON types of the body fields endpoints read, checked by read_body
+FIELD_TYPES = {
+    'resume_text': str, 'job_text': str, 'tailored_resume': str, 'content': str, 'role': str,
+    'user_id': (str, int), 'priority': str, 'is_url': bool, 'recompute': bool,
+    'job_requirements': dict, 'skill_matches': dict, 'resume_data': dict, 'bullets': list,
+    'k': int, 'min_score': (int, float)
+}
+_TYPE_NAMES = {str: 'a string', bool: 'a boolean', dict: 'an object', list: 'a list', int: 'an integer',
+               (str, int): 'a string', (int, float): 'a number'}
+
+
+class APIError(Exception):
+    """An error reported to the client with an HTTP status code."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+@lru_cache(maxsize=None)
+def get_batch_tailor_dag() -> StageDAG:
+    """Return a DAG whose LLM calls run at batch priority, sharing the interactive DAG's memo and checkpoints."""
+    dag = build_tailor_dag(get_tailor().with_priority(BATCH))
+    dag.memo = get_tailor_dag().memo
+    dag.checkpoints = get_tailor_dag().checkpoints
+    return dag
+
+
+@lru_cache(maxsize=None)
+def get_resume_generator() -> ResumeGenerator:
+    return ResumeGenerator()
+
+
+async def read_body(request: Request, required: List[str]) -> Dict:
+    """Parse the JSON body and check that the required fields are present."""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise APIError(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        raise APIError(400, "Request body must be a JSON object")
+    missing = [field for field in required if body.get(field) in (None, '')]
+    if missing:
+        raise APIError(400, f"Missing fields: {', '.join(missing)}")
+    for field, expected in FIELD_TYPES.items():
+        value = body.get(field)
+        # bool is an int in Python but not a valid count or score
+        if value is not None and (not isinstance(value, expected) or
+                                  (isinstance(value, bool) and expected is not bool)):
+            raise APIError(400, f"{field} must be {_TYPE_NAMES[expected]}")
+    if body.get('is_url') and body.get('job_text'):
+        try:
+            check_public_url(body['job_text'])
+        except UnsafeURL as e:
+            raise APIError(400, str(e))
+    return body
+
+
+def user_for(request: Request, body: Dict, required: bool = False) -> Optional[str]:
+    """Return the user a request acts for: the owner of its API key, else the user_id it sends."""
+    user_id = body.get('user_id')
+    user_id = None if user_id in (None, '') else str(user_id)
+    key_user = getattr(request.state, 'user', None)
+    if key_user is not None:
+        if user_id is not None and user_id != key_user:
+            raise APIError(403, "user_id does not match the API key")
+        return key_user
+    if required and user_id is None:
+        raise APIError(400, "Missing fields: user_id")
+    return user_id
+
+
+def tailor_for(body: Dict) -> ResumeTailor:
+    """Return the shared tailor at the priority requested in the body."""
+    priority = body.get('priority', 'interactive')
+    if priority not in ('interactive', 'batch'):
+        raise APIError(400, "priority must be 'interactive' or 'batch'")
+    tailor = get_tailor()
+    return tailor.with_priority(BATCH) if priority == 'batch' else tailor
+
+
+def wants_stream(request: Request) -> bool:
+    return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_events(work: Callable[[Callable], object]) -> StreamingResponse:
+    """Run work(emit) in a worker thread and stream its events as NDJSON.
+
+    emit(event, **data) may be called from any thread; the return value of
+    work is sent as the final 'result' event.
+    """
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(event: str, **data):
+            loop.call_soon_threadsafe(queue.put_nowait, {'event': event, **data})
+
+        def run():
+            try:
+                emit('result', data=work(emit))
+            except Exception as e:
+                emit('error', error=str(e))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        loop.run_in_executor(None, run)
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(events(), media_type='application/x-ndjson')
+
+
+async def respond(request: Request, work: Callable[[Callable], object]) -> Response:
+    """Stream work's events if the client asked for it, otherwise return its result as JSON."""
+    if wants_stream(request):
+        return stream_events(work)
+    return JSONResponse(await run_in_threadpool(work, lambda event, **data: None))
+
+
+async def health(request: Request) -> Response:
+    return JSONResponse({'status': 'ok'})
+
+
+async def metrics(request: Request) -> Response:
+    return JSONResponse({'rate_limiter': get_shared_limiter().metrics(), 'coalescer': get_shared_group().stats(),
+                         'hedging': get_hedge_budget().stats(), 'routing': get_routing_stats().stats(),
+                         'memory': process_memory(os.getpid())})
+
+
+async def skill_report(request: Request) -> Response:
+    """Aggregate matched and missing skills over all runs, or the ?runs= most recent ones."""
+    try:
+        recent = int(request.query_params.get('runs', 0)) or None
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        raise APIError(400, "runs and limit must be integers")
+
+    def report():
+        analytics = get_skill_analytics()
+        distribution = analytics.ats_score_distribution(recent)
+        return {
+            'missing_skills': analytics.top_missing_skills(recent, limit).to_dict('records'),
+            'match_rates': analytics.match_rates(recent, limit=limit).to_dict('records'),
+            'missing_together': analytics.skill_cooccurrence(recent, limit=limit).to_dict('records'),
+            'ats_scores': {**distribution, 'summary': json.loads(distribution['summary'].to_json())}
+        }
+    return JSONResponse(await run_in_threadpool(report))
+
+
+async def parse_job(request: Request) -> Response:
+    body = await read_body(request, ['job_text'])
+    tailor = tailor_for(body)
+    return await respond(request, lambda emit: tailor.parse_job_description(
+        body['job_text'], bool(body.get('is_url', False)),
+        on_partial=lambda key, value: emit('partial', key=key, value=value)
+    ))
+
+
+async def match_skills(request: Request) -> Response:
+    body = await read_body(request, ['resume_text', 'job_requirements'])
+    tailor = tailor_for(body)
+    return JSONResponse(await run_in_threadpool(tailor.match_skills, body['resume_text'], body['job_requirements']))
+
+
+async def ats_score(request: Request) -> Response:
+    """Score a resume, or an original and tailored pair when tailored_resume is given."""
+    body = await read_body(request, ['resume_text', 'job_requirements'])
+    tailor = tailor_for(body)
+
+    def work(emit):
+        on_partial = lambda key, value: emit('partial', key=key, value=value)
+        skill_matches = body.get('skill_matches') or tailor.match_skills(body['resume_text'], body['job_requirements'])
+        if body.get('tailored_resume'):
+            return tailor.compare_ats_scores(body['resume_text'], body['tailored_resume'],
+                                             body['job_requirements'], skill_matches, on_partial)
+        return tailor.calculate_ats_score(body['resume_text'], body['job_requirements'], skill_matches, on_partial)
+    return await respond(request, work)
+
+
+async def tailor_resume(request: Request) -> Response:
+    """Run the whole tailoring pipeline; with a user_id the results are saved and reused.
+
+    With a user_id, the user's bullet bank is searched for bullets to offer the rewrite.
+    Send "recompute": true to run every stage again instead of reusing saved results.
+    Runs in which a stage fell back (listed in degraded_stages) are not saved.
+    """
+    body = await read_body(request, ['resume_text', 'job_text'])
+    tailor_for(body)
+    dag = get_batch_tailor_dag() if body.get('priority') == 'batch' else get_tailor_dag()
+    resume_text, job_text, is_url = body['resume_text'], body['job_text'], bool(body.get('is_url', False))
+    user_id = user_for(request, body)
+    recompute = bool(body.get('recompute', False))
+
+    def work(emit):
+        bullet_bank = get_tailor().bullet_banks.reference(user_id)
+        input_hash = tailor_input_hash(resume_text, job_text, is_url, bullet_bank)
+        store = get_results_store() if user_id else None
+        if store and not recompute:
+            saved = store.find(user_id, input_hash)
+            if saved:
+                return saved
+        run = dag.run(
+            {'resume_text': resume_text, 'job_text': job_text, 'is_url': is_url, 'bullet_bank': bullet_bank},
+            on_stage_start=lambda stage: emit('stage_start', stage=stage),
+            on_stage_end=lambda stage, status: emit('stage_end', stage=stage, status=status),
+            on_partial=lambda stage, key, value: emit('partial', stage=stage, key=key, value=value),
+            reuse=not recompute
+        )
+        results = collect_tailor_results(run)
+        if not results['degraded_stages']:
+            if store:
+                store.save(user_id, input_hash, results)
+            get_skill_analytics().record(results)
+        return results
+    return await respond(request, work)
+
+
+async def add_bullets(request: Request) -> Response:
+    """Add bullets (texts or {"text", "role"} objects) to a user's bullet bank."""
+    body = await read_body(request, ['bullets'])
+    bank = get_tailor().bullet_banks.get(user_for(request, body, required=True))
+    added = await run_in_threadpool(bank.add, body['bullets'], body.get('role'))
+    return JSONResponse({'added': added, 'total': len(bank)})
+
+
+async def search_bullets(request: Request) -> Response:
+    """Return the bullets of a user's bank most relevant to parsed job requirements."""
+    body = await read_body(request, ['job_requirements'])
+    bank = get_tailor().bullet_banks.find(user_for(request, body, required=True))
+    if bank is None:
+        return JSONResponse({'bullets': []})
+    queries = requirement_texts(body['job_requirements'])
+    bullets = await run_in_threadpool(bank.search, queries, int(body.get('k', get_tailor().bank_top_k)),
+                                      float(body.get('min_score', get_tailor().bank_min_score)))
+    return JSONResponse({'bullets': bullets})
+
+
+async def search_jobs(request: Request) -> Response:
+    """Return the postings of the local job corpus that fit a resume best, with match explanations."""
+    body = await read_body(request, ['resume_text'])
+    try:
+        matches = await run_in_threadpool(get_tailor().find_jobs, str(body['resume_text']), int(body.get('k', 10)))
+    except IncompatibleCorpus as e:
+        raise APIError(409, str(e))
+    return JSONResponse({'jobs': matches, 'corpus_size': len(get_tailor().job_corpus)})
+
+
+def _docx_bytes(document) -> bytes:
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+async def generate_docx(request: Request) -> Response:
+    """Build a DOCX from plain resume text ("content") or form-schema data ("resume_data")."""
+    body = await read_body(request, [])
+    if body.get('resume_data'):
+        resume_data = normalize_resume_data(body['resume_data'])
+        document = await run_in_threadpool(get_resume_generator().generate_docx, resume_data)
+    elif body.get('content'):
+        document = await run_in_threadpool(get_tailor().generate_docx, body['content'])
+    else:
+        raise APIError(400, "Missing fields: content or resume_data")
+    return Response(_docx_bytes(document), media_type=DOCX_MEDIA_TYPE,
+                    headers={'Content-Disposition': 'attachment; filename="resume.docx"'})
+
+
+async def generate_pdf(request: Request) -> Response:
+    """Render form-schema resume data with the HTML template and convert it to PDF."""
+    body = await read_body(request, ['resume_data'])
+    generator = get_resume_generator()
+    html = generator.render_html(normalize_resume_data(body['resume_data']))
+    pdf = await run_in_threadpool(generator.generate_pdf, html)
+    if pdf is None:
+        raise APIError(500, "PDF generation failed; is wkhtmltopdf installed?")
+    return Response(pdf, media_type='application/pdf',
+                    headers={'Content-Disposition': 'attachment; filename="resume.pdf"'})
+
+
+def api_keys() -> Dict[str, Optional[str]]:
+    """Return the configured API keys and the user each acts as (None for the service key)."""
+    keys = {}
+    for pair in os.getenv('TAILOR_API_KEYS', '').split(','):
+        user, _, key = pair.strip().partition(':')
+        if user and key:
+            keys[key] = user
+    if os.getenv('TAILOR_API_KEY'):
+        keys[os.getenv('TAILOR_API_KEY')] = None
+    return keys
+
+
+def is_loopback(host: Optional[str]) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except (TypeError, ValueError):
+        return False
+
+
+class APIKeyMiddleware(BaseHTTPMiddleware):
+    """Require a configured bearer key on every endpoint except /health.
+
+    Without any key configured, only loopback clients are served, so an API
+    started on a public address by mistake does not serve the network.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        keys = api_keys()
+        if request.url.path == '/health':
+            return await call_next(request)
+        if not keys:
+            if not is_loopback(request.client.host if request.client else None):
+                return JSONResponse({'error': "Set TAILOR_API_KEYS to serve clients on other hosts"},
+                                    status_code=403)
+            return await call_next(request)
+        scheme, _, token = request.headers.get('authorization', '').partition(' ')
+        matches = [key for key in keys if scheme == 'Bearer' and hmac.compare_digest(token, key)]
+        if not matches:
+            return JSONResponse({'error': "Invalid or missing API key"}, status_code=401)
+        request.state.user = keys[matches[0]]
+        return await call_next(request)
+
+
+async def handle_api_error(request: Request, exc: APIError) -> Response:
+    return JSONResponse({'error': exc.message}, status_code=exc.status_code)
+
+
+routes = [
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/analytics/skills', skill_report, methods=['GET']),
+    Route('/parse-job', parse_job, methods=['POST']),
+    Route('/match-skills', match_skills, methods=['POST']),
+    Route('/ats-score', ats_score, methods=['POST']),
+    Route('/bullet-bank', add_bullets, methods=['POST']),
+    Route('/bullet-bank/search', search_bullets, methods=['POST']),
+    Route('/jobs/search', search_jobs, methods=['POST']),
+    Route('/tailor', tailor_resume, methods=['POST']),
+    Route('/generate/docx', generate_docx, methods=['POST']),
+    Route('/generate/pdf', generate_pdf, methods=['POST'])
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(APIKeyMiddleware)],
+    exception_handlers={APIError: handle_api_error}
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    host = os.getenv('API_HOST', '127.0.0.1')
+    if not api_keys() and not is_loopback(host):
+        raise SystemExit(f"Refusing to listen on {host} without TAILOR_API_KEYS or TAILOR_API_KEY")
+    uvicorn.run(app, host=host, port=int(os.getenv('API_PORT', 8000)))
@@ -0,0 +1,230 @@
+"""Benchmarks for the tailoring pipeline.
+
+Usage:
+    python benchmark.py embeddings [--onnx-dir DIR] [--texts N] [--repeats N]
+    python benchmark.py routing [--profiles fast quality ...] [--repeats N]
+
+The routing benchmark calls the Groq API (GROQ_API_KEY) and compares LLM
+routing profiles on per-call latency and completion tokens.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+SAMPLE_SKILLS = [
+    'python', 'machine learning', 'kubernetes', 'react', 'sql', 'docker', 'aws',
+    'natural language processing', 'data visualization', 'ci/cd', 'rest apis',
+    'project management', 'communication', 'typescript', 'pytorch', 'spark'
+]
+
+SAMPLE_SENTENCES = [
+    "Built and deployed machine learning models for demand forecasting using Python and scikit-learn",
+    "Led a team of five engineers delivering a React and Node.js customer portal",
+    "Designed RESTful APIs serving 2M requests per day on AWS Lambda",
+    "Migrated legacy services to Docker containers orchestrated with Kubernetes",
+    "Automated CI/CD pipelines with GitHub Actions, cutting release time by 40%",
+    "Created Tableau dashboards to visualize sales data for executive stakeholders",
+    "Fine-tuned transformer language models for document classification",
+    "Wrote complex SQL queries and optimized PostgreSQL indexes",
+    "Presented quarterly results to clients and coordinated cross-functional projects",
+    "Processed terabytes of event data with Apache Spark on Databricks"
+]
+
+
+def sample_texts(n: int) -> List[str]:
+    """Return n resume-like texts of varying length."""
+    rng = np.random.default_rng(0)
+    texts = []
+    for i in range(n):
+        if i % 3 == 0:
+            texts.append(SAMPLE_SKILLS[i % len(SAMPLE_SKILLS)])
+        else:
+            k = int(rng.integers(1, 4))
+            texts.append(". ".join(rng.choice(SAMPLE_SENTENCES, size=k)))
+    return texts
+
+
+def time_encode(backend, texts: List[str], repeats: int) -> Dict:
+    """Return throughput statistics for encoding texts with a backend."""
+    backend.encode(texts[:8])  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.encode(texts)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        'backend': backend.name,
+        'best_seconds': best,
+        'texts_per_second': len(texts) / best,
+        'ms_per_text': 1000 * best / len(texts)
+    }
+
+
+def check_embedding_agreement(reference, candidate, skills: List[str], sentences: List[str],
+                              threshold: float = 0.6) -> Dict:
+    """Compare a candidate backend against the reference PyTorch embeddings.
+
+    Reports per-text cosine similarity between the two backends over skills
+    and sentences, and how often the skill-match decision (similarity of a
+    skill to a skill or sentence above threshold) agrees.
+    """
+    texts = list(skills) + list(sentences)
+    ref = reference.encode(texts, normalize_embeddings=True)
+    cand = candidate.encode(texts, normalize_embeddings=True)
+    cosine = np.sum(ref * cand, axis=1)
+
+    ref_decisions = (ref[:len(skills)] @ ref.T) > threshold
+    cand_decisions = (cand[:len(skills)] @ cand.T) > threshold
+    return {
+        'mean_cosine': float(cosine.mean()),
+        'min_cosine': float(cosine.min()),
+        'decision_agreement': float((ref_decisions == cand_decisions).mean())
+    }
+
+
+def run_embedding_benchmark(args) -> int:
+    from embedding_backends import OnnxEmbeddingBackend, SentenceTransformerBackend
+
+    texts = sample_texts(args.texts)
+    torch_backend = SentenceTransformerBackend(args.model)
+    onnx_backend = OnnxEmbeddingBackend(args.onnx_dir)
+
+    for backend in (torch_backend, onnx_backend):
+        stats = time_encode(backend, texts, args.repeats)
+        print(f"{stats['backend']:>6}: {stats['texts_per_second']:8.1f} texts/s "
+              f"({stats['ms_per_text']:.2f} ms/text, best of {args.repeats})")
+
+    agreement = check_embedding_agreement(torch_backend, onnx_backend, SAMPLE_SKILLS, SAMPLE_SENTENCES)
+    print(f"agreement: mean cosine {agreement['mean_cosine']:.4f}, min cosine {agreement['min_cosine']:.4f}, "
+          f"match decisions {agreement['decision_agreement']:.1%}")
+
+    ok = agreement['min_cosine'] >= args.min_cosine and agreement['decision_agreement'] >= args.min_agreement
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+SAMPLE_RESUME = """Jane Doe
+jane.doe@example.com | +1 555 0100 | Berlin, Germany
+
+EXPERIENCE
+Data Engineer, Acme Analytics (2020 - present)
+- Built batch and streaming pipelines in Python and Apache Spark processing 2 TB per day
+- Wrote complex SQL and tuned PostgreSQL indexes, cutting dashboard load times by 60%
+- Migrated cron jobs to Airflow DAGs running on Kubernetes
+
+Software Developer, Blue Widgets (2017 - 2020)
+- Developed REST APIs in Flask serving 300 requests per second
+- Automated CI/CD with GitHub Actions and Docker
+
+EDUCATION
+B.Sc. Computer Science, TU Berlin, 2017
+
+SKILLS
+Python, SQL, Spark, Airflow, Docker, Kubernetes, PostgreSQL, Flask, Git
+"""
+
+SAMPLE_JOB = """Senior Data Engineer - Northwind Logistics
+
+About the role:
+You will design and run the data platform behind our routing and pricing products.
+
+Responsibilities:
+- Build reliable batch and streaming pipelines
+- Own data models in our cloud warehouse
+- Partner with analysts and ML engineers on data quality
+
+Requirements:
+- 5+ years of experience in data engineering
+- Python and SQL
+- Apache Spark or Flink
+- Airflow or Dagster
+- AWS (S3, Glue, Redshift)
+- Terraform
+"""
+
+
+def run_routing_profile(tailor, repeats: int) -> Dict:
+    """Run every routed LLM call of the pipeline and return the per-route statistics."""
+    from llm_routing import get_routing_stats
+    from job_dedup import NearDuplicateIndex
+    from stage_dag import StageMemo
+
+    stats = get_routing_stats()
+    stats.reset()
+    tailor.job_parse_mode = 'llm'
+    wall = []
+    for _ in range(repeats):
+        # Fresh caches so every repeat reaches the LLM
+        tailor.structured_resumes = StageMemo()
+        tailor.job_index = NearDuplicateIndex()
+        start = time.perf_counter()
+        resume_context = tailor.structure_resume(SAMPLE_RESUME)['resume_context']
+        job_requirements = tailor.parse_job_description(SAMPLE_JOB, is_url=False)
+        skill_matches = tailor.match_skills(SAMPLE_RESUME, job_requirements)
+        tailor.calculate_ats_score(SAMPLE_RESUME, job_requirements, skill_matches)
+        tailored = tailor.tailor_resume(resume_context, job_requirements, skill_matches)['tailored_resume']
+        tailor.compare_ats_scores(SAMPLE_RESUME, tailored, job_requirements, skill_matches)
+        tailor.generate_cover_letter(resume_context, job_requirements, skill_matches)
+        tailor.generate_cold_email(resume_context, job_requirements, skill_matches)
+        wall.append(time.perf_counter() - start)
+    return {'routes': stats.stats(), 'pipeline_seconds': float(np.median(wall))}
+
+
+def run_routing_benchmark(args) -> int:
+    from llm_routing import ROUTE_KEYS, load_routing
+    from main import ResumeTailor
+
+    base = ResumeTailor()
+    results = {}
+    for profile in args.profiles:
+        routing = load_routing(profile, args.config)
+        results[profile] = run_routing_profile(base.with_routing(routing), args.repeats)
+
+    print(f"{'route':<18}" + "".join(f"{profile:>26}" for profile in args.profiles))
+    for key in ROUTE_KEYS:
+        row = f"{key:<18}"
+        for profile in args.profiles:
+            route = results[profile]['routes'].get(key)
+            cell = (f"{route['avg_seconds']:.2f}s {route['avg_output_tokens']:.0f}tok"
+                    f"{' (' + str(route['truncated']) + ' cut)' if route['truncated'] else ''}") if route else "-"
+            row += f"{cell:>26}"
+        print(row)
+    totals = f"{'pipeline (median)':<18}"
+    for profile in args.profiles:
+        tokens = sum(route['output_tokens'] for route in results[profile]['routes'].values()) / args.repeats
+        totals += f"{results[profile]['pipeline_seconds']:.2f}s {tokens:.0f}tok".rjust(26)
+    print(totals)
+    return 0
+
+
+def main(argv=None) -> int:
+    from embedding_backends import DEFAULT_MODEL_NAME, DEFAULT_ONNX_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    embeddings = subparsers.add_parser('embeddings', help="Compare PyTorch and ONNX embedding backends")
+    embeddings.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    embeddings.add_argument('--onnx-dir', default=DEFAULT_ONNX_DIR)
+    embeddings.add_argument('--texts', type=int, default=512)
+    embeddings.add_argument('--repeats', type=int, default=3)
+    embeddings.add_argument('--min-cosine', type=float, default=0.98)
+    embeddings.add_argument('--min-agreement', type=float, default=0.97)
+    embeddings.set_defaults(func=run_embedding_benchmark)
+
+    routing = subparsers.add_parser('routing', help="Compare LLM routing profiles on latency and tokens")
+    routing.add_argument('--profiles', nargs='+', default=['uniform', 'fast', 'quality'])
+    routing.add_argument('--config', help="JSON file with extra routing profiles")
+    routing.add_argument('--repeats', type=int, default=3)
+    routing.set_defaults(func=run_routing_benchmark)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
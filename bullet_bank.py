@@ -0,0 +1,266 @@
+"""Per-user banks of resume bullets with a memory-mapped vector index.
+
+Candidates keep more experience bullets than fit on one resume. Each user's
+bank stores the bullets' normalized embeddings as a raw float32 matrix that
+is memory-mapped for search, next to a JSON lines file of the bullet texts
+and a small meta file:
+
+    data/bullet_banks/<user hash>/vectors.f32    count x dim float32 rows
+                                  bullets.jsonl  {"key", "text", "role"} per row
+                                  meta.json      {"backend", "dim", "count", "revision"}
+
+Adding bullets appends to both files and then replaces meta.json, whose count
+is the number of committed rows; rows past it (from an interrupted write) are
+ignored and overwritten. Writers hold a lock file, so processes serving the
+same user can add bullets concurrently, and every process reloads a bank
+whose meta.json changed. A bank embedded with another backend is
+re-embedded on open. A bank's directory is only created by its first
+write, so looking up the banks of visitors who never add bullets leaves
+nothing on disk.
+
+Search scores every bullet against the centroid of the job's requirements
+with one matrix-vector product, keeps the best candidates with
+argpartition, and re-ranks those by their best single requirement, so a
+query over tens of thousands of bullets takes milliseconds.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from skill_ontology import normalize
+
+DEFAULT_BANK_DIR = os.path.join(os.path.dirname(__file__), 'data', 'bullet_banks')
+
+
+def requirement_texts(job_requirements: Dict, max_texts: int = 48) -> List[str]:
+    """Return the parts of parsed job requirements that bullets are matched against."""
+    texts = [job_requirements.get('title')]
+    texts += list(job_requirements.get('responsibilities') or [])
+    texts += list(job_requirements.get('skills') or [])
+    texts = [str(text).strip() for text in texts if text and str(text).strip()]
+    return list(dict.fromkeys(texts))[:max_texts]
+
+
+class BulletBank:
+    """One user's bullets and their memory-mapped, normalized embeddings."""
+
+    def __init__(self, directory: str, embedder):
+        self.directory = directory
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._meta_mtime = None
+        self._refresh()
+        if self.bullets and self.meta.get('backend') != embedder.name:
+            self._rebuild()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def refresh(self):
+        """Reload the bank if another process (or bank object) committed changes."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self._path('meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._meta_mtime and mtime is not None:
+            return
+        self._meta_mtime = mtime
+        if mtime is None:
+            self.meta = {'backend': self.embedder.name, 'dim': 0, 'count': 0, 'revision': ''}
+        else:
+            with open(self._path('meta.json'), encoding='utf-8') as f:
+                self.meta = json.load(f)
+        self.bullets = []
+        if self.meta['count']:
+            with open(self._path('bullets.jsonl'), encoding='utf-8') as f:
+                self.bullets = [json.loads(line) for line, _ in zip(f, range(self.meta['count']))]
+        self._keys = {bullet['key'] for bullet in self.bullets}
+        self._vectors = None
+
+    @contextmanager
+    def _writing(self):
+        """Hold the bank's lock, across threads and processes, on an up-to-date bank."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path('lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._refresh()
+                yield
+
+    def __len__(self) -> int:
+        return self.meta['count']
+
+    @property
+    def revision(self) -> str:
+        """Changes whenever bullets are added or removed."""
+        return self.meta['revision']
+
+    def vectors(self) -> np.ndarray:
+        """Return the committed embedding rows as a read-only memory map."""
+        if self._vectors is None or len(self._vectors) != self.meta['count']:
+            if not self.meta['count']:
+                return np.empty((0, self.meta['dim'] or 1), dtype=np.float32)
+            self._vectors = np.memmap(self._path('vectors.f32'), dtype=np.float32, mode='r',
+                                      shape=(self.meta['count'], self.meta['dim']))
+        return self._vectors
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedder.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+    def _replace(self, name: str, data: bytes):
+        # A new file rather than a truncated one, so memory maps open elsewhere stay valid
+        with open(self._path(name + '.tmp'), 'wb') as f:
+            f.write(data)
+        os.replace(self._path(name + '.tmp'), self._path(name))
+
+    def _commit(self, **changes):
+        meta = {**self.meta, **changes, 'revision': uuid.uuid4().hex}
+        self._replace('meta.json', json.dumps(meta).encode('utf-8'))
+        self.meta = meta
+        self._meta_mtime = os.stat(self._path('meta.json')).st_mtime_ns
+        self._vectors = None
+
+    def add(self, bullets: Iterable[Union[str, Dict]], role: Optional[str] = None) -> int:
+        """Embed and append bullets not already in the bank; return how many were added.
+
+        Bullets are texts or {"text", "role"} dicts; role labels where the
+        bullet comes from (e.g. "Data Engineer @ Acme").
+        """
+        entries = {}
+        for bullet in bullets:
+            text, bullet_role = (bullet.get('text'), bullet.get('role', role)) if isinstance(bullet, dict) \
+                else (bullet, role)
+            text = " ".join(str(text or '').split()).lstrip('-•*● ').strip()
+            key = hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()
+            if text and key not in self._keys:
+                entries.setdefault(key, {'key': key, 'text': text, 'role': bullet_role})
+        if not entries:
+            return 0
+
+        # Embedded outside the lock; bullets another writer added meanwhile are dropped below
+        entries = list(entries.values())
+        vectors = self._encode([entry['text'] for entry in entries])
+        with self._writing():
+            new = [i for i, entry in enumerate(entries) if entry['key'] not in self._keys]
+            if not new:
+                return 0
+            entries, vectors = [entries[i] for i in new], vectors[new]
+            count = self.meta['count']
+            # Drop rows an interrupted write left after the committed ones
+            with open(self._path('vectors.f32'), 'ab') as f:
+                f.truncate(count * vectors.shape[1] * 4)
+                f.write(vectors.tobytes())
+            with open(self._path('bullets.jsonl'), 'ab+') as f:
+                f.seek(0)
+                f.truncate(sum(len(line) for line, _ in zip(f, range(count))))
+                f.write(b"".join(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n" for entry in entries))
+            self.bullets.extend(entries)
+            self._keys.update(entry['key'] for entry in entries)
+            self._commit(count=count + len(entries), dim=int(vectors.shape[1]))
+        return len(entries)
+
+    def clear(self):
+        """Remove every bullet."""
+        with self._writing():
+            for name in ('vectors.f32', 'bullets.jsonl'):
+                self._replace(name, b'')
+            self.bullets = []
+            self._keys = set()
+            self._commit(count=0, dim=0)
+
+    def _rebuild(self):
+        """Re-embed every bullet with the current embedding backend."""
+        with self._writing():
+            vectors = self._encode([bullet['text'] for bullet in self.bullets])
+            self._replace('vectors.f32', vectors.tobytes())
+            self._commit(backend=self.embedder.name, dim=int(vectors.shape[1]))
+
+    def search(self, queries: List[str], k: int = 12, min_score: float = 0.0, candidates: int = 256) -> List[Dict]:
+        """Return the k bullets most relevant to the query texts, best first.
+
+        Each result has the bullet's text and role, its score and the query
+        it matches best; bullets scoring below min_score are left out.
+        """
+        if not len(self) or not queries:
+            return []
+        query_vectors = self._encode(queries)
+        centroid = query_vectors.mean(axis=0)
+        centroid /= np.linalg.norm(centroid) or 1.0
+        # Held so a concurrent refresh or write cannot swap the bullets and vectors mid-search
+        with self._lock:
+            return self._search(queries, query_vectors, centroid, k, min_score, candidates)
+
+    def _search(self, queries: List[str], query_vectors: np.ndarray, centroid: np.ndarray, k: int,
+                min_score: float, candidates: int) -> List[Dict]:
+        vectors = self.vectors()
+        if not len(vectors):
+            return []
+        broad = vectors @ centroid
+        n_candidates = min(len(broad), max(k, candidates))
+        top = np.argpartition(-broad, n_candidates - 1)[:n_candidates] if n_candidates < len(broad) \
+            else np.arange(len(broad))
+        # A bullet that fits one requirement closely can beat one that is vaguely related to all of them
+        top = np.sort(top)
+        per_query = np.asarray(vectors[top]) @ query_vectors.T
+        best_query = per_query.argmax(axis=1)
+        scores = 0.5 * broad[top] + 0.5 * per_query[np.arange(len(top)), best_query]
+        order = np.argsort(-scores)[:k]
+        order = order[scores[order] >= min_score]
+        return [{**{name: self.bullets[top[i]][name] for name in ('text', 'role')},
+                 'score': round(float(scores[i]), 4), 'matches': queries[best_query[i]]}
+                for i in order]
+
+
+class BulletBanks:
+    """Open bullet banks of many users, kept in an LRU of open memory maps."""
+
+    def __init__(self, root: str, embedder, max_open: int = 64):
+        self.root = root
+        self.embedder = embedder
+        self.max_open = max_open
+        self._banks: "OrderedDict[str, BulletBank]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> BulletBank:
+        """Return a user's bank; its directory is created by the first bullets added."""
+        with self._lock:
+            bank = self._banks.get(user_id)
+            if bank is None:
+                bank = self._banks[user_id] = BulletBank(self._directory(user_id), self.embedder)
+            self._banks.move_to_end(user_id)
+            while len(self._banks) > self.max_open:
+                self._banks.popitem(last=False)
+        bank.refresh()
+        return bank
+
+    def find(self, user_id: Optional[str]) -> Optional[BulletBank]:
+        """Return a user's bank if it has ever been written, without opening a new one."""
+        if not user_id:
+            return None
+        with self._lock:
+            bank = self._banks.get(user_id)
+        if bank is None and not os.path.exists(os.path.join(self._directory(user_id), 'meta.json')):
+            return None
+        return self.get(user_id)
+
+    def _directory(self, user_id: str) -> str:
+        # Hashed so user IDs never become arbitrary paths
+        return os.path.join(self.root, hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:32])
+
+    def reference(self, user_id: Optional[str]) -> Optional[Dict]:
+        """Return a pipeline input naming a user's bank and its revision, or None when it is empty."""
+        bank = self.find(user_id)
+        return {'user_id': user_id, 'revision': bank.revision} if bank is not None and len(bank) else None
@@ -0,0 +1,187 @@
+import json
+import os
+import warnings
+from typing import List, Optional
+
+import numpy as np
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(__file__), 'models', 'all-MiniLM-L6-v2-onnx')
+
+
+class SentenceTransformerBackend:
+    """Embedding backend running the sentence-transformers model through PyTorch."""
+
+    name = 'torch'
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array."""
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            normalize_embeddings=normalize_embeddings,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    def after_fork(self, num_threads: int):
+        """Limit intra-op threads in a forked worker; the weights stay shared with the parent."""
+        import torch
+        torch.set_num_threads(num_threads)
+
+
+class OnnxEmbeddingBackend:
+    """Embedding backend running an exported (optionally int8-quantized) ONNX model on CPU.
+
+    Only needs onnxruntime, tokenizers and numpy at serving time; the model
+    directory is produced once with export_onnx_model().
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_dir: str = DEFAULT_ONNX_DIR, num_threads: Optional[int] = None):
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        with open(os.path.join(model_dir, 'embedding_config.json'), encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        self.tokenizer.enable_padding(pad_id=self.config.get('pad_token_id', 0))
+
+        self.session = self._create_session(num_threads)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _create_session(self, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        return ort.InferenceSession(
+            os.path.join(self.model_dir, self.config['model_file']),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+
+    def after_fork(self, num_threads: int):
+        """Recreate the session in a forked worker, whose copy has lost the parent's thread pool."""
+        self.session = self._create_session(num_threads)
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array."""
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.config['dimension']), dtype=np.float32)
+
+        # Batch texts of similar length together to minimise padding
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings = np.empty((len(texts), self.config['dimension']), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encoded = self.tokenizer.encode_batch([texts[i] for i in batch_idx])
+            input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            if 'token_type_ids' in self.input_names:
+                feeds['token_type_ids'] = np.array([e.type_ids for e in encoded], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+            embeddings[batch_idx] = self._pool(token_embeddings, attention_mask)
+
+        if normalize_embeddings or self.config.get('normalize'):
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Apply the pooling used by the original sentence-transformers model."""
+        if self.config.get('pooling') == 'cls':
+            return token_embeddings[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def export_onnx_model(model_name: str = DEFAULT_MODEL_NAME, output_dir: str = DEFAULT_ONNX_DIR,
+                      quantize: bool = True, model=None) -> str:
+    """Export a sentence-transformers model to ONNX, optionally with int8 dynamic quantization."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize
+
+    st_model = model or SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    pooling = st_model[1].get_pooling_mode_str() if len(st_model) > 1 else 'mean'
+    if pooling not in ('mean', 'cls'):
+        raise ValueError(f"Unsupported pooling mode for ONNX export: {pooling}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = tokenizer(["Experienced Python developer"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    fp32_path = os.path.join(output_dir, 'model.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False
+        )
+
+    model_file = 'model.onnx'
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        model_file = 'model_quantized.onnx'
+        quantize_dynamic(fp32_path, os.path.join(output_dir, model_file), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, 'embedding_config.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'source_model': model_name,
+            'model_file': model_file,
+            'max_seq_length': st_model.max_seq_length,
+            'dimension': st_model.get_sentence_embedding_dimension(),
+            'pooling': pooling,
+            'normalize': any(isinstance(module, Normalize) for module in st_model),
+            'pad_token_id': tokenizer.pad_token_id or 0
+        }, f, indent=2)
+    return output_dir
+
+
+def load_embedding_backend(backend: Optional[str] = None):
+    """Return the embedding backend selected by EMBEDDING_BACKEND ('torch' or 'onnx')."""
+    backend = (backend or os.getenv('EMBEDDING_BACKEND', 'torch')).lower()
+    if backend == 'onnx':
+        model_dir = os.getenv('EMBEDDING_ONNX_DIR', DEFAULT_ONNX_DIR)
+        try:
+            return OnnxEmbeddingBackend(model_dir)
+        except (ImportError, OSError) as e:
+            warnings.warn(f"ONNX embedding backend unavailable ({e}), falling back to PyTorch")
+    elif backend != 'torch':
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    return SentenceTransformerBackend(os.getenv('EMBEDDING_MODEL', DEFAULT_MODEL_NAME))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--output-dir', default=DEFAULT_ONNX_DIR)
+    parser.add_argument('--no-quantize', action='store_true', help="Keep fp32 weights")
+    args = parser.parse_args()
+    print(f"Exported to {export_onnx_model(args.model, args.output_dir, quantize=not args.no_quantize)}")
@@ -0,0 +1,257 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Deque, Dict, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """An LLM call did not finish before its stage's deadline."""
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies per call type, for hedging thresholds."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, p: float, min_samples: int = 20) -> Optional[float]:
+        """Return the p-th percentile (0-1) of recent latencies, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+class HedgeBudget:
+    """Cap hedged requests to a fraction of primary requests.
+
+    Every primary call that may be hedged earns `ratio` credits (up to
+    `burst`); a hedge spends one, so extra upstream cost stays below ratio on
+    average.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 3.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._credits = burst
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.primaries += 1
+            self._credits = min(self.burst, self._credits + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._credits < 1:
+                return False
+            self._credits -= 1
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'primaries': self.primaries, 'hedges': self.hedges, 'hedge_wins': self.hedge_wins,
+                    'credits': round(self._credits, 2)}
+
+
+# Threads that run (and, after a deadline or a lost hedge race, abandon) LLM calls
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('LLM_CALL_THREADS', 32)), thread_name_prefix="llm-call")
+_DONE = object()
+
+
+class HedgedLLM:
+    """Wrap an LLM client with an optional deadline and hedged duplicate requests.
+
+    With a deadline (absolute time.monotonic() value) a call raises
+    DeadlineExceeded once it passes. Abandoned attempts (after a deadline or
+    a lost hedge race) that have not started are cancelled, and those still
+    waiting for the rate limiter stop waiting (see RateLimitedLLM.for_call);
+    a request already sent finishes in the background, bounded by the
+    client's own request timeout. With hedging, a duplicate request is sent
+    if the first has not answered (for streams: produced its first chunk)
+    within the `percentile` latency of recent calls with the same key,
+    budget permitting; the first answer wins.
+    """
+
+    def __init__(self, llm, tracker: LatencyTracker, budget: HedgeBudget, key: str = 'default',
+                 deadline: Optional[float] = None, hedge: bool = False, percentile: float = 0.95,
+                 min_samples: int = 20):
+        self.llm = llm
+        self.tracker = tracker
+        self.budget = budget
+        self.key = key
+        self.deadline = deadline
+        self.hedge = hedge
+        self.percentile = percentile
+        self.min_samples = min_samples
+
+    def _copy(self, llm=None, **options) -> "HedgedLLM":
+        settings = dict(key=self.key, deadline=self.deadline, hedge=self.hedge, percentile=self.percentile,
+                        min_samples=self.min_samples)
+        settings.update(options)
+        return HedgedLLM(llm or self.llm, self.tracker, self.budget, **settings)
+
+    def with_priority(self, priority: int) -> "HedgedLLM":
+        return self._copy(self.llm.with_priority(priority))
+
+    def with_options(self, key: Optional[str] = None, deadline: Optional[float] = None,
+                     hedge: Optional[bool] = None) -> "HedgedLLM":
+        """Return a wrapper for one stage: its latency key, absolute deadline and hedging switch."""
+        return self._copy(key=key or self.key, deadline=deadline, hedge=self.hedge if hedge is None else hedge)
+
+    def _remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded for {self.key}")
+        return remaining
+
+    def _attempt(self, cancelled: threading.Event):
+        """Return the client for one attempt; it stops waiting for capacity at the deadline or when cancelled."""
+        for_call = getattr(self.llm, 'for_call', None)
+        return for_call(deadline=self.deadline, cancelled=cancelled) if for_call else self.llm
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        return self.tracker.percentile(self.key, self.percentile, self.min_samples)
+
+    def invoke(self, prompt, **kwargs):
+        start = time.monotonic()
+        if self.hedge:
+            self.budget.earn()
+        futures, cancelled = [], []
+
+        def submit():
+            cancelled.append(threading.Event())
+            futures.append(_executor.submit(self._attempt(cancelled[-1]).invoke, prompt, **kwargs))
+
+        submit()
+        hedge_delay = self._hedge_delay()
+        errors = []
+        try:
+            while True:
+                remaining = self._remaining()
+                timeout = remaining
+                if hedge_delay is not None and len(futures) == 1:
+                    until_hedge = max(0.0, start + hedge_delay - time.monotonic())
+                    timeout = until_hedge if remaining is None else min(until_hedge, remaining)
+                done, _ = wait([f for f in futures if not f.done()] or futures, timeout=timeout,
+                               return_when=FIRST_COMPLETED)
+                for future in futures:
+                    if future.done() and future not in errors:
+                        if future.exception() is None:
+                            self.tracker.record(self.key, time.monotonic() - start)
+                            if future is not futures[0]:
+                                self.budget.record_win()
+                            return future.result()
+                        errors.append(future)
+                if len(errors) == len(futures):
+                    raise errors[0].exception()
+                if not done and len(futures) == 1 and hedge_delay is not None:
+                    if self.budget.try_spend():
+                        submit()
+                    hedge_delay = None
+        finally:
+            # Attempts still queued or waiting for the limiter are not sent after all
+            for future, event in zip(futures, cancelled):
+                event.set()
+                future.cancel()
+
+    def stream(self, prompt, **kwargs):
+        """Stream the response; hedging races on the first chunk and the deadline covers the whole stream."""
+        start = time.monotonic()
+        if self.hedge:
+            self.budget.earn()
+        chunks: "queue.Queue" = queue.Queue()
+        stop = [threading.Event()]
+
+        def pump(index: int, stop_event: threading.Event):
+            stream = self._attempt(stop_event).stream(prompt, **kwargs)
+            try:
+                for chunk in stream:
+                    if stop_event.is_set():
+                        break
+                    chunks.put((index, chunk, None))
+                chunks.put((index, _DONE, None))
+            except Exception as e:
+                chunks.put((index, None, e))
+            finally:
+                close = getattr(stream, 'close', None)
+                if close:
+                    close()
+
+        pumps = [_executor.submit(pump, 0, stop[0])]
+        hedge_delay = self._hedge_delay()
+        winner = None
+        failed = set()
+        try:
+            while True:
+                remaining = self._remaining()
+                timeout = remaining
+                if winner is None and hedge_delay is not None and len(stop) == 1:
+                    until_hedge = max(0.0, start + hedge_delay - time.monotonic())
+                    timeout = until_hedge if remaining is None else min(until_hedge, remaining)
+                try:
+                    index, chunk, error = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    if winner is None and len(stop) == 1 and hedge_delay is not None and self.budget.try_spend():
+                        stop.append(threading.Event())
+                        pumps.append(_executor.submit(pump, 1, stop[1]))
+                    hedge_delay = None
+                    continue
+                if winner is not None and index != winner:
+                    continue
+                if error is not None:
+                    failed.add(index)
+                    if winner is None and len(failed) < len(stop):
+                        continue
+                    raise error
+                if winner is None:
+                    winner = index
+                    self.tracker.record(self.key, time.monotonic() - start)
+                    if winner == 1:
+                        self.budget.record_win()
+                    for i, event in enumerate(stop):
+                        if i != winner:
+                            event.set()
+                if chunk is _DONE:
+                    return
+                yield chunk
+        finally:
+            for event in stop:
+                event.set()
+            for future in pumps:
+                future.cancel()
+
+
+@lru_cache(maxsize=None)
+def get_latency_tracker() -> LatencyTracker:
+    """Return the process-wide latency tracker used for hedging thresholds."""
+    return LatencyTracker()
+
+
+@lru_cache(maxsize=None)
+def get_hedge_budget() -> HedgeBudget:
+    """Return the process-wide hedge budget (LLM_HEDGE_BUDGET extra requests per request)."""
+    return HedgeBudget(ratio=float(os.getenv('LLM_HEDGE_BUDGET', 0.1)))
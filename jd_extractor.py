@@ -0,0 +1,234 @@
+"""Local, LLM-free extraction of job description fields.
+
+Skills come from two sources: a dictionary lookup of every token n-gram in
+the skill ontology, and noun phrases chunked with nltk's RegexpParser from
+the requirement and skills sections of the posting. Titles, companies,
+experience and responsibilities are found with section and line heuristics.
+
+Part-of-speech tags come from nltk's perceptron tagger when its data is
+installed (python -m nltk.downloader averaged_perceptron_tagger_eng) and from
+a small word-list tagger otherwise, so extraction never needs a download.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from nltk import RegexpParser
+from nltk.tokenize import wordpunct_tokenize
+
+from skill_ontology import SkillOntology, normalize, token_ngrams
+
+NOUN_PHRASE_GRAMMAR = r"""
+    NP: {<JJ|VBG|NN.*>*<NN.*>}
+"""
+MAX_PHRASE_TOKENS = 4
+MAX_RESPONSIBILITIES = 12
+
+_SECTION_RE = re.compile(r'^\s*(?:#+\s*)?([A-Za-z][A-Za-z\'’ /&-]{2,40}?)\s*:?\s*$')
+_SKILL_SECTIONS = re.compile(
+    r'requirement|qualification|skill|must have|nice to have|tech stack|technolog|what you bring|'
+    r'what we.re looking for|you have|experience with|preferred', re.I)
+_DUTY_SECTIONS = re.compile(r'responsibilit|what you.ll do|duties|the role|your role|day to day|you will', re.I)
+_LEAD_IN_RE = re.compile(
+    r'^\s*(?:(?:strong|solid|good|deep|proven|excellent|hands-on)\s+)?(?:(?:\d+\+?\s*years?\s+of\s+)?'
+    r'(?:experience|knowledge|familiarity|proficiency|expertise|understanding)\s+(?:with|in|of|using)|'
+    r'proficient\s+(?:with|in)|familiar\s+with|knowledge\s+of)\s+', re.I)
+# Acronyms ("AI", "AWS") and capitalized short names inside a sentence ("with Go", "Java, Go")
+_SHORT_NAME_RE = re.compile(r'\b[A-Z][A-Z0-9+#]{1,5}(?![\w+#])|(?:(?<=[\w,;/(] )|(?<=[,;/(]))[A-Z][a-z]{1,2}\b')
+_BULLET_RE = re.compile(r'^\s*(?:[-*•●▪◦·]|\d+[.)])\s+')
+_TITLE_LABEL_RE = re.compile(r'^\s*(?:job title|position|role|title)\s*[:\-]\s*(.+)$', re.I | re.M)
+_TITLE_HIRING_RE = re.compile(r'\bhiring\s+(?:an?\s+)?((?:[A-Z][\w+#/\-]*\s*){1,5})')
+_COMPANY_LABEL_RE = re.compile(r'^\s*(?:company|employer|organization)\s*[:\-]\s*(.+)$', re.I | re.M)
+_COMPANY_ABOUT_RE = re.compile(r'^\s*(?i:about)\s+(?!the role|the job|you|us\b)([A-Z][\w&.\- ]{1,40}?)\s*:?\s*$', re.M)
+_COMPANY_AT_RE = re.compile(r'\b(?:at|join)\s+([A-Z][\w&\-]*(?:\.\w+)*(?:\s+[A-Z][\w&\-]*(?:\.\w+)*){0,3})')
+_EXPERIENCE_RE = re.compile(
+    r'[^.\n]*\b\d+\s*\+?\s*(?:(?:-|–|to)\s*\d+\s*)?(?:years?|yrs?)\b[^.\n]*', re.I)
+_ROLE_WORDS = re.compile(
+    r'\b(?:engineer|developer|manager|analyst|scientist|designer|architect|consultant|administrator|'
+    r'specialist|intern|lead|director|officer|researcher|technician|coordinator|programmer|devops|sre)\b', re.I)
+
+# Words that never start or end a skill phrase; used by the fallback tagger as well
+FUNCTION_WORDS = frozenset("""
+a an the and or but nor of in on at to for with from by as into onto about over under within across
+is are be been being was were will would should could can may might must shall do does did have has had
+you your we our us they their them it its this that these those who whom which what where when how
+strong excellent good great solid proven deep working hands-on ability able plus etc e.g i.e using
+""".split())
+GENERIC_NOUNS = frozenset("""
+experience knowledge skills skill ability understanding years year degree team teams candidate role
+work environment opportunity requirements responsibilities qualifications company business plus
+background familiarity proficiency expertise field industry product products customers customer
+""".split())
+ACTION_VERBS = frozenset("""
+build design develop implement maintain own lead manage create collaborate work partner write test
+deploy support drive improve analyze analyse define deliver mentor review optimize monitor ensure
+identify research architect automate coordinate communicate participate contribute help scale ship
+""".split())
+
+_pos_tag = None
+
+
+def _tagger():
+    """Return nltk's pos_tag if its model is installed, else the word-list fallback."""
+    global _pos_tag
+    if _pos_tag is None:
+        try:
+            from nltk import pos_tag
+            pos_tag(['probe'])
+            _pos_tag = pos_tag
+        except LookupError:
+            _pos_tag = _fallback_pos_tag
+    return _pos_tag
+
+
+def _fallback_pos_tag(tokens: List[str]) -> List[Tuple[str, str]]:
+    """Tag function words, action verbs and punctuation; treat everything else as a noun."""
+    tags = []
+    for token in tokens:
+        lower = token.lower()
+        if not re.search(r'[A-Za-z0-9]', token):
+            tags.append((token, '.'))
+        elif lower in FUNCTION_WORDS:
+            tags.append((token, 'IN'))
+        elif lower in ACTION_VERBS:
+            tags.append((token, 'VB'))
+        else:
+            tags.append((token, 'NN'))
+    return tags
+
+
+def _join_tokens(tokens: List[str]) -> str:
+    text = " ".join(tokens)
+    # wordpunct_tokenize splits "node.js" and "c++"; glue punctuation back on
+    return re.sub(r'\s*([./+#-])\s*', r'\1', text).strip()
+
+
+class JobDescriptionExtractor:
+    """Extract skills, title, company, experience and responsibilities without an LLM.
+
+    Returns the same dict shape as ResumeTailor.parse_job_description.
+    """
+
+    def __init__(self, ontology: SkillOntology, max_ngram: int = 4):
+        self.ontology = ontology
+        self.max_ngram = max_ngram
+        self.chunker = RegexpParser(NOUN_PHRASE_GRAMMAR)
+
+    def extract(self, text: str) -> Dict:
+        lines = [line.rstrip() for line in text.splitlines()]
+        sections = self._sections(lines)
+        skill_lines = [line for header, body in sections if header and _SKILL_SECTIONS.search(header)
+                       for line in body]
+        return {
+            'skills': self.extract_skills(text, skill_lines),
+            'experience': self._experience(text),
+            'responsibilities': self._responsibilities(sections),
+            'company': self._company(text) or "Not specified",
+            'title': self._title(lines) or "Not specified"
+        }
+
+    def extract_skills(self, text: str, skill_lines: Optional[List[str]] = None) -> List[str]:
+        """Return ontology skills found anywhere in text, then noun-phrase skills from skill_lines."""
+        written = {token.lower() for token in _SHORT_NAME_RE.findall(text)}
+        text_lower = text.lower()
+        found = []
+        for ngram in token_ngrams(text, self.max_ngram):
+            canonical = self.ontology.canonical(ngram)
+            # Short aliases such as "ai" or "go" only count when written as acronyms or capitalized names
+            if canonical and (len(ngram) >= 4 or ngram in written):
+                found.append((text_lower.find(ngram), canonical))
+        skills = []
+        for _, canonical in sorted(found):
+            if canonical not in skills:
+                skills.append(canonical)
+
+        # Listed phrases that are aliases of a skill already found ("AWS", "amazon web services") are dropped
+        known = set(skills)
+        for phrase in self._list_phrases(skill_lines or []):
+            canonical = self.ontology.canonical(phrase)
+            key = canonical or normalize(phrase)
+            if key not in known:
+                known.add(key)
+                skills.append(canonical or phrase)
+        return skills
+
+    def _list_phrases(self, lines: List[str]) -> List[str]:
+        """Chunk list items into noun phrases, keeping items that are a single short phrase."""
+        tagger = _tagger()
+        phrases = []
+        for line in lines:
+            line = _LEAD_IN_RE.sub('', _BULLET_RE.sub('', line))
+            for item in re.split(r',|;|\band\b|\bor\b|\(|\)', line):
+                tokens = wordpunct_tokenize(item)
+                if not tokens:
+                    continue
+                tree = self.chunker.parse(tagger(tokens))
+                chunks = [[token for token, _ in subtree.leaves()]
+                          for subtree in tree.subtrees(lambda node: node.label() == 'NP')]
+                words = [token for token in tokens if re.search(r'[A-Za-z0-9]', token)]
+                # An item that is exactly one short noun phrase is a skill in a list
+                if len(chunks) != 1 or len(chunks[0]) > MAX_PHRASE_TOKENS:
+                    continue
+                chunk = list(chunks[0])
+                while chunk and chunk[0].lower() in FUNCTION_WORDS:
+                    chunk.pop(0)
+                if not chunk or len([t for t in chunk if re.search(r'[A-Za-z0-9]', t)]) < len(words) - 1:
+                    continue
+                phrase = _join_tokens(chunk)
+                if phrase.lower() in GENERIC_NOUNS or len(phrase) < 2:
+                    continue
+                phrases.append(phrase)
+        return phrases
+
+    @staticmethod
+    def _sections(lines: List[str]) -> List[Tuple[Optional[str], List[str]]]:
+        """Split the posting into (header, lines) blocks; text before any header has no header."""
+        sections = [(None, [])]
+        for line in lines:
+            if not line.strip():
+                continue
+            match = _SECTION_RE.match(line)
+            if match and not _BULLET_RE.match(line) and len(line.split()) <= 6 and (
+                    line.rstrip().endswith(':') or _SKILL_SECTIONS.search(line) or _DUTY_SECTIONS.search(line)):
+                sections.append((match.group(1).strip(), []))
+            else:
+                sections[-1][1].append(line.strip())
+        return [section for section in sections if section[1]]
+
+    @staticmethod
+    def _title(lines: List[str]) -> Optional[str]:
+        match = _TITLE_LABEL_RE.search("\n".join(lines))
+        if match:
+            return match.group(1).strip()
+        match = _TITLE_HIRING_RE.search("\n".join(lines[:10]))
+        if match and _ROLE_WORDS.search(match.group(1)):
+            return match.group(1).strip()
+        for line in lines[:10]:
+            line = line.strip().strip('#*').strip()
+            # A heading, not a sentence that happens to mention a role
+            if line and len(line.split()) <= 8 and not line.endswith(('.', '!', '?')) and _ROLE_WORDS.search(line):
+                return line
+        return None
+
+    @staticmethod
+    def _company(text: str) -> Optional[str]:
+        for pattern in (_COMPANY_LABEL_RE, _COMPANY_ABOUT_RE, _COMPANY_AT_RE):
+            match = pattern.search(text)
+            if match:
+                return match.group(1).strip().rstrip('.,')
+        return None
+
+    @staticmethod
+    def _experience(text: str) -> str:
+        match = _EXPERIENCE_RE.search(text)
+        return match.group(0).strip(' -*•') if match else "Not specified"
+
+    @staticmethod
+    def _responsibilities(sections: List[Tuple[Optional[str], List[str]]]) -> List[str]:
+        duties = [_BULLET_RE.sub('', line) for header, body in sections
+                  if header and _DUTY_SECTIONS.search(header) for line in body]
+        if not duties:
+            # No responsibilities section: use bullets that start with an action verb
+            duties = [_BULLET_RE.sub('', line) for _, body in sections for line in body
+                      if _BULLET_RE.match(line) and
+                      re.sub(r's$', '', _BULLET_RE.sub('', line).split(' ', 1)[0].lower()) in ACTION_VERBS]
+        return duties[:MAX_RESPONSIBILITIES]
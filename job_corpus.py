@@ -0,0 +1,358 @@
+"""Reverse search: the best-fitting postings of a local job corpus for a resume.
+
+Parsed postings (for example from `job_crawler.py --parse`) are indexed in
+a directory of flat files that are memory-mapped for search and only ever
+appended to:
+
+    vectors.f32     count x dim float32   normalized embedding of each posting's title,
+                                          skills and responsibilities
+    skill_ids.i32   int32                 canonical skill IDs of all postings, concatenated
+    skill_ends.i64  int64 per posting     end of each posting's run in skill_ids.i32
+    records.jsonl   one line per posting  url, title, company
+    record_ends.i64 int64 per posting     end offset of each line, to read single records
+    vocab.txt       one skill per line    canonical skill names; line number is the ID
+    meta.json       counts of committed rows, the embedding backend and a revision
+
+A search embeds the resume once, scores every posting in one matrix-vector
+product over the memory map, counts the posting skills found in the resume
+with one gather and a bincount, and ranks with argpartition. Only the
+top k postings are explained: matched and missing skills and the resume line
+closest to the posting. Inserts append to every file and then replace
+meta.json; rows past its counts (from an interrupted insert) are ignored and
+overwritten. Posting texts are not stored, so a corpus embedded with another
+backend cannot be re-embedded: searches and inserts refuse it until it is
+rebuilt in a new directory.
+
+    python job_corpus.py add postings.jsonl       # job_crawler.py --parse output
+    python job_corpus.py search resume.txt --k 10
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from skill_ontology import SkillOntology, normalize, token_ngrams
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'data', 'job_corpus')
+# File name, dtype and the meta count that bounds it
+_ARRAYS = {
+    'vectors': ('vectors.f32', np.float32, 'count'),
+    'skill_ids': ('skill_ids.i32', np.int32, 'skill_count'),
+    'skill_ends': ('skill_ends.i64', np.int64, 'count'),
+    'record_ends': ('record_ends.i64', np.int64, 'count')
+}
+
+
+def posting_texts(job_requirements: Dict, max_texts: int = 48) -> List[str]:
+    """Return the parts of a parsed posting that its embedding is built from."""
+    texts = [job_requirements.get('title')]
+    texts += list(job_requirements.get('skills') or [])
+    texts += list(job_requirements.get('responsibilities') or [])
+    texts = [str(text).strip() for text in texts if text and str(text).strip()]
+    return list(dict.fromkeys(texts))[:max_texts]
+
+
+def _split_lines(text: str) -> List[str]:
+    return [line.strip() for line in re.split(r'\n+|(?<=[.!?;])\s+', text) if len(line.strip()) > 2]
+
+
+class IncompatibleCorpus(ValueError):
+    """The corpus was embedded with a different backend or dimension than the current one."""
+
+
+class JobCorpus:
+    """Append-only, memory-mapped index of parsed job postings."""
+
+    def __init__(self, directory: str, embedder, ontology: Optional[SkillOntology] = None):
+        self.directory = directory
+        self.embedder = embedder
+        self.ontology = ontology
+        self._lock = threading.Lock()
+        self._meta_mtime = None
+        self._keys = None
+        self.refresh()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def refresh(self):
+        """Reload the index if another process (or corpus object) committed inserts."""
+        try:
+            mtime = os.stat(self._path('meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._meta_mtime and mtime is not None:
+            return
+        self._meta_mtime = mtime
+        if mtime is None:
+            self.meta = {'backend': self.embedder.name, 'dim': 0, 'count': 0, 'skill_count': 0,
+                         'vocab_count': 0, 'revision': ''}
+        else:
+            with open(self._path('meta.json'), encoding='utf-8') as f:
+                self.meta = json.load(f)
+        self.vocab: List[str] = []
+        if self.meta['vocab_count']:
+            with open(self._path('vocab.txt'), encoding='utf-8') as f:
+                self.vocab = [line.rstrip('\n') for line, _ in zip(f, range(self.meta['vocab_count']))]
+        self.vocab_ids = {skill: i for i, skill in enumerate(self.vocab)}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._keys = None
+
+    def __len__(self) -> int:
+        return self.meta['count']
+
+    def _array(self, name: str) -> np.ndarray:
+        """Return the committed rows of an index file as a read-only memory map."""
+        if name not in self._arrays:
+            filename, dtype, count_key = _ARRAYS[name]
+            shape = (self.meta[count_key], self.meta['dim']) if name == 'vectors' else (self.meta[count_key],)
+            self._arrays[name] = np.memmap(self._path(filename), dtype=dtype, mode='r', shape=shape) \
+                if self.meta[count_key] else np.empty(shape, dtype=dtype)
+        return self._arrays[name]
+
+    def record(self, index: int) -> Dict:
+        """Return the stored url, title and company of one posting."""
+        ends = self._array('record_ends')
+        start = int(ends[index - 1]) if index else 0
+        with open(self._path('records.jsonl'), 'rb') as f:
+            f.seek(start)
+            return json.loads(f.read(int(ends[index]) - start))
+
+    def _check_embedding(self, dim: int):
+        """Refuse to mix vectors of the current backend with those the corpus was built with."""
+        if not self.meta['count']:
+            return
+        if self.meta['backend'] != self.embedder.name or self.meta['dim'] != dim:
+            raise IncompatibleCorpus(
+                f"The job corpus in {self.directory} was embedded with {self.meta['backend']} "
+                f"({self.meta['dim']} dimensions) but the embedding backend is {self.embedder.name} "
+                f"({dim} dimensions); re-index the postings into a new JOB_CORPUS_DIR")
+
+    def canonical_skill(self, skill: str) -> str:
+        return self.ontology.canonical_name(skill) if self.ontology else normalize(skill)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedder.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the corpus lock, across threads and processes, on an up-to-date index."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path('lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self.refresh()
+                yield
+
+    @staticmethod
+    def posting_key(posting: Dict) -> str:
+        """Identify a posting by its URL, or by its parsed requirements when it has none."""
+        identity = posting.get('url') or json.dumps(posting.get('job_requirements'), sort_keys=True)
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def _load_keys(self) -> set:
+        if self._keys is None:
+            self._keys = set()
+            if self.meta['count']:
+                with open(self._path('records.jsonl'), encoding='utf-8') as f:
+                    self._keys = {json.loads(line)['key'] for line, _ in zip(f, range(self.meta['count']))}
+        return self._keys
+
+    def add(self, postings: Iterable[Dict]) -> int:
+        """Index postings not already in the corpus and return how many were added.
+
+        Each posting is a dict with "job_requirements" (as returned by
+        ResumeTailor.parse_job_description) and optionally "url".
+        """
+        entries = {}
+        for posting in postings:
+            requirements = posting.get('job_requirements') or {}
+            texts = posting_texts(requirements)
+            if texts:
+                entries.setdefault(self.posting_key(posting), (posting, requirements, texts))
+        if not entries:
+            return 0
+
+        with self._writing():
+            keys = self._load_keys()
+            entries = {key: entry for key, entry in entries.items() if key not in keys}
+            if not entries:
+                return 0
+            # One encode for every text of every new posting; each posting is the mean of its texts
+            texts = [text for _, _, parts in entries.values() for text in parts]
+            encoded = self._encode(texts)
+            self._check_embedding(int(encoded.shape[1]))
+            sizes = [len(parts) for _, _, parts in entries.values()]
+            vectors = np.add.reduceat(encoded, np.cumsum([0] + sizes[:-1]), axis=0)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+            # New skills get IDs after the committed ones; the index only learns them once the insert commits
+            new_vocab: Dict[str, int] = {}
+            skill_ids, skill_ends, records = [], [], []
+            for key, (posting, requirements, _) in entries.items():
+                skills = dict.fromkeys(self.canonical_skill(skill) for skill in requirements.get('skills') or [])
+                for skill in skills:
+                    skill_id = self.vocab_ids.get(skill)
+                    if skill_id is None:
+                        skill_id = new_vocab.setdefault(skill, len(self.vocab_ids) + len(new_vocab))
+                    skill_ids.append(skill_id)
+                skill_ends.append(self.meta['skill_count'] + len(skill_ids))
+                records.append(json.dumps({'key': key, 'url': posting.get('url'), 'title': requirements.get('title'),
+                                           'company': requirements.get('company')},
+                                          ensure_ascii=False).encode('utf-8') + b"\n")
+
+            committed_bytes = int(self._array('record_ends')[-1]) if self.meta['count'] else 0
+            record_ends = committed_bytes + np.cumsum([len(record) for record in records])
+            self._append('vectors.f32', self.meta['count'] * self.meta['dim'] * 4, vectors.tobytes())
+            self._append('skill_ids.i32', self.meta['skill_count'] * 4, np.asarray(skill_ids, np.int32).tobytes())
+            self._append('skill_ends.i64', self.meta['count'] * 8, np.asarray(skill_ends, np.int64).tobytes())
+            self._append('records.jsonl', committed_bytes, b"".join(records))
+            self._append('record_ends.i64', self.meta['count'] * 8, record_ends.astype(np.int64).tobytes())
+            with open(self._path('vocab.txt'), 'ab+') as f:
+                f.seek(0)
+                f.truncate(sum(len(line) for line, _ in zip(f, range(self.meta['vocab_count']))))
+                f.write("".join(skill + "\n" for skill in new_vocab).encode('utf-8'))
+
+            self._commit(backend=self.embedder.name, count=self.meta['count'] + len(entries),
+                         dim=int(vectors.shape[1]),
+                         skill_count=self.meta['skill_count'] + len(skill_ids),
+                         vocab_count=self.meta['vocab_count'] + len(new_vocab))
+            keys.update(entries)
+            self.vocab.extend(new_vocab)
+            self.vocab_ids.update(new_vocab)
+        return len(entries)
+
+    def _append(self, name: str, committed: int, data: bytes):
+        # Drop what an interrupted insert left after the committed rows
+        with open(self._path(name), 'ab') as f:
+            f.truncate(committed)
+            f.write(data)
+
+    def _commit(self, **changes):
+        meta = {**self.meta, **changes, 'revision': uuid.uuid4().hex}
+        with open(self._path('meta.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(self._path('meta.json.tmp'), self._path('meta.json'))
+        self.meta = meta
+        self._meta_mtime = os.stat(self._path('meta.json')).st_mtime_ns
+        self._arrays = {}
+
+    def resume_skill_mask(self, resume_text: str) -> np.ndarray:
+        """Return which vocabulary skills (or aliases of them) the resume mentions."""
+        mask = np.zeros(len(self.vocab), dtype=bool)
+        for ngram in set(token_ngrams(resume_text)):
+            skill_id = self.vocab_ids.get(self.canonical_skill(ngram))
+            if skill_id is not None and skill_id < len(mask):
+                mask[skill_id] = True
+        return mask
+
+    def search(self, resume_text: str, k: int = 10, segments: Optional[List[str]] = None,
+               semantic_weight: float = 0.5) -> List[Dict]:
+        """Return the k postings that fit the resume best, with explanations.
+
+        The score mixes the similarity of the resume to the posting with the
+        share of the posting's skills found in the resume. segments are the
+        resume lines embedded for the query (default: its lines and sentences).
+        Raises IncompatibleCorpus if the corpus was built with another backend.
+        """
+        self.refresh()
+        if not len(self) or not resume_text.strip() or k < 1:
+            return []
+        segments = segments or _split_lines(resume_text)
+        segment_vectors = self._encode(segments)
+        self._check_embedding(int(segment_vectors.shape[1]))
+        query = segment_vectors.mean(axis=0)
+        query /= np.linalg.norm(query) or 1.0
+
+        vectors = self._array('vectors')
+        semantic = vectors @ query
+
+        # Matched skills per posting: find the posting of every resume skill hit and count hits per posting
+        mask = self.resume_skill_mask(resume_text)
+        ends = self._array('skill_ends')
+        hits = np.flatnonzero(mask[self._array('skill_ids')])
+        matched = np.bincount(np.searchsorted(ends, hits, side='right'), minlength=len(ends)).astype(np.float32)
+        totals = np.diff(ends, prepend=0).astype(np.float32)
+        coverage = np.divide(matched, totals, out=np.zeros_like(matched), where=totals > 0)
+
+        scores = semantic_weight * semantic + (1 - semantic_weight) * coverage
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._explain(int(i), float(scores[i]), float(semantic[i]), float(coverage[i]), mask,
+                              segments, segment_vectors) for i in top]
+
+    def _explain(self, index: int, score: float, semantic: float, coverage: float, mask: np.ndarray,
+                 segments: List[str], segment_vectors: np.ndarray) -> Dict:
+        ends = self._array('skill_ends')
+        skill_ids = self._array('skill_ids')[int(ends[index - 1]) if index else 0:int(ends[index])]
+        closest = int(np.argmax(segment_vectors @ self._array('vectors')[index]))
+        return {
+            **{name: value for name, value in self.record(index).items() if name != 'key'},
+            'score': round(score, 4),
+            'similarity': round(semantic, 4),
+            'skill_coverage': round(coverage, 3),
+            'matched_skills': [self.vocab[i] for i in skill_ids if mask[i]],
+            'missing_skills': [self.vocab[i] for i in skill_ids if not mask[i]],
+            'closest_resume_line': segments[closest]
+        }
+
+
+def _read_postings(path: str) -> Iterable[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                posting = json.loads(line)
+                if posting.get('job_requirements'):
+                    yield posting
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from embedding_backends import load_embedding_backend
+    from skill_ontology import load_skill_ontology
+
+    parser = argparse.ArgumentParser(description="Index parsed job postings and find the best fits for a resume")
+    parser.add_argument('--dir', default=os.getenv('JOB_CORPUS_DIR', DEFAULT_CORPUS_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add = subparsers.add_parser('add', help="Index postings from JSON lines with job_requirements")
+    add.add_argument('postings', nargs='+')
+    add.add_argument('--batch', type=int, default=512)
+    search = subparsers.add_parser('search', help="Print the best-fitting postings for a resume text file")
+    search.add_argument('resume')
+    search.add_argument('--k', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    corpus = JobCorpus(args.dir, load_embedding_backend(), load_skill_ontology())
+    try:
+        if args.command == 'add':
+            added, batch = 0, []
+            for path in args.postings:
+                for posting in _read_postings(path):
+                    batch.append(posting)
+                    if len(batch) >= args.batch:
+                        added += corpus.add(batch)
+                        batch = []
+            added += corpus.add(batch)
+            print(f"Added {added} postings; the corpus has {len(corpus)}")
+            return 0
+
+        with open(args.resume, encoding='utf-8') as f:
+            for match in corpus.search(f.read(), k=args.k):
+                print(json.dumps(match, ensure_ascii=False))
+    except IncompatibleCorpus as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
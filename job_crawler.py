@@ -0,0 +1,290 @@
+"""Async bulk ingestion of job posting pages.
+
+Fetches many posting URLs concurrently with aiohttp while staying polite to
+each host: a per-host connection limit, a minimum delay between requests to
+the same host (raised to the robots.txt Crawl-delay when larger) and
+robots.txt rules. Failed fetches are retried with exponential backoff,
+honouring Retry-After on 429 and 503 responses. Cleaned posting text is
+yielded as each fetch completes, so parsing can start before the crawl ends.
+
+    python job_crawler.py urls.txt --out postings.jsonl --parse
+    python job_crawler.py urls.txt --out postings.jsonl --parse --index   # also add to the job corpus
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from rate_limiter import BATCH
+
+DEFAULT_USER_AGENT = "JobReadyAI-Crawler/1.0"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_NOISE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'form', 'svg', 'iframe']
+
+
+@dataclass
+class CrawlResult:
+    """The outcome of fetching one posting URL."""
+    url: str
+    text: str = ''
+    status: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def clean_html(html: str) -> str:
+    """Return the readable text of a posting page without scripts, navigation and blank runs."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(_NOISE_TAGS):
+        tag.decompose()
+    root = soup.find('main') or soup.find('article') or soup.body or soup
+    lines = (" ".join(line.split()) for line in root.get_text(separator="\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+@dataclass
+class _Host:
+    """Politeness state of one host."""
+    semaphore: asyncio.Semaphore
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    next_request_at: float = 0.0
+    robots: Optional[RobotFileParser] = None
+    delay: float = 0.0
+
+
+class JobCrawler:
+    """Concurrent, polite fetcher of job posting pages."""
+
+    def __init__(self, max_connections: int = 32, per_host_limit: int = 2, host_delay: float = 1.0,
+                 timeout: float = 15.0, max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0,
+                 respect_robots: bool = True, user_agent: str = DEFAULT_USER_AGENT):
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.host_delay = host_delay
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self._hosts: Dict[str, _Host] = {}
+
+    def _host(self, url: str) -> Tuple[str, _Host]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._hosts:
+            self._hosts[origin] = _Host(asyncio.Semaphore(self.per_host_limit), delay=self.host_delay)
+        return origin, self._hosts[origin]
+
+    async def _load_robots(self, session: aiohttp.ClientSession, origin: str, host: _Host):
+        """Fetch and parse robots.txt once per host; a missing file allows everything."""
+        async with host.lock:
+            if host.robots is not None:
+                return
+            robots = RobotFileParser(f"{origin}/robots.txt")
+            try:
+                async with session.get(robots.url) as response:
+                    if response.status >= 400:
+                        robots.allow_all = response.status < 500 and response.status not in (401, 403)
+                        robots.disallow_all = not robots.allow_all
+                    else:
+                        robots.parse((await response.text(errors='replace')).splitlines())
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                robots.allow_all = True
+            crawl_delay = robots.crawl_delay(self.user_agent)
+            if crawl_delay:
+                host.delay = max(host.delay, float(crawl_delay))
+            host.robots = robots
+
+    async def _wait_turn(self, host: _Host):
+        """Space out request starts to the same host by its delay."""
+        async with host.lock:
+            now = time.monotonic()
+            wait = host.next_request_at - now
+            host.next_request_at = max(now, host.next_request_at) + host.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.max_backoff)
+        except ValueError:
+            pass
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> CrawlResult:
+        """Fetch one posting with politeness and retries, returning its cleaned text."""
+        result = CrawlResult(url)
+        start = time.monotonic()
+        origin, host = self._host(url)
+        if self.respect_robots:
+            await self._load_robots(session, origin, host)
+            if not host.robots.can_fetch(self.user_agent, url):
+                result.error = "Disallowed by robots.txt"
+                return result
+
+        for attempt in range(self.max_retries + 1):
+            result.attempts = attempt + 1
+            retry_after = None
+            async with host.semaphore:
+                await self._wait_turn(host)
+                try:
+                    async with session.get(url) as response:
+                        result.status = response.status
+                        if response.status < 400:
+                            result.text = clean_html(await response.text(errors='replace'))
+                            result.error = None
+                            break
+                        result.error = f"HTTP {response.status}"
+                        retry_after = response.headers.get('Retry-After')
+                        if response.status not in RETRY_STATUSES:
+                            break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
+        result.elapsed = time.monotonic() - start
+        return result
+
+    async def crawl(self, urls: Iterable[str]) -> AsyncIterator[CrawlResult]:
+        """Fetch every URL concurrently and yield results in completion order."""
+        urls = list(dict.fromkeys(urls))
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_limit)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout,
+                                         headers={'User-Agent': self.user_agent}) as session:
+            tasks = [asyncio.ensure_future(self.fetch(session, url)) for url in urls]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+
+_END = object()
+
+
+async def _next(iterator: AsyncIterator):
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _END
+
+
+async def ingest_postings(urls: Iterable[str], tailor=None, crawler: Optional[JobCrawler] = None,
+                          parse_workers: int = 4) -> AsyncIterator[Tuple[CrawlResult, Optional[Dict]]]:
+    """Crawl postings and parse each one as soon as it is fetched.
+
+    Yields (result, job_requirements) as soon as each parse (or failed fetch)
+    completes, without waiting for later fetches; job_requirements
+    is None for failed fetches or when no tailor is given. Parsing runs in
+    worker threads at batch priority so interactive users are served first.
+    """
+    crawler = crawler or JobCrawler()
+    parser = tailor.with_priority(BATCH) if tailor is not None else None
+    loop = asyncio.get_running_loop()
+    pending = set()
+
+    with ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="ingest-parse") as executor:
+        async def parse(result: CrawlResult):
+            if parser is None or not result.ok or not result.text:
+                return result, None
+            requirements = await loop.run_in_executor(executor, parser.parse_job_description, result.text, False)
+            return result, requirements
+
+        # Wait on the next crawl result and every running parse at once, so each is handled when done
+        results = crawler.crawl(urls)
+        fetching = asyncio.ensure_future(_next(results))
+        try:
+            while fetching is not None or pending:
+                done, _ = await asyncio.wait(pending | ({fetching} if fetching else set()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if fetching in done:
+                    result = fetching.result()
+                    fetching = None
+                    if result is not _END:
+                        pending.add(asyncio.ensure_future(parse(result)))
+                        fetching = asyncio.ensure_future(_next(results))
+                for task in done & pending:
+                    pending.discard(task)
+                    yield task.result()
+        finally:
+            for task in pending | ({fetching} if fetching else set()):
+                task.cancel()
+            if fetching is not None:
+                await asyncio.gather(fetching, return_exceptions=True)
+            await results.aclose()
+
+
+async def _run_cli(args) -> int:
+    with open(args.urls, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    tailor = None
+    if args.parse or args.index:
+        from main import ResumeTailor
+        tailor = ResumeTailor()
+    crawler = JobCrawler(per_host_limit=args.per_host, host_delay=args.delay, timeout=args.timeout,
+                         max_retries=args.retries, respect_robots=not args.ignore_robots)
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    loop = asyncio.get_running_loop()
+    failures, indexed, batch = 0, 0, []
+    try:
+        async for result, requirements in ingest_postings(urls, tailor, crawler):
+            failures += not result.ok
+            record = {'url': result.url, 'status': result.status, 'error': result.error,
+                      'attempts': result.attempts, 'elapsed': round(result.elapsed, 3), 'text': result.text}
+            if requirements is not None:
+                record['job_requirements'] = requirements
+                batch.append(record)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if args.index and len(batch) >= args.index_batch:
+                indexed += await loop.run_in_executor(None, tailor.job_corpus.add, batch)
+                batch = []
+        if args.index and batch:
+            indexed += await loop.run_in_executor(None, tailor.job_corpus.add, batch)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Fetched {len(urls) - failures}/{len(urls)} postings", file=sys.stderr)
+    if args.index:
+        print(f"Indexed {indexed} new postings; the job corpus has {len(tailor.job_corpus)}", file=sys.stderr)
+    return 1 if failures == len(urls) and urls else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fetch job postings in bulk and optionally parse them.")
+    parser.add_argument('urls', help="file with one posting URL per line")
+    parser.add_argument('--out', help="write JSON lines here instead of stdout")
+    parser.add_argument('--parse', action='store_true', help="parse each posting with the LLM as it arrives")
+    parser.add_argument('--index', action='store_true',
+                        help="add parsed postings to the job corpus searched by resume (implies --parse)")
+    parser.add_argument('--index-batch', type=int, default=64, help="postings embedded per corpus insert")
+    parser.add_argument('--per-host', type=int, default=2, help="concurrent connections per host")
+    parser.add_argument('--delay', type=float, default=1.0, help="seconds between requests to one host")
+    parser.add_argument('--timeout', type=float, default=15.0)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--ignore-robots', action='store_true')
+    args = parser.parse_args(argv)
+    return asyncio.run(_run_cli(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Words and figures that tell otherwise identical postings apart, e.g. a Senior and a Junior opening
+_SENIORITY = {'intern', 'internship', 'graduate', 'entry', 'junior', 'jr', 'associate', 'mid', 'intermediate',
+              'senior', 'sr', 'staff', 'principal', 'lead', 'head', 'director', 'vp', 'chief', 'manager', 'ii',
+              'iii', 'iv'}
+_YEARS = re.compile(r'(\d+)\s*\+?\s*(?:(?:-|–|to)\s*(\d+)\s*)?(?:years?|yrs?)\b')
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of parsed job postings for reusing requirements of reposted jobs.
+
+    Postings are shingled into word n-grams and summarised by a MinHash
+    signature. LSH banding finds candidate postings, whose estimated Jaccard
+    similarity is then checked against the threshold. Postings that share
+    most of their text but differ in seniority or required years (a Senior
+    and a Junior opening of one team) are not duplicates, so a candidate also
+    needs the same seniority words and year figures, and the cached title must
+    appear in the new posting. The index keeps at most max_entries postings
+    and evicts the least recently used one.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 3, max_entries: int = 2000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Dict, Tuple]]" = OrderedDict()
+        self._buckets: List[Dict[bytes, set]] = [dict() for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _shingles(self, text: str) -> List[str]:
+        tokens = re.findall(r'\w+', text.lower())
+        n = self.shingle_size
+        if len(tokens) <= n:
+            return [" ".join(tokens)]
+        return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """Return the MinHash signature of a posting."""
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+             for s in set(self._shingles(text))],
+            dtype=np.uint64
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def level(text: str) -> Tuple:
+        """Return the seniority words and required years a posting mentions."""
+        text = text.lower()
+        return frozenset(re.findall(r'\w+', text)) & _SENIORITY, frozenset(_YEARS.findall(text))
+
+    @staticmethod
+    def _same_title(requirements: Dict, text: str) -> bool:
+        title = " ".join(re.findall(r'\w+', str(requirements.get('title') or '').lower()))
+        return not title or title in " ".join(re.findall(r'\w+', text.lower()))
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(" ".join(text.lower().split()).encode('utf-8')).hexdigest()
+
+    def query(self, text: str) -> Optional[Tuple[Dict, float]]:
+        """Return (requirements, similarity) of the closest cached near-duplicate, if any."""
+        key = self._key(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key][1]), 1.0
+
+        signature = self.signature(text)
+        level = self.level(text)
+        with self._lock:
+            candidates = set()
+            for band, band_key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(band_key, ()))
+
+            best_key, best_similarity = None, 0.0
+            for candidate in candidates:
+                candidate_signature, requirements, candidate_level = self._entries[candidate]
+                if candidate_level != level or not self._same_title(requirements, text):
+                    continue
+                similarity = float(np.mean(candidate_signature == signature))
+                if similarity > best_similarity:
+                    best_key, best_similarity = candidate, similarity
+
+            if best_key is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[best_key][1]), best_similarity
+
+    def add(self, text: str, requirements: Dict):
+        """Cache the parsed requirements of a posting."""
+        key = self._key(text)
+        signature = self.signature(text)
+        level = self.level(text)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (signature, copy.deepcopy(requirements), level)
+            for band, band_key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        """Drop an entry and its band memberships. Caller holds the lock."""
+        signature = self._entries.pop(key)[0]
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,146 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Optional
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the queue has reached its maximum depth."""
+
+
+class UserJobLimitError(RuntimeError):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+class TailorJob:
+    """A single unit of background work with per-stage progress."""
+
+    def __init__(self, user_id: str, stages: Optional[List[str]] = None):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = "queued"
+        self.stages = {stage: "pending" for stage in (stages or [])}
+        self.current_stage = None
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future: Optional[Future] = None
+        self.partials: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def start_stage(self, stage: str):
+        """Mark a stage as running."""
+        with self._lock:
+            self.stages[stage] = "running"
+            self.current_stage = stage
+
+    def finish_stage(self, stage: str, status: str = "done"):
+        """Mark a stage as finished."""
+        with self._lock:
+            self.stages[stage] = status
+            if self.current_stage == stage:
+                self.current_stage = None
+
+    def report_partial(self, stage: str, key: str, value):
+        """Record part of a stage's output that is already complete."""
+        with self._lock:
+            self.partials.setdefault(stage, {})[key] = value
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def snapshot(self) -> Dict:
+        """Return a consistent copy of the job state for the UI."""
+        with self._lock:
+            finished = sum(1 for s in self.stages.values() if s in ("done", "skipped"))
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "stages": dict(self.stages),
+                "partials": {stage: dict(values) for stage, values in self.partials.items()},
+                "current_stage": self.current_stage,
+                "progress": finished / len(self.stages) if self.stages else 0.0,
+                "error": self.error,
+                "queued_for": (self.started_at or time.time()) - self.submitted_at,
+                "elapsed": ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0,
+            }
+
+
+class JobQueue:
+    """Bounded worker pool that runs tailoring jobs off the Streamlit script thread."""
+
+    def __init__(self, max_workers: int = 4, max_queue_depth: int = 32,
+                 max_jobs_per_user: int = 1, job_ttl: int = 3600):
+        self.max_queue_depth = max_queue_depth
+        self.max_jobs_per_user = max_jobs_per_user
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tailor-job")
+        self._jobs: Dict[str, TailorJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: str, fn: Callable, *args, stages: Optional[List[str]] = None, **kwargs) -> str:
+        """Submit fn(job, *args, **kwargs) for background execution and return its job ID."""
+        with self._lock:
+            self._prune()
+            active = [job for job in self._jobs.values() if job.is_active]
+            if len(active) >= self.max_queue_depth:
+                raise JobQueueFullError("The server is busy, please try again in a moment")
+            if sum(1 for job in active if job.user_id == user_id) >= self.max_jobs_per_user:
+                raise UserJobLimitError("You already have a tailoring job in progress")
+
+            job = TailorJob(user_id, stages)
+            self._jobs[job.job_id] = job
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            return job.job_id
+
+    def get(self, job_id: str) -> Optional[TailorJob]:
+        """Return the job with the given ID, if it is still known."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet."""
+        job = self.get(job_id)
+        if job and job.future and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return True
+        return False
+
+    def stats(self) -> Dict:
+        """Return queue depth and worker usage."""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    def _run(self, job: TailorJob, fn: Callable, args: tuple, kwargs: Dict):
+        """Execute a job and record its outcome."""
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            for stage, status in list(job.stages.items()):
+                if status == "running":
+                    job.finish_stage(stage, "failed")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL. Caller holds the lock."""
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if not job.is_active and job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
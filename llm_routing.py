@@ -0,0 +1,250 @@
+"""Per-stage model routing and output limits for LLM calls.
+
+A routing profile maps each LLM call of ResumeTailor to a Route: the model,
+the completion token limit, the temperature and stop sequences. Structured
+extraction is bounded tightly on a fast model, long-form writing gets room
+(and, in the "quality" profile, a larger model).
+
+Route keys and the ResumeTailor methods that use them:
+
+    structure_resume  structure_resume
+    parse_job         parse_job_description
+    tailor_resume     tailor_resume (the rewritten resume)
+    tailor_analysis   tailor_resume (the improvement analysis)
+    ats               calculate_ats_score
+    compare_ats       compare_ats_scores
+    cover_letter      generate_cover_letter
+    cold_email        generate_cold_email
+
+Select a profile with LLM_ROUTING_PROFILE (default "uniform": one model,
+no output limits, as before routing existed), or point LLM_ROUTING_FILE at
+a JSON file of {"profile": {"route key": {"model": ..., "max_tokens": ...}}};
+routes missing from a profile use the default route.
+
+A response cut off at its token limit is never returned as if complete: a
+call that hit the route's max_tokens is retried once with twice the limit,
+and a response that is still truncated raises TruncatedResponse.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from rate_limiter import estimate_tokens
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+ROUTE_KEYS = ('structure_resume', 'parse_job', 'tailor_resume', 'tailor_analysis', 'ats', 'compare_ats',
+              'cover_letter', 'cold_email')
+
+
+@dataclass(frozen=True)
+class Route:
+    """Model and generation settings for one kind of LLM call."""
+    model: str = DEFAULT_MODEL
+    max_tokens: Optional[int] = None
+    temperature: float = 0.0
+    stop: Tuple[str, ...] = ()
+
+    def call_kwargs(self) -> Dict:
+        """Return the per-call arguments for the chat model."""
+        kwargs = {'temperature': self.temperature}
+        if self.max_tokens:
+            kwargs['max_tokens'] = self.max_tokens
+        if self.stop:
+            kwargs['stop'] = list(self.stop)
+        return kwargs
+
+
+_EXTRACTION_LIMITS = {
+    'structure_resume': Route(max_tokens=3000),
+    'parse_job': Route(max_tokens=1024),
+    'tailor_analysis': Route(max_tokens=1024),
+    'ats': Route(max_tokens=1536),
+    'compare_ats': Route(max_tokens=3072)
+}
+
+ROUTING_PROFILES: Dict[str, Dict[str, Route]] = {
+    # One model without output limits for every call
+    'uniform': {},
+    # Bounded outputs on the fast model; letters and emails get some variety
+    'fast': {
+        **_EXTRACTION_LIMITS,
+        'tailor_resume': Route(max_tokens=2500),
+        'cover_letter': Route(max_tokens=900, temperature=0.4),
+        'cold_email': Route(max_tokens=500, temperature=0.4)
+    },
+    # Extraction on the fast model, long-form writing on the larger one
+    'quality': {
+        **_EXTRACTION_LIMITS,
+        'tailor_resume': Route(model="llama-3.3-70b-versatile", max_tokens=3000),
+        'cover_letter': Route(model="llama-3.3-70b-versatile", max_tokens=1200, temperature=0.4),
+        'cold_email': Route(model="llama-3.3-70b-versatile", max_tokens=600, temperature=0.4)
+    }
+}
+DEFAULT_PROFILE = 'uniform'
+
+
+class TruncatedResponse(RuntimeError):
+    """The model stopped because it reached the completion token limit."""
+
+    def __init__(self, key: str, max_tokens: Optional[int]):
+        limit = f"{max_tokens} tokens" if max_tokens else "the model's output limit"
+        super().__init__(f"The {key} response was cut off at {limit}")
+        self.key = key
+        self.max_tokens = max_tokens
+
+
+class RoutingConfig:
+    """The routes of one profile."""
+
+    def __init__(self, name: str, routes: Dict[str, Route], default: Route = Route()):
+        self.name = name
+        self.routes = routes
+        self.default = default
+
+    def route(self, key: str) -> Route:
+        return self.routes.get(key, self.default)
+
+    def models(self) -> Tuple[str, ...]:
+        """Return every model the profile uses, default first."""
+        models = [self.default.model]
+        for route in self.routes.values():
+            if route.model not in models:
+                models.append(route.model)
+        return tuple(models)
+
+    def describe(self) -> Dict:
+        return {key: asdict(self.route(key)) for key in ROUTE_KEYS}
+
+
+def _route_from_dict(data: Dict, base: Route) -> Route:
+    unknown = set(data) - {'model', 'max_tokens', 'temperature', 'stop'}
+    if unknown:
+        raise ValueError(f"Unknown route settings: {', '.join(sorted(unknown))}")
+    if 'stop' in data:
+        data = {**data, 'stop': tuple(data['stop'] or ())}
+    return replace(base, **data)
+
+
+def load_routing(profile: Optional[str] = None, path: Optional[str] = None) -> RoutingConfig:
+    """Return the routing profile named by profile or LLM_ROUTING_PROFILE.
+
+    Profiles in the JSON file at path (or LLM_ROUTING_FILE) are added to the
+    built-in ones, and a file profile with a built-in name overrides its routes.
+    """
+    profile = profile or os.getenv('LLM_ROUTING_PROFILE', DEFAULT_PROFILE)
+    path = path or os.getenv('LLM_ROUTING_FILE')
+    profiles = dict(ROUTING_PROFILES)
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for name, routes in json.load(f).items():
+                merged = dict(profiles.get(name, {}))
+                for key, settings in routes.items():
+                    merged[key] = _route_from_dict(settings, merged.get(key, Route()))
+                profiles[name] = merged
+    if profile not in profiles:
+        raise ValueError(f"Unknown routing profile {profile!r}; choose from {', '.join(sorted(profiles))}")
+    return RoutingConfig(profile, profiles[profile])
+
+
+class RoutingStats:
+    """Calls, latency and completion tokens per route key."""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float, output_tokens: int, truncated: bool):
+        with self._lock:
+            stats = self._stats.setdefault(key, {'calls': 0, 'seconds': 0.0, 'output_tokens': 0, 'truncated': 0})
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['output_tokens'] += output_tokens
+            stats['truncated'] += truncated
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {key: {**stats, 'avg_seconds': round(stats['seconds'] / stats['calls'], 3),
+                          'avg_output_tokens': round(stats['output_tokens'] / stats['calls'], 1)}
+                    for key, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _output_tokens(message, text: str) -> int:
+    usage = getattr(message, 'usage_metadata', None) or {}
+    return usage.get('output_tokens') or estimate_tokens(text)
+
+
+def _finish_reason(message) -> Optional[str]:
+    return (getattr(message, 'response_metadata', None) or {}).get('finish_reason')
+
+
+class RoutedLLM:
+    """Apply a route's generation settings to every call and record its stats.
+
+    Wraps the client stack of the route's model; with_priority and
+    with_options are forwarded to it. Truncated responses are retried once
+    with a larger limit (invoke) or raise TruncatedResponse once the stream
+    ends (stream), so callers never mistake them for complete answers.
+    """
+
+    def __init__(self, llm, key: str, route: Route, stats: Optional[RoutingStats] = None):
+        self.llm = llm
+        self.key = key
+        self.route = route
+        self.stats = stats
+
+    def with_priority(self, priority: int) -> "RoutedLLM":
+        return RoutedLLM(self.llm.with_priority(priority), self.key, self.route, self.stats)
+
+    def with_options(self, **options) -> "RoutedLLM":
+        return RoutedLLM(self.llm.with_options(**options), self.key, self.route, self.stats)
+
+    def with_larger_output(self) -> "RoutedLLM":
+        """Return this client with twice the route's completion token limit, to retry a truncated response."""
+        max_tokens = self.route.max_tokens * 2 if self.route.max_tokens else None
+        return RoutedLLM(self.llm, self.key, replace(self.route, max_tokens=max_tokens), self.stats)
+
+    def _invoke(self, prompt, kwargs: Dict):
+        start = time.monotonic()
+        response = self.llm.invoke(prompt, **{**self.route.call_kwargs(), **kwargs})
+        truncated = _finish_reason(response) == 'length'
+        if self.stats:
+            self.stats.record(self.key, time.monotonic() - start, _output_tokens(response, str(response.content)),
+                              truncated)
+        return response, truncated
+
+    def invoke(self, prompt, **kwargs):
+        response, truncated = self._invoke(prompt, kwargs)
+        if truncated and self.route.max_tokens and 'max_tokens' not in kwargs:
+            response, truncated = self.with_larger_output()._invoke(prompt, kwargs)
+        if truncated:
+            raise TruncatedResponse(self.key, kwargs.get('max_tokens') or self.route.max_tokens)
+        return response
+
+    def stream(self, prompt, **kwargs):
+        start = time.monotonic()
+        text, usage_chunk, finish_reason = [], None, None
+        for chunk in self.llm.stream(prompt, **{**self.route.call_kwargs(), **kwargs}):
+            text.append(str(chunk.content))
+            if getattr(chunk, 'usage_metadata', None):
+                usage_chunk = chunk
+            finish_reason = _finish_reason(chunk) or finish_reason
+            yield chunk
+        if self.stats:
+            self.stats.record(self.key, time.monotonic() - start, _output_tokens(usage_chunk, "".join(text)),
+                              finish_reason == 'length')
+        if finish_reason == 'length':
+            raise TruncatedResponse(self.key, kwargs.get('max_tokens') or self.route.max_tokens)
+
+
+@lru_cache(maxsize=None)
+def get_routing_stats() -> RoutingStats:
+    """Return the process-wide per-route call statistics."""
+    return RoutingStats()
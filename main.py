@@ -7,38 +7,183 @@ from bs4 import BeautifulSoup
 import requests
 from docx import Document
 from PyPDF2 import PdfReader
-from sentence_transformers import SentenceTransformer
 import os
+import re
+import copy
+import io
 import json
-from typing import Dict, List, Optional
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
 from dotenv import load_dotenv
 import numpy as np
 import pandas as pd
 from resume_form import ResumeForm
 from resume_generator import ResumeGenerator
 from workflow_manager import WorkflowManager
+from ui_metrics import get_ui_metrics, measure, measured_fragment, session_ui_metrics
+from job_queue import JobQueue, JobQueueFullError, UserJobLimitError
+from stage_dag import DEGRADED, Stage, StageDAG, StageMemo, hash_values, normalize_whitespace, source_hash
+from results_store import ResultsStore, StageCheckpointStore, DEFAULT_RESULTS_DB
+from skill_analytics import get_skill_analytics
+from bullet_bank import DEFAULT_BANK_DIR, BulletBanks, requirement_texts
+from job_corpus import DEFAULT_CORPUS_DIR, IncompatibleCorpus, JobCorpus
+from embedding_backends import load_embedding_backend
+from skill_ontology import load_skill_ontology, token_ngrams
+from job_dedup import NearDuplicateIndex
+from rate_limiter import RateLimitedLLM, get_shared_limiter
+from request_coalescer import CoalescingLLM, get_shared_group
+from hedging import DeadlineExceeded, HedgedLLM, get_hedge_budget, get_latency_tracker
+from llm_routing import RoutedLLM, RoutingConfig, TruncatedResponse, get_routing_stats, load_routing
+from stream_json import IncrementalJSONParser
+from jd_extractor import JobDescriptionExtractor
+from map_reduce import chunk_token_budget, map_reduce_json, split_text
+from url_guard import check_public_url, public_session
+from resume_structure import (RESUME_SCHEMA_PROMPT, normalize_resume_data, is_empty_resume,
+                              serialize_resume)
 # from email_template import EmailTemplate
 
+# JSON structure of one ATS score, shared by the single and comparative scoring prompts
+ATS_SCORE_SCHEMA = """{
+    "total_score": <integer 0-100>,
+    "section_scores": {
+        "keyword_match": {
+            "score": <integer 0-30>,
+            "max": 30,
+            "details": ["<specific keywords found>", "<specific keywords missing>"]
+        },
+        "experience": {
+            "score": <integer 0-25>,
+            "max": 25,
+            "details": ["<specific experience matches>", "<experience gaps>"]
+        },
+        "skills": {
+            "score": <integer 0-25>,
+            "max": 25,
+            "details": ["<matched skills details>", "<missing skills impact>"]
+        },
+        "education": {
+            "score": <integer 0-10>,
+            "max": 10,
+            "details": ["<education alignment details>"]
+        },
+        "format": {
+            "score": <integer 0-10>,
+            "max": 10,
+            "details": ["<format strengths>", "<format improvements needed>"]
+        }
+    },
+    "improvement_suggestions": [
+        "<actionable suggestion 1>",
+        "<actionable suggestion 2>",
+        "<actionable suggestion 3>"
+    ],
+    "keyword_density": {
+        "<actual keyword from job requirements>": <integer frequency>
+    }
+}"""
+
 # Load environment variables
 load_dotenv()
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
 class ResumeTailor:
-    def __init__(self):
+    # Minimum cosine similarity for a semantic skill match
+    SEMANTIC_MATCH_THRESHOLD = 0.6
+    # Aliases per canonical skill included in the semantic pass
+    SEMANTIC_MAX_ALIASES = 8
+    # Seconds all LLM calls of a stage may take together (LLM_DEADLINE_SCALE multiplies them, 0 disables).
+    # tailor_resume covers both the rewrite and its analysis.
+    STAGE_DEADLINES = {
+        'structure_resume': 90,
+        'parse_job': 60,
+        'tailor_resume': 180,
+        'ats': 60,
+        'compare_ats': 90,
+        'cover_letter': 90,
+        'cold_email': 60
+    }
+    # Short extraction calls that may be hedged when LLM_HEDGING is on
+    HEDGED_STAGES = {'parse_job', 'ats'}
+    
+    def __init__(self, routing: Optional[RoutingConfig] = None):
         """Initialize the ResumeTailor with necessary components."""
         if not GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found in environment variables")
             
-        self.llm = ChatGroq(
-            model="llama-3.1-8b-instant",
-            groq_api_key=GROQ_API_KEY,
-            temperature=0,
-            max_tokens=None,
-            timeout=None,
-            max_retries=2
+        # Model, output limit and temperature of every LLM call (LLM_ROUTING_PROFILE)
+        self.routing = routing or load_routing()
+        self.llms = {model: self._build_llm(model) for model in self.routing.models()}
+        self.llm = self.llms[self.routing.default.model]
+        self.deadline_scale = float(os.getenv('LLM_DEADLINE_SCALE', 1))
+        self.hedging = os.getenv('LLM_HEDGING', '0').lower() in ('1', 'true', 'yes')
+        self.embedding_model = load_embedding_backend()
+        self.skill_ontology = load_skill_ontology()
+        self.job_index = NearDuplicateIndex(
+            threshold=float(os.getenv('JOB_DEDUP_THRESHOLD', 0.9)),
+            max_entries=int(os.getenv('JOB_DEDUP_MAX_ENTRIES', 2000))
         )
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # "preview" shows a local extraction while the LLM runs, "local" skips the LLM, "llm" skips the preview
+        self.job_parse_mode = os.getenv('JOB_PARSE_MODE', 'preview')
+        self.jd_extractor = JobDescriptionExtractor(self.skill_ontology)
+        # Inputs longer than this are split and extracted chunk by chunk
+        self.chunk_tokens = min(chunk_token_budget(self.routing.route(key).model)
+                                for key in ('structure_resume', 'parse_job'))
+        self.map_workers = int(os.getenv('MAP_REDUCE_WORKERS', 4))
+        # Structured resumes keyed by the hash of the extracted resume text
+        self.structured_resumes = StageMemo(max_entries=int(os.getenv('STRUCTURED_RESUME_CACHE_SIZE', 512)))
+        # Per-user banks of extra experience bullets, searched with the skill matching model
+        self.bullet_banks = BulletBanks(os.getenv('BULLET_BANK_DIR', DEFAULT_BANK_DIR), self.embedding_model)
+        self.bank_top_k = int(os.getenv('BULLET_BANK_TOP_K', 12))
+        self.bank_min_score = float(os.getenv('BULLET_BANK_MIN_SCORE', 0.3))
+        # Local corpus of parsed postings, searched by resume to suggest jobs
+        self.job_corpus = JobCorpus(os.getenv('JOB_CORPUS_DIR', DEFAULT_CORPUS_DIR), self.embedding_model,
+                                    self.skill_ontology)
         
+    @staticmethod
+    def _build_llm(model: str):
+        """Return the client stack shared by every route that uses the model."""
+        # Identical concurrent prompts are coalesced before they reach the limiter.
+        # Stage deadlines and hedges wrap each attempt, and every attempt (hedges
+        # included) goes through the limiter. Retries happen in RateLimitedLLM
+        # so 429s feed back into the shared limiter. Route settings such as
+        # max_tokens are passed per call and are part of the coalescing key.
+        return CoalescingLLM(
+            HedgedLLM(
+                RateLimitedLLM(
+                    ChatGroq(
+                        model=model,
+                        groq_api_key=GROQ_API_KEY,
+                        temperature=0,
+                        max_tokens=None,
+                        timeout=float(os.getenv('LLM_REQUEST_TIMEOUT', 60)),
+                        max_retries=0
+                    ),
+                    get_shared_limiter()
+                ),
+                get_latency_tracker(),
+                get_hedge_budget(),
+                percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', 0.95))
+            ),
+            get_shared_group(),
+            namespace=model
+        )
+    
+    def with_priority(self, priority: int) -> "ResumeTailor":
+        """Return a view of this tailor whose LLM calls are scheduled with another priority."""
+        tailor = copy.copy(self)
+        tailor.llms = {model: llm.with_priority(priority) for model, llm in self.llms.items()}
+        tailor.llm = tailor.llms[self.routing.default.model]
+        return tailor
+    
+    def with_routing(self, routing: RoutingConfig) -> "ResumeTailor":
+        """Return a view of this tailor that routes its LLM calls with another profile."""
+        tailor = copy.copy(self)
+        tailor.routing = routing
+        tailor.llms = {model: self.llms.get(model) or self._build_llm(model) for model in routing.models()}
+        tailor.llm = tailor.llms[routing.default.model]
+        return tailor
+    
     def extract_text_from_pdf(self, pdf_file) -> str:
         """Extract text content from a PDF file using PyPDF2."""
         pdf_reader = PdfReader(pdf_file)
@@ -52,17 +197,127 @@ class ResumeTailor:
         doc = Document(docx_file)
         return "\n".join([paragraph.text for paragraph in doc.paragraphs])
     
-    def parse_job_description(self, job_text: str, is_url: bool = True) -> Dict:
-        """Extract job details from the provided URL or text."""
+    def _stage_llm(self, stage: str, route: Optional[str] = None):
+        """Return the LLM client for one stage call, with the stage's deadline starting now.
+
+        The client uses the model and generation settings of the route (by
+        default the stage's own). All calls made through it share the
+        deadline, so a map-reduced extraction is bounded as a whole.
+        """
+        route = route or stage
+        settings = self.routing.route(route)
+        seconds = self.STAGE_DEADLINES.get(stage, 0) * self.deadline_scale
+        llm = self.llms[settings.model].with_options(
+            key=route,
+            deadline=time.monotonic() + seconds if seconds > 0 else None,
+            hedge=self.hedging and stage in self.HEDGED_STAGES
+        )
+        return RoutedLLM(llm, route, settings, get_routing_stats())
+    
+    def _invoke_json(self, prompt: str, on_partial: Optional[Callable] = None, depth: int = 2,
+                     llm=None) -> Any:
+        """Stream a JSON response from the LLM and parse it as it arrives.
+
+        on_partial(key, value) is called for each field above the given depth
+        (and each object at that depth) as soon as it is complete, with nested
+        keys joined by dots, e.g. 'section_scores.skills'.
+
+        A response cut off at the route's token limit is requested once more
+        with twice the limit; if that is cut off too, TruncatedResponse is
+        raised rather than returning the repaired fragment.
+        """
+        def on_value(path, value):
+            if 0 < len(path) < depth or (len(path) == depth and isinstance(value, dict)):
+                on_partial(".".join(str(part) for part in path), value)
+
+        llm = llm or self.llm
+        for attempt in range(2):
+            parser = IncrementalJSONParser(on_value if on_partial else None)
+            try:
+                for chunk in llm.stream(prompt):
+                    parser.feed(str(chunk.content))
+            except TruncatedResponse as e:
+                if attempt or not e.max_tokens:
+                    raise
+                llm = llm.with_larger_output()
+                continue
+            return parser.close()
+
+    def _invoke_json_chunked(self, build_prompt: Callable[[str], str], text: str,
+                             on_partial: Optional[Callable] = None, llm=None) -> Any:
+        """Extract JSON from text, map-reducing over chunks when it is too long for one prompt."""
+        if len(split_text(text, self.chunk_tokens)) == 1:
+            return self._invoke_json(build_prompt(text), on_partial, llm=llm)
+        return map_reduce_json(lambda prompt: self._invoke_json(prompt, llm=llm), build_prompt, text,
+                               self.chunk_tokens, self.map_workers)
+    
+    def structure_resume(self, resume_text: str, on_partial: Optional[Callable] = None) -> Dict:
+        """Extract the resume once into the format_resume_data schema.
+
+        Returns the structured resume and its compact serialization, which the
+        generation prompts use instead of the raw PDF text; sections outside
+        the schema are kept in additional_sections. Falls back to the
+        raw text, marked degraded, when extraction yields nothing usable.
+        """
+        key = hash_values(resume_text)
+        cached = self.structured_resumes.get(key)
+        if cached is not None:
+            return cached
+        
+        def build_prompt(resume_part):
+            return f"""Extract the following resume into JSON. Copy facts verbatim, do not invent or embellish anything,
+        and use empty strings or lists for information that is not present. Keep every responsibility and achievement
+        as its own list item, including numbers and metrics. Put every other section (projects, awards, publications,
+        languages, volunteering, ...) into additional_sections under its own title so nothing is dropped.
+        Return ONLY a JSON object with this structure:
+        {RESUME_SCHEMA_PROMPT}
+
+        Resume:
+        {resume_part}
+        """
+        
+        try:
+            structured_resume = normalize_resume_data(self._invoke_json_chunked(
+                build_prompt, resume_text, on_partial, llm=self._stage_llm('structure_resume')))
+        except Exception:
+            structured_resume = normalize_resume_data(None)
+        if is_empty_resume(structured_resume):
+            # Do not cache failures so the next run tries again
+            return {'structured_resume': structured_resume, 'resume_context': resume_text.strip(), DEGRADED: True}
+        
+        result = {'structured_resume': structured_resume, 'resume_context': serialize_resume(structured_resume)}
+        self.structured_resumes.put(key, result)
+        return result
+    
+    def parse_job_description(self, job_text: str, is_url: bool = True,
+                              on_partial: Optional[Callable] = None) -> Dict:
+        """Extract job details from the provided URL or text.
+
+        URLs must be http(s) URLs of public hosts (raises UnsafeURL otherwise).
+        """
         if is_url:
-            loader = WebBaseLoader(job_text)
+            loader = WebBaseLoader(check_public_url(job_text), session=public_session())
             data = loader.load()
             job_content = data[0].page_content
         else:
             job_content = job_text
         
+        # Reuse the requirements of a previously parsed near-duplicate posting
+        duplicate = self.job_index.query(job_content)
+        if duplicate:
+            return duplicate[0]
+        
+        if self.job_parse_mode in ('preview', 'local'):
+            local_requirements = self.jd_extractor.extract(job_content)
+            if self.job_parse_mode == 'local':
+                return local_requirements
+            if on_partial:
+                for key, value in local_requirements.items():
+                    on_partial(key, value)
+        
         # Use LLM to extract structured information
-        prompt = f"""Please analyze the following job description and extract key information in JSON format.
+        def build_prompt(job_part):
+            return f"""Please analyze the following job description and extract key information in JSON format.
         Return ONLY a JSON object with the following structure:
         {{
             "skills": ["skill1", "skill2", ...],
@@ -73,27 +328,20 @@ class ResumeTailor:
         }}
 
         Job Description:
-        {job_content}
+        {job_part}
         """
         
-        response = self.llm.invoke(prompt)
         try:
-            # Extract content and clean it to ensure it's valid JSON
-            content = str(response.content).strip()
-            if content.startswith("```json"):
-                content = content.split("```json")[1]
-            if content.endswith("```"):
-                content = content.rsplit("```", 1)[0]
-            return json.loads(content.strip())
-        except json.JSONDecodeError:
-            # Fallback structure if parsing fails
-            return {
-                "skills": [],
-                "experience": "Not specified",
-                "responsibilities": [],
-                "company": "Not specified",
-                "title": "Not specified"
-            }
+            job_requirements = self._invoke_json_chunked(build_prompt, job_content, on_partial,
+                                                         llm=self._stage_llm('parse_job'))
+        except (DeadlineExceeded, TruncatedResponse):
+            job_requirements = None
+        if isinstance(job_requirements, dict) and job_requirements:
+            self.job_index.add(job_content, job_requirements)
+            return job_requirements
+        else:
+            # Fall back to the local extraction if parsing fails
+            return {**self.jd_extractor.extract(job_content), DEGRADED: True}
     
     def match_skills(self, resume_text: str, job_requirements: Dict) -> Dict:
         """Match resume skills with job requirements using semantic similarity."""
@@ -102,52 +350,24 @@ class ResumeTailor:
             if not job_requirements.get('skills') or not isinstance(job_requirements['skills'], list):
                 return {
                     'matched_skills': [],
-                    'missing_skills': []
+                    'missing_skills': [],
+                    'evidence': {}
                 }
             
-            # Common tech variations dictionary
-            tech_variations = {
-                'ml': ['machine learning', 'ml'],
-                'ai': ['artificial intelligence', 'ai'],
-                'llm': ['large language model', 'llm', 'llama', 'gpt', 'language model'],
-                'nlp': ['natural language processing', 'nlp'],
-                'js': ['javascript', 'js'],
-                'ts': ['typescript', 'ts'],
-                'py': ['python', 'py'],
-                'react': ['reactjs', 'react.js', 'react'],
-                'node': ['nodejs', 'node.js', 'node'],
-                'db': ['database', 'db'],
-                'ui': ['user interface', 'ui'],
-                'ux': ['user experience', 'ux'],
-                'api': ['apis', 'api', 'restful', 'rest'],
-                'aws': ['amazon web services', 'aws'],
-                'gcp': ['google cloud platform', 'gcp'],
-                'azure': ['microsoft azure', 'azure'],
-                'k8s': ['kubernetes', 'k8s'],
-                'ci/cd': ['continuous integration', 'continuous deployment', 'ci/cd', 'cicd'],
-                'oop': ['object oriented programming', 'object-oriented', 'oop'],
-                'cv': ['computer vision', 'cv']
-            }
-            
             # Preprocess resume text
             resume_text_lower = resume_text.lower()
-            resume_sentences = [sent.strip() for sent in resume_text.split('.')]
+            resume_ngrams = set(token_ngrams(resume_text))
+            resume_segments = self._segment_resume(resume_text)
             
             # First pass: Direct keyword matching with variations
             matched_skills = []
             remaining_skills = []
+            evidence = {}
             
             for skill in job_requirements['skills']:
                 skill_lower = skill.lower()
-                # Check if this skill has known variations
-                variations = []
-                for var_key, var_list in tech_variations.items():
-                    if skill_lower in var_list:
-                        variations.extend(var_list)
-                    # Also check if any variation is in the skill name
-                    for var in var_list:
-                        if var in skill_lower:
-                            variations.extend(var_list)
+                # Aliases of every canonical skill this requirement mentions
+                variations = self.skill_ontology.expand(skill)
                 
                 # Add common text variations
                 variations.extend([
@@ -161,65 +381,99 @@ class ResumeTailor:
                 # Remove duplicates and empty strings
                 variations = list(set(filter(None, variations)))
                 
-                if any(var in resume_text_lower for var in variations):
+                if self._mentions(resume_text_lower, resume_ngrams, variations):
                     matched_skills.append(skill)
+                    evidence[skill] = {
+                        'text': next((seg for seg in resume_segments
+                                      if self._mentions(seg.lower(), set(token_ngrams(seg)), variations)), ''),
+                        'score': 1.0,
+                        'method': 'keyword'
+                    }
                 else:
                     remaining_skills.append(skill)
             
             # Second pass: Semantic matching for remaining skills
-            if remaining_skills:
-                # Prepare embeddings for remaining skills and their variations
+            if remaining_skills and resume_segments:
+                # Expand each remaining skill into its variations, remembering the owner
                 skill_texts = []
-                skill_map = {}  # Map expanded texts back to original skills
+                skill_owner = []
                 
-                for skill in remaining_skills:
-                    skill_lower = skill.lower()
-                    variations = []
-                    # Add known variations
-                    for var_list in tech_variations.values():
-                        if any(var in skill_lower for var in var_list):
-                            variations.extend(var_list)
-                    # Add the original skill
-                    variations.append(skill_lower)
-                    # Remove duplicates
-                    variations = list(set(variations))
+                for skill_idx, skill in enumerate(remaining_skills):
+                    variations = self.skill_ontology.expand(skill, max_aliases=self.SEMANTIC_MAX_ALIASES)
                     
                     for var in variations:
                         skill_texts.append(var)
-                        skill_map[var] = skill
+                        skill_owner.append(skill_idx)
                 
-                # Convert to embeddings
-                skill_embeddings = self.embedding_model.encode(skill_texts)
-                resume_embeddings = self.embedding_model.encode(resume_sentences)
+                # One batched encode; normalized so dot products are cosine similarities
+                embeddings = self.embedding_model.encode(skill_texts + resume_segments, normalize_embeddings=True)
+                skill_embeddings = embeddings[:len(skill_texts)]
+                segment_embeddings = embeddings[len(skill_texts):]
                 
-                # Calculate similarities
-                similarities = resume_embeddings @ skill_embeddings.T
-                max_similarities = np.max(similarities, axis=0)
+                similarities = skill_embeddings @ segment_embeddings.T
+                best_segment = similarities.argmax(axis=1)
+                best_score = similarities[np.arange(len(skill_texts)), best_segment]
                 
-                # Use a moderate threshold for semantic matching
-                threshold = 0.6  # Higher threshold for more precise matching
+                # Reduce variations to their skill: best score and the variation achieving it
+                skill_owner = np.asarray(skill_owner)
+                skill_best = np.full(len(remaining_skills), -np.inf)
+                np.maximum.at(skill_best, skill_owner, best_score)
+                is_best = best_score == skill_best[skill_owner]
+                best_text = np.empty(len(remaining_skills), dtype=int)
+                best_text[skill_owner[is_best][::-1]] = np.flatnonzero(is_best)[::-1]
                 
-                matched_variations = set()
-                for idx, skill_text in enumerate(skill_texts):
-                    if max_similarities[idx] > threshold:
-                        original_skill = skill_map[skill_text]
-                        if original_skill not in matched_skills:
-                            matched_skills.append(original_skill)
-                            matched_variations.add(skill_text)
+                for skill_idx in np.flatnonzero(skill_best > self.SEMANTIC_MATCH_THRESHOLD):
+                    skill = remaining_skills[skill_idx]
+                    matched_skills.append(skill)
+                    evidence[skill] = {
+                        'text': resume_segments[best_segment[best_text[skill_idx]]],
+                        'score': float(skill_best[skill_idx]),
+                        'method': 'semantic'
+                    }
             
             # Get missing skills
             missing_skills = [skill for skill in job_requirements['skills'] if skill not in matched_skills]
             
             return {
                 'matched_skills': matched_skills,
-                'missing_skills': missing_skills
+                'missing_skills': missing_skills,
+                'evidence': evidence
             }
         except Exception as e:
             st.error(f"Error in skill matching: {str(e)}")
             return {
                 'matched_skills': [],
-                'missing_skills': []
+                'missing_skills': [],
+                'evidence': {},
+                DEGRADED: True
             }
+    
+    @staticmethod
+    def _mentions(text_lower: str, text_ngrams: set, variations: List[str]) -> bool:
+        """Check whether any variation occurs in the text.
+        
+        Short aliases such as "ml" or "ts" must match whole tokens so they are
+        not found inside unrelated words; longer ones may match as substrings.
+        """
+        return any(var in text_ngrams or (len(var) >= 4 and var in text_lower) for var in variations)
+    
+    @staticmethod
+    def _segment_resume(resume_text: str, max_words: int = 40, min_chars: int = 3) -> List[str]:
+        """Split resume text into short, non-empty segments for semantic matching.
+        
+        Splits on line breaks, bullets and sentence ends (but not on dots inside
+        tokens such as "node.js"), then windows any segment longer than
+        max_words so no single embedding covers a whole section.
+        """
+        segments = []
+        for part in re.split(r'\n+|[•●▪◦]|(?<=[.!?;])\s+', resume_text):
+            words = part.strip(' \t-*.;!?').split()
+            for start in range(0, len(words), max_words):
+                segment = " ".join(words[start:start + max_words])
+                if len(segment) >= min_chars:
+                    segments.append(segment)
+        return segments
+    
     def generate_cover_letter(self, resume_text: str, job_requirements: Dict, skill_matches: Dict) -> str:
         """Generate a personalized cover letter based on the resume and job requirements."""
         prompt = f"""Write a professional cover letter for a job application following this specific format and guidelines.
@@ -267,11 +521,38 @@ class ResumeTailor:
         make it fully personalised by taking all the relevant information from resume like name,address, also autofill the company name and address according to your knowledge.
         """
         
-        response = self.llm.invoke(prompt)
+        response = self._stage_llm('cover_letter').invoke(prompt)
         return str(response.content)
     
-    def tailor_resume(self, resume_text: str, job_requirements: Dict, skill_matches: Dict) -> Dict:
-        """Generate a tailored resume using the LLM and provide improvement analysis."""
+    def select_bank_bullets(self, bullet_bank: Optional[Dict], job_requirements: Dict) -> List[Dict]:
+        """Return the bullets of a user's bank most relevant to the job (bullet_bank from BulletBanks.reference)."""
+        if not bullet_bank:
+            return []
+        bank = self.bullet_banks.get(bullet_bank['user_id'])
+        return bank.search(requirement_texts(job_requirements), k=self.bank_top_k, min_score=self.bank_min_score)
+    
+    def find_jobs(self, resume_text: str, k: int = 10) -> List[Dict]:
+        """Return the postings of the job corpus that fit the resume best, with match explanations."""
+        return self.job_corpus.search(resume_text, k=k, segments=self._segment_resume(resume_text))
+    
+    def tailor_resume(self, resume_text: str, job_requirements: Dict, skill_matches: Dict,
+                      on_partial: Optional[Callable] = None, bank_bullets: Optional[List[Dict]] = None) -> Dict:
+        """Generate a tailored resume using the LLM and provide improvement analysis.
+        
+        bank_bullets are the candidate's own bullets selected for this job;
+        only those, not the whole bank, are offered to the rewrite.
+        """
+        llm = self._stage_llm('tailor_resume')
+        analysis_llm = self._stage_llm('tailor_resume', route='tailor_analysis')
+        bank_section = ""
+        if bank_bullets:
+            bank_lines = "\n".join(f"        - {bullet['text']}" + (f" ({bullet['role']})" if bullet.get('role') else "")
+                                   for bullet in bank_bullets)
+            bank_section = f"""
+        Additional Experience Bullets (the candidate's own bullets, not in the uploaded resume; they count as
+        already present, so use the ones that strengthen the resume under the matching role and skip the rest):
+{bank_lines}
+        """
         resume_prompt = f"""You are an expert ATS optimization specialist. Rewrite the following resume to maximize its ATS score while maintaining readability.
         The goal is to significantly improve the resume's ATS score by incorporating job-specific keywords and requirements.
         Keep in mind that dont add any skills that are not explicitly mentioned in the job requirements.
@@ -313,7 +594,7 @@ class ResumeTailor:
 
         Original Resume:
         {resume_text}
-        
+        {bank_section}
         Job Requirements:
         {json.dumps(job_requirements, indent=2)}
         
@@ -321,7 +602,7 @@ class ResumeTailor:
         """
         
         
-        tailored_resume = str(self.llm.invoke(resume_prompt).content)
+        tailored_resume = str(llm.invoke(resume_prompt).content)
         
         # Then, get the analysis separately
         analysis_prompt = f"""Analyze how the resume matches the job requirements and provide a detailed improvement analysis.
@@ -372,42 +653,35 @@ class ResumeTailor:
         Remember: Do not infer, assume, or suggest skills that are not explicitly stated in the resume.
         """
         
-        analysis_response = self.llm.invoke(analysis_prompt)
+        fallback = {
+            "improvements": ["Error analyzing improvements"],
+            "skills_analysis": {
+                "matched": ["Error analyzing matched skills"],
+                "missing": ["Error analyzing missing skills"]
+            },
+            "achievement_emphasis": ["Error analyzing achievements"],
+            "keyword_optimization": ["Error analyzing keywords"]
+        }
         try:
-            content = str(analysis_response.content).strip()
-            # More robust JSON extraction
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            content = content.strip()
-            
-            try:
-                analysis_result = json.loads(content)
-                analysis_result["tailored_resume"] = tailored_resume
-                return analysis_result
-            except json.JSONDecodeError as json_err:
-                return {
-                    "improvements": ["Error analyzing improvements"],
-                    "skills_analysis": {
-                        "matched": ["Error analyzing matched skills"],
-                        "missing": ["Error analyzing missing skills"]
-                    },
-                    "achievement_emphasis": ["Error analyzing achievements"],
-                    "keyword_optimization": ["Error analyzing keywords"],
-                    "tailored_resume": tailored_resume
-                }
-        except Exception as e:
-            return {
-                "improvements": ["Error analyzing improvements"],
-                "skills_analysis": {
-                    "matched": ["Error analyzing matched skills"],
-                    "missing": ["Error analyzing missing skills"]
-                },
-                "achievement_emphasis": ["Error analyzing achievements"],
-                "keyword_optimization": ["Error analyzing keywords"],
-                "tailored_resume": tailored_resume
-            }
+            analysis_result = self._invoke_json(analysis_prompt, on_partial, llm=analysis_llm)
+        except Exception:
+            analysis_result = None
+        if not isinstance(analysis_result, dict):
+            analysis_result = {}
+        if any(key not in analysis_result for key in fallback) or \
+                not isinstance(analysis_result.get("skills_analysis"), dict) or \
+                any(key not in analysis_result["skills_analysis"] for key in fallback["skills_analysis"]):
+            analysis_result[DEGRADED] = True
+        # Fields lost to a truncated or malformed response fall back individually
+        for key, value in fallback.items():
+            analysis_result.setdefault(key, value)
+        if isinstance(analysis_result["skills_analysis"], dict):
+            for key, value in fallback["skills_analysis"].items():
+                analysis_result["skills_analysis"].setdefault(key, value)
+        else:
+            analysis_result["skills_analysis"] = fallback["skills_analysis"]
+        analysis_result["tailored_resume"] = tailored_resume
+        return analysis_result
     
     def generate_docx(self, tailored_content: str) -> Document:
         """Convert the tailored content into a DOCX file."""
@@ -458,14 +732,12 @@ class ResumeTailor:
         [Contact Info]
         """
         
-        response = self.llm.invoke(prompt)
+        response = self._stage_llm('cold_email').invoke(prompt)
         return str(response.content)
 
-    def calculate_ats_score(self, resume_text: str, job_requirements: Dict, skill_matches: Dict) -> Dict:
-        """Calculate a comprehensive ATS score for the resume based on multiple factors."""
-        prompt = f"""You are an ATS (Applicant Tracking System) expert. Analyze the resume against the job requirements and calculate scores.
-
-        Rules for scoring:
+    def _ats_rubric(self, job_requirements: Dict, skill_matches: Dict) -> str:
+        """Return the ATS scoring rules shared by single and comparative scoring prompts."""
+        return f"""Rules for scoring:
         1. All scores must be integers (whole numbers)
         2. Each section score must not exceed its maximum value
         3. Total score must be the sum of all section scores
@@ -498,7 +770,14 @@ class ResumeTailor:
            - Standard section headers
            - Bullet point structure
            - Content readability
+        """
+    
+    def calculate_ats_score(self, resume_text: str, job_requirements: Dict, skill_matches: Dict,
+                            on_partial: Optional[Callable] = None) -> Dict:
+        """Calculate a comprehensive ATS score for the resume based on multiple factors."""
+        prompt = f"""You are an ATS (Applicant Tracking System) expert. Analyze the resume against the job requirements and calculate scores.
 
+        {self._ats_rubric(job_requirements, skill_matches)}
         Resume to analyze:
         {resume_text}
 
@@ -506,73 +785,78 @@ class ResumeTailor:
         {json.dumps(job_requirements, indent=2)}
 
         Return a JSON object with this exact structure:
-        {{
-            "total_score": <integer 0-100>,
-            "section_scores": {{
-                "keyword_match": {{
-                    "score": <integer 0-30>,
-                    "max": 30,
-                    "details": ["<specific keywords found>", "<specific keywords missing>"]
-                }},
-                "experience": {{
-                    "score": <integer 0-25>,
-                    "max": 25,
-                    "details": ["<specific experience matches>", "<experience gaps>"]
-                }},
-                "skills": {{
-                    "score": <integer 0-25>,
-                    "max": 25,
-                    "details": ["<matched skills details>", "<missing skills impact>"]
-                }},
-                "education": {{
-                    "score": <integer 0-10>,
-                    "max": 10,
-                    "details": ["<education alignment details>"]
-                }},
-                "format": {{
-                    "score": <integer 0-10>,
-                    "max": 10,
-                    "details": ["<format strengths>", "<format improvements needed>"]
-                }}
-            }},
-            "improvement_suggestions": [
-                "<actionable suggestion 1>",
-                "<actionable suggestion 2>",
-                "<actionable suggestion 3>"
-            ],
-            "keyword_density": {{
-                "<actual keyword from job requirements>": <integer frequency>
-            }}
-        }}
+        {ATS_SCORE_SCHEMA}
         """
         
         try:
-            response = self.llm.invoke(prompt)
-            content = str(response.content).strip()
-            # Extract JSON content
-            content = self._extract_json_content(content)
-            
-            # Parse and validate
-            result = self._validate_ats_score(json.loads(content))
+            # Parse while streaming so completed sections can be shown early
+            result = self._validate_ats_score(self._invoke_json(prompt, on_partial, llm=self._stage_llm('ats')))
             return result
             
         except Exception as e:
             st.error(f"Error in ATS scoring: {str(e)}")
             return self._get_default_ats_score()
     
-    def _extract_json_content(self, content: str) -> str:
-        """Extract JSON content from LLM response."""
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
-        return content.strip()
+    def compare_ats_scores(self, original_resume: str, tailored_resume: str, job_requirements: Dict,
+                           skill_matches: Dict, on_partial: Optional[Callable] = None) -> Dict:
+        """Score the original and tailored resume in one call.
+
+        The rubric, job requirements and schema are sent once for both
+        versions. Returns both validated score objects and the per-section
+        change with the model's explanation of it.
+        """
+        prompt = f"""You are an ATS (Applicant Tracking System) expert. Score two versions of the same resume, the original
+        and the tailored one, against the job requirements. Score each version independently with the same rules.
+
+        {self._ats_rubric(job_requirements, skill_matches)}
+        Original resume:
+        {original_resume}
+
+        Tailored resume:
+        {tailored_resume}
+
+        Job Requirements:
+        {json.dumps(job_requirements, indent=2)}
+
+        Return a JSON object with this exact structure:
+        {{
+            "original": <SCORE of the original resume>,
+            "tailored": <SCORE of the tailored resume>,
+            "section_changes": {{
+                "<section name>": "<one sentence on what changed between the versions in this section>"
+            }}
+        }}
+        where every SCORE has this structure:
+        {ATS_SCORE_SCHEMA}
+        Only the tailored SCORE needs improvement_suggestions; return an empty list for the original.
+        """
+        
+        try:
+            result = self._invoke_json(prompt, on_partial, depth=3, llm=self._stage_llm('compare_ats'))
+            initial_score = self._validate_ats_score(result['original'])
+            final_score = self._validate_ats_score(result['tailored'])
+            reasons = result.get('section_changes') or {}
+        except Exception as e:
+            st.error(f"Error in ATS scoring: {str(e)}")
+            initial_score, final_score, reasons = self._get_default_ats_score(), self._get_default_ats_score(), {}
+        
+        delta = {'total': final_score['total_score'] - initial_score['total_score'], 'sections': {}}
+        for section, data in final_score['section_scores'].items():
+            before = initial_score['section_scores'].get(section, {}).get('score', 0)
+            delta['sections'][section] = {
+                'change': data['score'] - before,
+                'reason': str(reasons.get(section, '')) if isinstance(reasons, dict) else ''
+            }
+        return {'initial_ats_score': initial_score, 'final_ats_score': final_score, 'ats_delta': delta,
+                DEGRADED: bool(initial_score.get(DEGRADED) or final_score.get(DEGRADED))}
     
     def _validate_ats_score(self, score_data: Dict) -> Dict:
-        """Validate and fix ATS score data."""
-        # Validate scores are integers and within range
-        score_data["total_score"] = int(score_data["total_score"])
+        """Validate and fix ATS score data.
         
+        Raises ValueError unless every section has a score, so a truncated
+        response repaired by the tolerant parser is treated as a failed call
+        instead of a low total computed from the sections that arrived.
+        """
         # Ensure section scores are valid
         max_scores = {
             'keyword_match': 30,
@@ -582,14 +866,24 @@ class ResumeTailor:
             'format': 10
         }
         
+        sections = score_data.get("section_scores") if isinstance(score_data, dict) else None
+        missing = [section for section in max_scores
+                   if not isinstance((sections or {}).get(section), dict) or "score" not in sections[section]]
+        if missing:
+            raise ValueError(f"ATS score response is missing section scores: {', '.join(missing)}")
+        
+        # Validate scores are integers and within range
+        score_data["total_score"] = int(score_data.get("total_score", 0))
+        score_data.setdefault("improvement_suggestions", [])
+        score_data.setdefault("keyword_density", {})
+        
         for section, max_score in max_scores.items():
-            if section in score_data["section_scores"]:
-                data = score_data["section_scores"][section]
-                data["score"] = min(int(data["score"]), max_score)
-                data["max"] = max_score
+            data = score_data["section_scores"][section]
+            data["score"] = min(int(data["score"]), max_score)
+            data["max"] = max_score
         
         # Recalculate total score
-        total = sum(data["score"] for data in score_data["section_scores"].values())
+        total = sum(score_data["section_scores"][section]["score"] for section in max_scores)
         score_data["total_score"] = total
         
         return score_data
@@ -597,6 +891,7 @@ class ResumeTailor:
     def _get_default_ats_score(self) -> Dict:
         """Return default ATS score structure for error cases."""
         return {
+            DEGRADED: True,
             "total_score": 0,
             "section_scores": {
                 "keyword_match": {"score": 0, "max": 30, "details": ["Error analyzing keywords"]},
@@ -609,6 +904,198 @@ class ResumeTailor:
             "keyword_density": {}
         }
 
+# Stages of the tailoring pipeline, in execution order, with their UI labels
+TAILOR_STAGES = {
+    'structure_resume': "Structuring resume",
+    'parse_job': "Parsing job description",
+    'match_skills': "Matching skills",
+    'select_bullets': "Selecting bullets from your bank",
+    'initial_ats': "Scoring original resume",
+    'tailor_resume': "Tailoring resume",
+    'final_ats': "Scoring tailored resume",
+    'compare_ats': "Scoring original and tailored resume",
+    'cold_email': "Writing cold email",
+    'cover_letter': "Writing cover letter"
+}
+
+# DAG stage end statuses as shown in job progress
+JOB_STAGE_STATUS = {'done': 'done', 'cached': 'skipped', 'restored': 'skipped', 'degraded': 'degraded',
+                    'failed': 'failed'}
+
+@st.cache_resource
+def get_tailor() -> ResumeTailor:
+    """Return the process-wide ResumeTailor so models are loaded once."""
+    return ResumeTailor()
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Return the process-wide worker pool for tailoring jobs."""
+    return JobQueue(
+        max_workers=int(os.getenv('TAILOR_WORKERS', 4)),
+        max_queue_depth=int(os.getenv('TAILOR_QUEUE_DEPTH', 32)),
+        max_jobs_per_user=int(os.getenv('TAILOR_JOBS_PER_USER', 1))
+    )
+
+@st.cache_resource
+def get_results_store() -> ResultsStore:
+    """Return the durable store of tailoring results."""
+    return ResultsStore(
+        os.getenv('RESULTS_DB_PATH', DEFAULT_RESULTS_DB),
+        max_runs_per_user=int(os.getenv('RESULTS_MAX_RUNS_PER_USER', 20)),
+        max_age_days=float(os.getenv('RESULTS_MAX_AGE_DAYS', 30))
+    )
+
+@st.cache_resource
+def get_stage_checkpoints() -> Optional[StageCheckpointStore]:
+    """Return the durable stage checkpoints, or None when STAGE_CHECKPOINT_TTL_HOURS is 0."""
+    ttl_hours = float(os.getenv('STAGE_CHECKPOINT_TTL_HOURS', 24))
+    if ttl_hours <= 0:
+        return None
+    return StageCheckpointStore(os.getenv('RESULTS_DB_PATH', DEFAULT_RESULTS_DB), ttl_hours=ttl_hours)
+
+def build_tailor_dag(tailor: ResumeTailor, comparative_ats: Optional[bool] = None,
+                     checkpoints: Optional[StageCheckpointStore] = None) -> StageDAG:
+    """Declare the tailoring pipeline as stages with explicit inputs and outputs.
+
+    With comparative_ats (default: ATS_SCORING_MODE=comparative) both resume
+    versions are scored in one call after tailoring instead of in two.
+    
+    Stage versions cover the settings that change a stage's output for the
+    same inputs, so memoized outputs are only reused when they would be
+    recomputed identically; they include a hash of the code of each stage,
+    so editing a prompt template invalidates outputs saved with the old one.
+    Pasted texts are fingerprinted without their whitespace, and skill
+    matching only depends on the required skills.
+    
+    With checkpoints, each stage's outputs are also saved durably as it
+    completes, so a retried run resumes after its last successful stage.
+    """
+    if comparative_ats is None:
+        comparative_ats = os.getenv('ATS_SCORING_MODE', 'separate') == 'comparative'
+    
+    def route_version(*keys, code=()):
+        """Version of a stage that sends the routes' calls with prompts built by code."""
+        return hash_values([tailor.routing.route(key) for key in keys], source_hash(*code))
+    
+    ats_code = (tailor._ats_rubric, tailor._validate_ats_score, ATS_SCORE_SCHEMA)
+    
+    text_fingerprint = {'resume_text': normalize_whitespace}
+    
+    def tailor_resume(resume_context, job_requirements, skill_matches, bank_bullets, on_partial=None):
+        analysis_result = tailor.tailor_resume(resume_context, job_requirements, skill_matches, on_partial,
+                                               bank_bullets=bank_bullets)
+        analysis_result['job_requirements'] = job_requirements
+        analysis_result['skill_matches'] = skill_matches
+        return analysis_result
+    
+    if comparative_ats:
+        ats_stages = [
+            Stage('compare_ats', lambda resume_text, analysis_result, job_requirements, skill_matches,
+                  on_partial=None: tailor.compare_ats_scores(resume_text, analysis_result['tailored_resume'],
+                                                             job_requirements, skill_matches, on_partial),
+                  inputs=['resume_text', 'analysis_result', 'job_requirements', 'skill_matches'],
+                  outputs=['initial_ats_score', 'final_ats_score', 'ats_delta'], partial=True,
+                  version=route_version('compare_ats', code=(tailor.compare_ats_scores, *ats_code)),
+                  fingerprint=text_fingerprint)
+        ]
+    else:
+        ats_stages = [
+            Stage('initial_ats', lambda resume_text, job_requirements, skill_matches, on_partial=None:
+                  tailor.calculate_ats_score(resume_text, job_requirements, skill_matches, on_partial),
+                  inputs=['resume_text', 'job_requirements', 'skill_matches'], outputs=['initial_ats_score'],
+                  partial=True, version=route_version('ats', code=(tailor.calculate_ats_score, *ats_code)),
+                  fingerprint=text_fingerprint),
+            Stage('final_ats', lambda analysis_result, job_requirements, skill_matches, on_partial=None:
+                  tailor.calculate_ats_score(analysis_result['tailored_resume'], job_requirements, skill_matches,
+                                             on_partial),
+                  inputs=['analysis_result', 'job_requirements', 'skill_matches'], outputs=['final_ats_score'],
+                  partial=True, version=route_version('ats', code=(tailor.calculate_ats_score, *ats_code)))
+        ]
+    
+    # Generation prompts read the compact structured resume; skill matching keeps the raw text for evidence
+    # quotes and the initial ATS score rates the resume as uploaded, not a rewrite of it
+    return StageDAG([
+        Stage('structure_resume', tailor.structure_resume,
+              inputs=['resume_text'], outputs=['structured_resume', 'resume_context'], partial=True,
+              version=route_version('structure_resume', code=(tailor.structure_resume, RESUME_SCHEMA_PROMPT,
+                                                              serialize_resume)),
+              fingerprint=text_fingerprint),
+        Stage('parse_job', tailor.parse_job_description,
+              inputs=['job_text', 'is_url'], outputs=['job_requirements'], partial=True,
+              version=hash_values(tailor.job_parse_mode,
+                                  route_version('parse_job', code=(tailor.parse_job_description,))),
+              fingerprint={'job_text': normalize_whitespace}),
+        Stage('match_skills', tailor.match_skills,
+              inputs=['resume_text', 'job_requirements'], outputs=['skill_matches'],
+              version=hash_values(tailor.embedding_model.name, tailor.SEMANTIC_MATCH_THRESHOLD,
+                                  source_hash(tailor.match_skills)),
+              fingerprint={**text_fingerprint, 'job_requirements': lambda requirements: requirements.get('skills')}),
+        Stage('select_bullets', tailor.select_bank_bullets,
+              inputs=['bullet_bank', 'job_requirements'], outputs=['bank_bullets'],
+              version=hash_values(tailor.embedding_model.name, tailor.bank_top_k, tailor.bank_min_score)),
+        Stage('tailor_resume', tailor_resume,
+              inputs=['resume_context', 'job_requirements', 'skill_matches', 'bank_bullets'],
+              outputs=['analysis_result'],
+              partial=True, version=route_version('tailor_resume', 'tailor_analysis', code=(tailor.tailor_resume,))),
+        *ats_stages,
+        Stage('cold_email', lambda resume_context, job_requirements, skill_matches:
+              tailor.generate_cold_email(resume_context, job_requirements, skill_matches),
+              inputs=['resume_context', 'job_requirements', 'skill_matches'], outputs=['cold_email'],
+              version=route_version('cold_email', code=(tailor.generate_cold_email,))),
+        Stage('cover_letter', lambda resume_context, job_requirements, skill_matches:
+              tailor.generate_cover_letter(resume_context, job_requirements, skill_matches),
+              inputs=['resume_context', 'job_requirements', 'skill_matches'], outputs=['cover_letter'],
+              version=route_version('cover_letter', code=(tailor.generate_cover_letter,)))
+    ], memo=StageMemo(max_entries=int(os.getenv('STAGE_MEMO_SIZE', 2048))), checkpoints=checkpoints)
+
+@st.cache_resource
+def get_tailor_dag() -> StageDAG:
+    """Return the process-wide tailoring DAG so stage memos are shared across sessions."""
+    return build_tailor_dag(get_tailor(), checkpoints=get_stage_checkpoints())
+
+def collect_tailor_results(run) -> dict:
+    """Return the results of a tailoring DAG run in the shape stored and displayed by the app."""
+    results = {name: run.values[name] for name in (
+        'analysis_result', 'initial_ats_score', 'final_ats_score', 'cold_email',
+        'cover_letter', 'resume_text', 'job_requirements', 'skill_matches', 'structured_resume'
+    )}
+    results['ats_delta'] = run.values.get('ats_delta')
+    results['bank_bullets'] = run.values.get('bank_bullets', [])
+    results['critical_path'] = run.critical_path()
+    results['reused_stages'] = run.reused_stages()
+    results['restored_stages'] = run.restored_stages()
+    results['degraded_stages'] = run.degraded_stages()
+    results['stage_inputs'] = run.stage_inputs
+    return results
+
+def tailor_input_hash(resume_text: str, job_text: str, is_url: bool, bullet_bank: Optional[Dict] = None) -> str:
+    """Return the key saved results are stored under; bank edits give new results."""
+    if bullet_bank is None:
+        return hash_values(resume_text, job_text, is_url)
+    return hash_values(resume_text, job_text, is_url, bullet_bank)
+
+def run_tailor_pipeline(job, dag: StageDAG, store: ResultsStore, input_hash: str,
+                        resume_text: str, job_text: str, is_url: bool, bullet_bank: Optional[Dict] = None,
+                        recompute: bool = False) -> dict:
+    """Run the tailoring DAG, reporting per-stage progress on the job, and persist the results.
+
+    With recompute, stages run again instead of reusing memoized outputs.
+    Runs in which a stage fell back to a degraded result are not saved.
+    """
+    run = dag.run(
+        {'resume_text': resume_text, 'job_text': job_text, 'is_url': is_url, 'bullet_bank': bullet_bank},
+        on_stage_start=job.start_stage,
+        on_stage_end=lambda stage, status: job.finish_stage(stage, JOB_STAGE_STATUS[status]),
+        on_partial=job.report_partial,
+        reuse=not recompute
+    )
+    results = collect_tailor_results(run)
+    if not results['degraded_stages']:
+        # Saved from the worker so results survive even if the session is gone
+        store.save(job.user_id, input_hash, results)
+        get_skill_analytics().record(results)
+    return results
+
 class AppNavigation:
     """Handle navigation and workflow selection in the app."""
     
@@ -712,43 +1199,52 @@ def handle_create_new_workflow():
     elif st.session_state.form_step == 4:
         form.skills_form()
     elif st.session_state.form_step == 5:
+        generated_now = False
         if form.review_form():
             try:
                 # Format data for template
                 resume_data = generator.format_resume_data(st.session_state.form_data)
                 
-                # Generate resume versions
+                # Generate resume versions; kept in the session so later reruns do not regenerate them
                 html_content = generator.render_html(resume_data)
                 pdf_content = generator.generate_pdf(html_content)
-                
-                # Show preview and download options
-                preview_tabs = st.tabs(["📄 Resume Preview", "💾 Download Options"])
-                
-                with preview_tabs[0]:
-                    st.components.v1.html(html_content, height=800, scrolling=True)
-                
-                with preview_tabs[1]:
-                    st.download_button(
-                        label="⬇️ Download PDF Resume",
-                        data=pdf_content,
-                        file_name="generated_resume.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    
-                    st.download_button(
-                        label="⬇️ Download HTML Resume",
-                        data=html_content,
-                        file_name="generated_resume.html",
-                        mime="text/html",
-                        use_container_width=True
-                    )
-                
-                # Show success message
-                WorkflowManager.show_success_message("Resume generated successfully!")
+                st.session_state.generated_resume = {'html': html_content, 'pdf': pdf_content}
+                generated_now = True
                 
             except Exception as e:
                 st.error(f"Error generating resume: {str(e)}")
+        
+        if st.session_state.get('generated_resume'):
+            show_generated_resume(st.session_state.generated_resume)
+            if generated_now:
+                # Show success message
+                WorkflowManager.show_success_message("Resume generated successfully!")
+
+@measured_fragment("generated resume")
+def show_generated_resume(generated: dict):
+    """Show the generated resume preview and downloads; downloads rerun only this fragment."""
+    preview_tabs = st.tabs(["📄 Resume Preview", "💾 Download Options"])
+    
+    with preview_tabs[0]:
+        st.components.v1.html(generated['html'], height=800, scrolling=True)
+    
+    with preview_tabs[1]:
+        if generated['pdf']:
+            st.download_button(
+                label="⬇️ Download PDF Resume",
+                data=generated['pdf'],
+                file_name="generated_resume.pdf",
+                mime="application/pdf",
+                use_container_width=True
+            )
+        
+        st.download_button(
+            label="⬇️ Download HTML Resume",
+            data=generated['html'],
+            file_name="generated_resume.html",
+            mime="text/html",
+            use_container_width=True
+        )
 
 def initialize_session_state():
     """Initialize session state variables."""
@@ -756,17 +1252,32 @@ def initialize_session_state():
         st.session_state.workflow = "landing"
     if 'tailor_results' not in st.session_state:
         st.session_state.tailor_results = None
+    if 'user_id' not in st.session_state:
+        # Kept in the URL so saved results survive reloads and "Back to Home"
+        st.session_state.user_id = st.query_params.get('uid') or uuid.uuid4().hex
+        st.query_params['uid'] = st.session_state.user_id
+    if 'tailor_job_id' not in st.session_state:
+        st.session_state.tailor_job_id = None
 
 def store_tailor_results(results: dict):
-    """Store all tailoring results in session state."""
+    """Attach tailoring results to the session for display."""
+    previous = st.session_state.get('tailor_results')
     st.session_state.tailor_results = {
         'analysis_result': results['analysis_result'],
         'initial_ats_score': results['initial_ats_score'],
         'final_ats_score': results['final_ats_score'],
         'cold_email': results['cold_email'],
+        'cover_letter': results['cover_letter'],
         'resume_text': results['resume_text'],
         'job_requirements': results['job_requirements'],
-        'skill_matches': results['skill_matches']
+        'skill_matches': results['skill_matches'],
+        'ats_delta': results.get('ats_delta'),
+        'bank_bullets': results.get('bank_bullets', []),
+        'critical_path': results.get('critical_path'),
+        'reused_stages': results.get('reused_stages', []),
+        'restored_stages': results.get('restored_stages', []),
+        'stage_inputs': results.get('stage_inputs', {}),
+        'changed_inputs': changed_stage_inputs(previous, results) if previous else {}
     }
 
 def get_stored_results():
@@ -776,81 +1287,276 @@ def get_stored_results():
 def handle_tailor_workflow():
     """Handle the resume tailoring workflow."""
     try:
-        tailor = ResumeTailor()
+        tailor = get_tailor()
+        dag = get_tailor_dag()
+        job_queue = get_job_queue()
+        store = get_results_store()
+        
+        show_results_history(store)
+        if os.getenv('SHOW_SERVICE_METRICS'):
+            show_service_metrics(job_queue)
         
         left_col, right_col = st.columns([1, 1.5], gap="large")
         
         with left_col:
             resume_text = WorkflowManager.handle_file_upload(['pdf', 'docx'])
             job_text, is_url = WorkflowManager.handle_job_input()
+            show_bullet_bank(tailor)
+            if resume_text:
+                show_job_suggestions(tailor, resume_text)
             
             if resume_text and job_text:
-                process_button = st.button("🎯 Tailor Resume", use_container_width=True)
+                process_button = st.button(
+                    "🎯 Tailor Resume",
+                    use_container_width=True,
+                    disabled=st.session_state.tailor_job_id is not None
+                )
+                recompute = st.checkbox("Re-run instead of loading saved results", key="tailor_recompute")
             else:
                 st.info("Please upload your resume and provide job details to proceed.")
-                process_button = False
+                process_button = recompute = False
         
         with right_col:
             if resume_text and job_text and process_button:
-                with st.spinner("Analyzing and optimizing your resume..."):
-                    # Parse job description
-                    job_requirements = tailor.parse_job_description(job_text, is_url)
-                    
-                    # Match skills
-                    skill_matches = tailor.match_skills(resume_text, job_requirements)
-                    
-                    # Calculate initial ATS score
-                    initial_ats_score = tailor.calculate_ats_score(resume_text, job_requirements, skill_matches)
-                    
-                    # Generate tailored resume with analysis
-                    analysis_result = tailor.tailor_resume(resume_text, job_requirements, skill_matches)
-                    
-                    # Add job requirements and skill matches to analysis result
-                    analysis_result['job_requirements'] = job_requirements
-                    analysis_result['skill_matches'] = skill_matches
-                    
-                    # Calculate final ATS score
-                    final_ats_score = tailor.calculate_ats_score(
-                        analysis_result['tailored_resume'], 
-                        job_requirements, 
-                        skill_matches
-                    )
-                    
-                    # Generate cold email
-                    cold_email = tailor.generate_cold_email(resume_text, job_requirements, skill_matches)
-                    
-                    # Store results in session state
-                    store_tailor_results({
-                        'analysis_result': analysis_result,
-                        'initial_ats_score': initial_ats_score,
-                        'final_ats_score': final_ats_score,
-                        'cold_email': cold_email,
-                        'resume_text': resume_text,
-                        'job_requirements': job_requirements,
-                        'skill_matches': skill_matches
-                    })
-                    
-                    # Show results
-                    show_results_tabs(
-                        analysis_result,
-                        initial_ats_score,
-                        final_ats_score,
-                        cold_email,
-                        resume_text,
-                        tailor
-                    )
+                bullet_bank = tailor.bullet_banks.reference(st.session_state.user_id)
+                input_hash = tailor_input_hash(resume_text, job_text, is_url, bullet_bank)
+                saved_results = None if recompute else store.find(st.session_state.user_id, input_hash)
+                if saved_results:
+                    store_tailor_results(saved_results)
+                    st.info("Loaded your saved results for this resume and job.")
+                else:
+                    submit_tailor_job(job_queue, dag, store, input_hash, resume_text, job_text, is_url,
+                                      bullet_bank, recompute)
+            
+            if st.session_state.tailor_job_id:
+                show_job_progress()
+            
+            results = get_stored_results()
+            if results:
+                show_stage_reuse(results)
+                show_bank_bullets(results.get('bank_bullets'))
+                show_results_tabs(
+                    results['analysis_result'],
+                    results['initial_ats_score'],
+                    results['final_ats_score'],
+                    results['cold_email'],
+                    results['cover_letter'],
+                    results['resume_text'],
+                    tailor,
+                    results.get('ats_delta')
+                )
+                if results.get('critical_path'):
+                    show_critical_path(results['critical_path'])
     
     except ValueError as e:
         st.error(f"Configuration Error: {str(e)}")
         st.info("Please ensure you have set up the GROQ_API_KEY in your .env file")
 
-def show_results_tabs(analysis_result, initial_ats_score, final_ats_score, cold_email, resume_text, tailor):
-    """Show the results in organized tabs."""
+def submit_tailor_job(job_queue: JobQueue, dag: StageDAG, store: ResultsStore, input_hash: str,
+                      resume_text: str, job_text: str, is_url: bool, bullet_bank: Optional[dict] = None,
+                      recompute: bool = False):
+    """Submit the tailoring pipeline to the worker pool and remember the job ID."""
+    try:
+        st.session_state.tailor_job_id = job_queue.submit(
+            st.session_state.user_id,
+            run_tailor_pipeline,
+            dag,
+            store,
+            input_hash,
+            resume_text,
+            job_text,
+            is_url,
+            bullet_bank,
+            recompute,
+            stages=[stage for stage in TAILOR_STAGES if stage in dag.stages]
+        )
+        st.session_state.tailor_results = None
+    except (JobQueueFullError, UserJobLimitError) as e:
+        st.warning(str(e))
+
+@measured_fragment("bullet bank")
+def show_bullet_bank(tailor: ResumeTailor):
+    """Let the user keep extra experience bullets to draw on when tailoring."""
+    bank = tailor.bullet_banks.get(st.session_state.user_id)
+    with st.expander("📌 Bullet bank"):
+        st.caption("Keep more achievements than fit on one resume; the most relevant ones for each job "
+                   "are offered to the tailored resume.")
+        with st.form("bullet_bank_form", clear_on_submit=True):
+            bullets = st.text_area("Bullets, one per line")
+            role = st.text_input("Role (optional)", placeholder="Data Engineer @ Acme")
+            if st.form_submit_button("Add bullets"):
+                added = bank.add(bullets.splitlines(), role=role.strip() or None)
+                st.success(f"Added {added} new bullets.")
+        st.caption(f"{len(bank)} bullets in your bank")
+        if len(bank) and st.button("Clear bullet bank"):
+            bank.clear()
+            ResumeForm.rerun_step()
+
+@measured_fragment("job suggestions")
+def show_job_suggestions(tailor: ResumeTailor, resume_text: str):
+    """Suggest the postings of the local job corpus that fit the uploaded resume best."""
+    if not len(tailor.job_corpus):
+        return
+    with st.expander("🔎 Jobs that fit your resume"):
+        st.caption(f"Searches {len(tailor.job_corpus):,} indexed postings by similarity and skill coverage.")
+        if not st.button("Find matching jobs"):
+            return
+        try:
+            matches = tailor.find_jobs(resume_text, k=int(os.getenv('JOB_CORPUS_TOP_K', 10)))
+        except IncompatibleCorpus as e:
+            st.error(str(e))
+            return
+        for match in matches:
+            title = f"{match['title'] or 'Untitled role'} @ {match['company'] or 'Unknown company'}"
+            link = f"[{title}]({match['url']})" if match.get('url') else title
+            st.markdown(f"**{link}** · fit {match['score']:.2f} "
+                        f"({match['skill_coverage']:.0%} of skills, similarity {match['similarity']:.2f})")
+            if match['matched_skills']:
+                st.caption(f"✅ {', '.join(match['matched_skills'])}")
+            if match['missing_skills']:
+                st.caption(f"❌ {', '.join(match['missing_skills'])}")
+            st.caption(f"Closest experience: {match['closest_resume_line']}")
+
+def show_bank_bullets(bank_bullets: Optional[List[dict]]):
+    """List the bank bullets that were offered to the tailored resume."""
+    if not bank_bullets:
+        return
+    with st.expander(f"📌 {len(bank_bullets)} bullets selected from your bank"):
+        for bullet in bank_bullets:
+            role = f" ({bullet['role']})" if bullet.get('role') else ""
+            st.markdown(f"- {bullet['text']}{role}  \n  <small>matches: {bullet['matches']}</small>",
+                        unsafe_allow_html=True)
+
+def show_results_history(store: ResultsStore):
+    """List past tailoring runs in the sidebar so they can be reopened without recomputation."""
+    history = store.history(st.session_state.user_id)
+    with st.sidebar:
+        st.subheader("📚 Past Tailoring Runs")
+        if not history:
+            st.caption("Your tailoring results will be saved here.")
+        for run in history:
+            label = f"{run['title'] or 'Untitled role'} @ {run['company'] or 'Unknown company'}"
+            score = f" · {run['total_score']}/100" if run['total_score'] is not None else ""
+            when = time.strftime('%b %d, %H:%M', time.localtime(run['created_at']))
+            if st.button(f"{label}{score}\n{when}", key=f"history_{run['run_id']}", use_container_width=True):
+                saved_results = store.load(st.session_state.user_id, run['run_id'])
+                if saved_results:
+                    store_tailor_results(saved_results)
+
+def show_service_metrics(job_queue: JobQueue):
+    """Show worker pool and LLM limiter metrics in the sidebar."""
+    with st.sidebar.expander("⚙️ Service Metrics"):
+        st.write("Tailoring jobs", job_queue.stats())
+        st.write("LLM limiter", get_shared_limiter().metrics())
+        st.write("Coalesced LLM calls", get_shared_group().stats())
+        st.write("Hedged LLM calls", get_hedge_budget().stats())
+        st.write(f"LLM routes ({get_tailor().routing.name})", get_routing_stats().stats())
+        st.write("Most missing skills (last 1000 runs)")
+        st.dataframe(get_skill_analytics().top_missing_skills(recent=1000, limit=10), hide_index=True)
+
+@st.fragment(run_every=1)
+def show_job_progress():
+    """Poll the background tailoring job and attach its result to the session when done."""
+    job = get_job_queue().get(st.session_state.tailor_job_id)
+    if job is None:
+        st.session_state.tailor_job_id = None
+        st.warning("The tailoring job is no longer available, please try again.")
+        return
+    
+    snapshot = job.snapshot()
+    if snapshot['status'] == 'done':
+        store_tailor_results(job.result)
+        st.session_state.tailor_job_id = None
+        st.rerun()
+    elif snapshot['status'] in ('failed', 'cancelled'):
+        st.session_state.tailor_job_id = None
+        st.error(f"Tailoring failed: {snapshot['error'] or snapshot['status']}")
+        completed = [TAILOR_STAGES[stage] for stage, status in snapshot['stages'].items() if status == 'done']
+        if completed and get_stage_checkpoints() is not None:
+            st.info(f"Saved progress for: {', '.join(completed)}. Tailor again to continue from there.")
+        return
+    
+    if snapshot['status'] == 'queued':
+        st.info("Waiting for a free worker...")
+    running = [TAILOR_STAGES[stage] for stage, status in snapshot['stages'].items() if status == 'running']
+    current = ", ".join(running) or "Analyzing and optimizing your resume"
+    st.progress(snapshot['progress'], text=f"{current}... ({snapshot['elapsed']:.0f}s)")
+    for stage, label in TAILOR_STAGES.items():
+        if stage not in snapshot['stages']:
+            continue
+        status = snapshot['stages'][stage]
+        icon = {'done': '✅', 'skipped': '⏭️', 'running': '🔵', 'degraded': '⚠️', 'failed': '❌'}.get(status, '⚪')
+        st.markdown(f"{icon} {label}")
+        if status == 'running':
+            for line in describe_partials(snapshot['partials'].get(stage, {})):
+                st.caption(line)
+
+def describe_partials(partials: dict) -> List[str]:
+    """Summarise the already completed parts of a streaming stage's output."""
+    lines = []
+    for key, value in partials.items():
+        parts = key.split('.')
+        if 'section_scores' in parts[:-1] and isinstance(value, dict):
+            section = parts[-1].replace('_', ' ').title()
+            version = f"{parts[0].title()} " if parts[0] != 'section_scores' else ''
+            lines.append(f"{version}{section}: {value.get('score', '?')}/{value.get('max', '?')}")
+        elif key in ('title', 'company') and value:
+            lines.append(f"{key.title()}: {value}")
+        elif key == 'skills' and isinstance(value, list):
+            lines.append(f"Skills: {', '.join(map(str, value[:8]))}")
+        elif key == 'improvements' and isinstance(value, list):
+            lines.append(f"{len(value)} improvements identified")
+    return lines
+
+def changed_stage_inputs(previous: dict, results: dict) -> dict:
+    """Return, for each stage that re-ran, the inputs that differ from the previous run."""
+    before = previous.get('stage_inputs') or {}
+    changed = {}
+    for stage, hashes in (results.get('stage_inputs') or {}).items():
+        if stage in before and stage not in results.get('reused_stages', []):
+            changed[stage] = [name for name, value in hashes.items() if before[stage].get(name) != value]
+    return changed
+
+def show_stage_reuse(results: dict):
+    """Report which stages fell back or were reused from earlier runs, and why the others re-ran."""
+    degraded = [TAILOR_STAGES.get(stage, stage) for stage in results.get('degraded_stages', [])]
+    if degraded:
+        st.warning(f"⚠️ {', '.join(degraded)} hit an error and show placeholder results, so this run was not "
+                   "saved. Tailor again to retry.")
+    reused = [TAILOR_STAGES.get(stage, stage) for stage in results.get('reused_stages', [])]
+    if not reused:
+        return
+    restored = [TAILOR_STAGES.get(stage, stage) for stage in results.get('restored_stages', [])]
+    if restored:
+        st.caption(f"⏯️ Resumed from saved progress for: {', '.join(restored)}")
+    st.caption(f"♻️ Reused unchanged results for: {', '.join(reused)}")
+    for stage, inputs in results.get('changed_inputs', {}).items():
+        if inputs:
+            names = ", ".join(name.replace('_', ' ') for name in inputs)
+            st.caption(f"🔄 {TAILOR_STAGES.get(stage, stage)} re-ran because {names} changed")
+
+def show_critical_path(critical_path: dict):
+    """Show which chain of stages determined the run time."""
+    with st.expander("⏱️ Pipeline timing"):
+        st.write(f"Wall time: {critical_path['wall_time']:.1f}s, "
+                 f"critical path: {critical_path['length']:.1f}s")
+        st.dataframe(pd.DataFrame([
+            {
+                'Stage': TAILOR_STAGES.get(step['stage'], step['stage']),
+                'Seconds': round(step['duration'], 2),
+                'Cached': step['cached']
+            }
+            for step in critical_path['path']
+        ]), use_container_width=True)
+
+def show_results_tabs(analysis_result, initial_ats_score, final_ats_score, cold_email, cover_letter, resume_text, tailor,
+                      ats_delta=None):
+    """Show the results in organized tabs.
+
+    Each tab is a fragment, so edits and downloads inside a tab rerun only
+    that tab.
+    """
     try:
-        # Get job requirements and skill matches from the analysis result
-        job_requirements = analysis_result.get('job_requirements', {})
-        skill_matches = analysis_result.get('skill_matches', {'matched_skills': [], 'missing_skills': []})
-        
         # Create tabs
         tabs = st.tabs(["💡 Analysis", "📊 ATS Score", "📧 Cold Email", "📝 Cover Letter", "📄 Resume Versions"])
         
@@ -860,25 +1566,15 @@ def show_results_tabs(analysis_result, initial_ats_score, final_ats_score, cold_
         
         # ATS Score Tab
         with tabs[1]:
-            show_ats_score_tab(initial_ats_score, final_ats_score)
+            show_ats_score_tab(initial_ats_score, final_ats_score, ats_delta)
         
         # Cold Email Tab
         with tabs[2]:
-            st.text_area("", cold_email, height=400)
+            show_cold_email_tab(cold_email)
         
         # Cover Letter Tab
         with tabs[3]:
-            with st.spinner("Generating cover letter..."):
-                cover_letter = tailor.generate_cover_letter(resume_text, job_requirements, skill_matches)
-                st.text_area("", cover_letter, height=600)
-                if cover_letter:
-                    st.download_button(
-                        label="⬇️ Download Cover Letter",
-                        data=cover_letter,
-                        file_name="cover_letter.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
+            show_cover_letter_tab(cover_letter)
         
         # Resume Versions Tab
         with tabs[4]:
@@ -887,6 +1583,25 @@ def show_results_tabs(analysis_result, initial_ats_score, final_ats_score, cold_
     except Exception as e:
         st.error(f"Error displaying results: {str(e)}")
 
+@measured_fragment("tab: cold email")
+def show_cold_email_tab(cold_email):
+    """Display the cold email tab content."""
+    st.text_area("", cold_email, height=400)
+
+@measured_fragment("tab: cover letter")
+def show_cover_letter_tab(cover_letter):
+    """Display the cover letter tab content."""
+    st.text_area("", cover_letter, height=600)
+    if cover_letter:
+        st.download_button(
+            label="⬇️ Download Cover Letter",
+            data=cover_letter,
+            file_name="cover_letter.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+@measured_fragment("tab: analysis")
 def show_analysis_tab(analysis_result):
     """Display the analysis tab content."""
     # Skills Analysis
@@ -901,6 +1616,13 @@ def show_analysis_tab(analysis_result):
         for idx, skill_suggestion in enumerate(analysis_result['skills_analysis']['missing'], 1):
             st.write(f"{idx}. {skill_suggestion}")
     
+    # Evidence from the resume for each matched skill
+    evidence = analysis_result.get('skill_matches', {}).get('evidence', {})
+    if evidence:
+        with st.expander("🔎 Where each skill was found in your resume"):
+            for skill, match in evidence.items():
+                st.write(f"**{skill}** ({match['method']}, {match['score']:.2f}): {match['text']}")
+    
     # Improvements
     st.subheader("🔄 Improvements Made")
     for idx, improvement in enumerate(analysis_result['improvements'], 1):
@@ -946,7 +1668,8 @@ def validate_ats_score(score_data: Dict) -> Dict:
         st.error(f"Error validating ATS score: {str(e)}")
         return score_data
 
-def show_ats_score_tab(initial_ats_score, final_ats_score):
+@measured_fragment("tab: ats score")
+def show_ats_score_tab(initial_ats_score, final_ats_score, ats_delta=None):
     """Display the ATS score tab content."""
     # Validate scores
     initial_ats_score = validate_ats_score(initial_ats_score)
@@ -1007,6 +1730,9 @@ def show_ats_score_tab(initial_ats_score, final_ats_score):
         with cols[1]:
             final_progress = data["score"] / data["max"]
             st.progress(final_progress, text=f"After: {data['score']}/{data['max']}")
+            change = (ats_delta or {}).get('sections', {}).get(section)
+            if change and change['reason']:
+                st.caption(f"{change['change']:+d}: {change['reason']}")
         
         # Details button
         with cols[2]:
@@ -1041,6 +1767,7 @@ def show_ats_score_tab(initial_ats_score, final_ats_score):
     for idx, suggestion in enumerate(final_ats_score["improvement_suggestions"], 1):
         st.write(f"{idx}. {suggestion}")
 
+@measured_fragment("tab: resume versions")
 def show_resume_versions_tab(resume_text, analysis_result, tailor):
     """Display the resume versions tab content."""
     version_cols = st.columns(2)
@@ -1056,23 +1783,43 @@ def show_resume_versions_tab(resume_text, analysis_result, tailor):
         st.text_area("", optimized_content, height=400, disabled=True)
     
     # Download button
-    doc = tailor.generate_docx(optimized_content)
-    doc.save("tailored_resume.docx")
-    
-    with open("tailored_resume.docx", "rb") as file:
-        st.download_button(
-            label="⬇️ Download Optimized Resume",
-            data=file,
-            file_name="tailored_resume.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            use_container_width=True
-        )
+    st.download_button(
+        label="⬇️ Download Optimized Resume",
+        data=tailored_docx_bytes(tailor, optimized_content),
+        file_name="tailored_resume.docx",
+        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        use_container_width=True
+    )
+
+def tailored_docx_bytes(tailor, content: str) -> bytes:
+    """Build the DOCX download in memory, once per distinct content in this session."""
+    key = hash_values(content)
+    cached = st.session_state.get('tailored_docx')
+    if not cached or cached[0] != key:
+        buffer = io.BytesIO()
+        tailor.generate_docx(content).save(buffer)
+        cached = st.session_state.tailored_docx = (key, buffer.getvalue())
+    return cached[1]
+
+def show_ui_metrics():
+    """Show rerun counts and render times of the app and its fragments in the sidebar."""
+    with st.sidebar.expander("🖥️ UI Reruns"):
+        st.caption("A widget inside a fragment should add a run to its fragment only, not to 'app'.")
+        st.write("This session", session_ui_metrics().stats())
+        st.write("All sessions", get_ui_metrics().stats())
 
 def main():
     st.set_page_config(layout="wide", page_title="AI Resume Builder & Tailor")
     
+    with measure("app"):
+        render_app()
+
+def render_app():
+    """Render the page for the current workflow."""
     # Initialize session state
     initialize_session_state()
+    if os.getenv('SHOW_SERVICE_METRICS'):
+        show_ui_metrics()
     
     # Handle routing
     if st.session_state.workflow == "landing":
@@ -0,0 +1,111 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from rate_limiter import estimate_tokens
+
+# Context windows of the models this app uses, in tokens
+MODEL_CONTEXT_TOKENS = {
+    'llama-3.1-8b-instant': 131072,
+    'llama-3.3-70b-versatile': 131072,
+    'gemma2-9b-it': 8192
+}
+# Larger chunks fit the context but make every map call slower; this caps them
+LATENCY_CHUNK_TOKENS = 4000
+
+EMPTY_SCALARS = ('', 'not specified', 'n/a', 'none', 'unknown')
+
+
+def chunk_token_budget(model: str, reserved_tokens: int = 2500, latency_tokens: Optional[int] = None) -> int:
+    """Return the input tokens per chunk for a model.
+
+    reserved_tokens covers the prompt instructions and the completion. The
+    result is the smaller of what fits the context window and the latency
+    cap (MAP_REDUCE_CHUNK_TOKENS overrides the cap).
+    """
+    context = MODEL_CONTEXT_TOKENS.get(model, 8192)
+    latency_tokens = latency_tokens or int(os.getenv('MAP_REDUCE_CHUNK_TOKENS', LATENCY_CHUNK_TOKENS))
+    return max(500, min(context - reserved_tokens, latency_tokens))
+
+
+def split_text(text: str, max_tokens: int, overlap_tokens: int = 100) -> List[str]:
+    """Split text into chunks of at most max_tokens, preferring paragraph and line boundaries."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    # estimate_tokens counts four characters per token
+    splitter = RecursiveCharacterTextSplitter(chunk_size=max_tokens * 4, chunk_overlap=overlap_tokens * 4)
+    return splitter.split_text(text)
+
+
+def map_chunks(fn: Callable[[str], Any], chunks: List[str], max_workers: int = 4) -> List[Any]:
+    """Apply fn to every chunk in parallel and return the results in chunk order.
+
+    A chunk whose call fails contributes None instead of failing the whole map.
+    """
+    def call(chunk):
+        try:
+            return fn(chunk)
+        except Exception:
+            return None
+
+    if len(chunks) == 1:
+        return [call(chunks[0])]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)), thread_name_prefix="map-chunk") as executor:
+        return list(executor.map(call, chunks))
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in EMPTY_SCALARS
+    return isinstance(value, (list, dict)) and not value
+
+
+def _identity(value: Any) -> str:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def merge_results(results: List[Any]) -> Any:
+    """Merge per-chunk JSON results deterministically, in chunk order.
+
+    Objects are merged key by key; lists are concatenated with duplicates
+    (case and whitespace insensitive for strings) dropped, keeping the first
+    occurrence; scalars keep the first non-empty value.
+    """
+    non_empty = [result for result in results if not _is_empty(result)]
+    if not non_empty:
+        # Keep the type of an empty value, e.g. [] or "Not specified"
+        return next((result for result in results if result is not None), None)
+    results = non_empty
+    if all(isinstance(result, dict) for result in results):
+        keys = []
+        for result in results:
+            keys.extend(key for key in result if key not in keys)
+        return {key: merge_results([result.get(key) for result in results]) for key in keys}
+    if all(isinstance(result, list) for result in results):
+        merged, seen = [], set()
+        for result in results:
+            for item in result:
+                identity = _identity(item)
+                if identity not in seen:
+                    seen.add(identity)
+                    merged.append(item)
+        return merged
+    return results[0]
+
+
+def map_reduce_json(invoke_json: Callable[[str], Any], build_prompt: Callable[[str], str], text: str,
+                    max_tokens: int, max_workers: int = 4) -> Any:
+    """Run build_prompt over each chunk of text and merge the JSON results.
+
+    Text that fits in max_tokens is sent as a single prompt.
+    """
+    chunks = split_text(text, max_tokens)
+    results = map_chunks(lambda chunk: invoke_json(build_prompt(chunk)), chunks, max_workers)
+    return merge_results(results)
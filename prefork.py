@@ -0,0 +1,220 @@
+"""Pre-fork serving of the HTTP API with models shared copy-on-write.
+
+The parent process imports the app and loads the embedding model, the skill
+ontology, the job description extractor and the resume templates once,
+freezes the garbage collector so those objects are never written to again,
+binds the listening socket and forks the workers. Each worker runs uvicorn
+on the inherited socket, so model weights and static tables stay in pages
+shared with the parent instead of being loaded once per process. Workers
+that exit are re-forked from the already loaded parent.
+
+    python prefork.py serve --workers 4 --port 8000
+    python prefork.py memory 1234 1235 1236      # report any processes
+
+Send SIGUSR1 to the parent, or pass --report-after, for a memory report of
+the parent and every worker: unique (private) RSS is what each extra worker
+costs, shared RSS is what the workers do not pay for again. Linux only.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+# /proc/<pid>/smaps_rollup fields, in kB
+_MEMORY_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+DEFAULT_RATE_LIMIT_DB = os.path.join(os.path.dirname(__file__), 'data', 'llm_rate_limit.db')
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """Return the RSS, PSS, shared and unique memory of a process in bytes.
+
+    Reads /proc/<pid>/smaps_rollup, or sums /proc/<pid>/smaps on kernels
+    without it.
+    """
+    totals = dict.fromkeys(_MEMORY_FIELDS, 0)
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        path = f"/proc/{pid}/smaps"
+    with open(path, encoding='ascii', errors='replace') as f:
+        for line in f:
+            field, _, value = line.partition(':')
+            if field in totals:
+                totals[field] += int(value.split()[0]) * 1024
+    return {
+        'rss': totals['Rss'],
+        'pss': totals['Pss'],
+        'shared': totals['Shared_Clean'] + totals['Shared_Dirty'],
+        'unique': totals['Private_Clean'] + totals['Private_Dirty']
+    }
+
+
+def memory_report(processes: Dict[int, str]) -> List[Dict]:
+    """Return one memory row per live process, labelled by role."""
+    rows = []
+    for pid, role in processes.items():
+        try:
+            rows.append({'pid': pid, 'role': role, **process_memory(pid)})
+        except OSError:
+            continue
+    return rows
+
+
+def format_memory_report(rows: List[Dict]) -> str:
+    """Format memory rows as a table with the real total next to the naive RSS sum."""
+    mb = 1024 * 1024
+    lines = [f"{'pid':>8} {'role':<10} {'rss MB':>9} {'shared MB':>10} {'unique MB':>10} {'pss MB':>9}"]
+    for row in rows:
+        lines.append(f"{row['pid']:>8} {row['role']:<10} {row['rss'] / mb:>9.1f} {row['shared'] / mb:>10.1f} "
+                     f"{row['unique'] / mb:>10.1f} {row['pss'] / mb:>9.1f}")
+    if rows:
+        # PSS splits each shared page between the processes mapping it, so it sums to the real total
+        lines.append(f"sum of RSS {sum(row['rss'] for row in rows) / mb:.1f} MB, "
+                     f"actual (sum of PSS) {sum(row['pss'] for row in rows) / mb:.1f} MB")
+    return "\n".join(lines)
+
+
+def preload():
+    """Load everything the workers share: the app, models, static tables and templates."""
+    import api
+
+    api.get_tailor()
+    api.get_batch_tailor_dag()
+    api.get_resume_generator().env.get_template('resume_template.html')
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, args) -> int:
+    """Serve the app on the inherited socket until told to stop."""
+    import uvicorn
+    import api
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGUSR1):
+        signal.signal(signum, signal.SIG_DFL)
+    # Thread pools do not survive fork; also keep workers from oversubscribing the cores
+    api.get_tailor().embedding_model.after_fork(args.threads_per_worker)
+    server = uvicorn.Server(uvicorn.Config(api.app, log_level=args.log_level, access_log=False))
+    server.run(sockets=[sock])
+    return 0
+
+
+class PreforkServer:
+    """Parent process that forks, supervises and stops the workers."""
+
+    def __init__(self, sock: socket.socket, args):
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, int] = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(self.sock, self.args)
+            finally:
+                os._exit(code)
+        self.workers[pid] = index
+
+    def report(self, *_):
+        processes = {os.getpid(): 'parent', **{pid: f"worker {index}" for pid, index in self.workers.items()}}
+        print(format_memory_report(memory_report(processes)), file=sys.stderr, flush=True)
+
+    def stop(self, *_):
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve(self) -> int:
+        for index in range(self.args.workers):
+            self.spawn(index)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, self.report)
+        report_at = time.monotonic() + self.args.report_after if self.args.report_after else None
+
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                index = self.workers.pop(pid, None)
+                if index is not None and not self.stopping:
+                    print(f"worker {index} (pid {pid}) exited with status {status}, restarting",
+                          file=sys.stderr, flush=True)
+                    self.spawn(index)
+                continue
+            if report_at and time.monotonic() >= report_at:
+                report_at = None
+                self.report()
+            time.sleep(0.5)
+        return 0
+
+
+def serve(args) -> int:
+    from api import api_keys, is_loopback
+    if not api_keys() and not is_loopback(args.host):
+        raise SystemExit(f"Refusing to listen on {args.host} without TAILOR_API_KEYS or TAILOR_API_KEY")
+    # Every worker has its own limiter; share the request and token budgets through SQLite
+    if not os.getenv('LLM_RATE_LIMIT_DB'):
+        os.makedirs(os.path.dirname(DEFAULT_RATE_LIMIT_DB), exist_ok=True)
+        os.environ['LLM_RATE_LIMIT_DB'] = DEFAULT_RATE_LIMIT_DB
+    args.threads_per_worker = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    start = time.perf_counter()
+    preload()
+    # Objects loaded so far are never collected; keeps the collector from dirtying their pages
+    gc.freeze()
+    print(f"preloaded in {time.perf_counter() - start:.1f}s, starting {args.workers} workers on "
+          f"{args.host}:{args.port}", file=sys.stderr, flush=True)
+    sock = _bind(args.host, args.port, args.backlog)
+    return PreforkServer(sock, args).serve()
+
+
+def report_processes(pids: Iterable[int]) -> int:
+    print(format_memory_report(memory_report({pid: 'process' for pid in pids})))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Preload models and fork API workers")
+    serve_parser.add_argument('--workers', type=int, default=int(os.getenv('API_WORKERS', 4)))
+    serve_parser.add_argument('--host', default=os.getenv('API_HOST', '127.0.0.1'))
+    serve_parser.add_argument('--port', type=int, default=int(os.getenv('API_PORT', 8000)))
+    serve_parser.add_argument('--backlog', type=int, default=2048)
+    serve_parser.add_argument('--threads-per-worker', type=int, default=0,
+                              help="embedding threads per worker (default: cores / workers)")
+    serve_parser.add_argument('--report-after', type=float, default=0,
+                              help="print a memory report this many seconds after start")
+    serve_parser.add_argument('--log-level', default='info')
+
+    memory_parser = subparsers.add_parser('memory', help="Report shared and unique memory of processes")
+    memory_parser.add_argument('pids', type=int, nargs='+')
+
+    args = parser.parse_args(argv)
+    if args.command == 'memory':
+        return report_processes(args.pids)
+    return serve(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
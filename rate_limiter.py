@@ -0,0 +1,352 @@
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Optional
+
+from hedging import DeadlineExceeded
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch'}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def retry_after_seconds(error: Exception, default: float = 5.0) -> float:
+    """Return the provider's Retry-After delay for a rate-limit error, if it sent one."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after', default))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception from the LLM client is an HTTP 429."""
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429 or 'rate limit' in str(error).lower() or '429' in str(error)
+
+
+class TokenBucket:
+    """In-process token bucket refilled continuously up to its per-minute capacity."""
+
+    def __init__(self, name: str, per_minute: float):
+        self.name = name
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, amount: float) -> float:
+        """Take amount if available and return 0, otherwise return the seconds to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._level >= amount:
+                self._level -= amount
+                return 0.0
+            return (amount - self._level) / self.rate
+
+    def adjust(self, amount: float):
+        """Charge (or refund, if negative) tokens after the fact; the level may go into debt."""
+        with self._lock:
+            self._level = min(self.capacity, self._level - amount)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reported a rate limit."""
+        with self._lock:
+            self._level = min(self._level, 0.0)
+            self._updated = time.monotonic()
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """Token bucket whose level is shared between processes through a SQLite file."""
+
+    def __init__(self, name: str, per_minute: float, path: str):
+        super().__init__(name, per_minute)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL, updated REAL)")
+            conn.execute("INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)", (name, self.capacity, time.time()))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update(self, fn) -> float:
+        with self._connect() as conn:
+            level, updated = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            now = time.time()
+            level = min(self.capacity, level + (now - updated) * self.rate)
+            level, result = fn(level)
+            conn.execute("UPDATE buckets SET level = ?, updated = ? WHERE name = ?", (level, now, self.name))
+        return result
+
+    def try_take(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+
+        def take(level):
+            if level >= amount:
+                return level - amount, 0.0
+            return level, (amount - level) / self.rate
+        return self._update(take)
+
+    def adjust(self, amount: float):
+        self._update(lambda level: (min(self.capacity, level - amount), None))
+
+    def drain(self):
+        self._update(lambda level: (min(level, 0.0), None))
+
+
+class LLMRateLimiter:
+    """Shared request/token limiter with priorities and adaptive (AIMD) concurrency.
+
+    Callers wait in a priority queue (interactive before batch, FIFO within a
+    priority) until a concurrency slot and enough request and token budget are
+    available. The concurrency limit grows while latency stays under the
+    target and is halved on 429 responses or cut when latency exceeds it.
+    For streamed calls the latency is the time to the first chunk, since the
+    length of a stream depends on the response rather than on provider load.
+    """
+
+    def __init__(self, requests_per_minute: float = 30, tokens_per_minute: float = 20000,
+                 min_concurrency: int = 1, max_concurrency: int = 8, target_latency: float = 15.0,
+                 state_path: Optional[str] = None):
+        if state_path:
+            self.request_bucket = SQLiteTokenBucket('requests', requests_per_minute, state_path)
+            self.token_bucket = SQLiteTokenBucket('tokens', tokens_per_minute, state_path)
+        else:
+            self.request_bucket = TokenBucket('requests', requests_per_minute)
+            self.token_bucket = TokenBucket('tokens', tokens_per_minute)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.concurrency_limit = float(max(min_concurrency, min(max_concurrency, 4)))
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._stats = {
+            'requests': 0, 'rate_limited': 0, 'total_wait': 0.0, 'max_wait': 0.0,
+            'total_latency': 0.0, 'wait_by_priority': {name: 0.0 for name in PRIORITY_NAMES.values()}
+        }
+
+    @contextmanager
+    def acquire(self, tokens: int, priority: int = INTERACTIVE, deadline: Optional[float] = None,
+                cancelled: Optional[threading.Event] = None):
+        """Wait for capacity, yield a permit, and record the outcome of the call.
+
+        Waiting gives up with DeadlineExceeded once the deadline (a
+        time.monotonic() value) passes, or with CancelledError once the
+        cancelled event is set, so abandoned calls never reach the provider.
+        """
+        permit = self._wait(tokens, priority, deadline, cancelled)
+        rate_limited = False
+        try:
+            yield permit
+        except Exception as e:
+            rate_limited = is_rate_limit_error(e)
+            if rate_limited:
+                permit.retry_after = retry_after_seconds(e)
+            raise
+        finally:
+            # Also runs when a streaming consumer abandons the generator
+            self._release(permit, rate_limited=rate_limited)
+
+    def _wait(self, tokens: int, priority: int, deadline: Optional[float] = None,
+              cancelled: Optional[threading.Event] = None) -> "Permit":
+        entry = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if cancelled is not None and cancelled.is_set():
+                        raise CancelledError("LLM call abandoned while waiting for the rate limiter")
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise DeadlineExceeded("Deadline exceeded while waiting for the rate limiter")
+                    delay = self._cooldown_until - time.monotonic()
+                    if self._waiters[0] == entry and self._in_flight < int(self.concurrency_limit) and delay <= 0:
+                        delay = self.request_bucket.try_take(1)
+                        if delay <= 0:
+                            delay = self.token_bucket.try_take(tokens)
+                            if delay > 0:
+                                self.request_bucket.adjust(-1)
+                        if delay <= 0:
+                            break
+                    timeout = min(delay, 1.0) if delay > 0 else 1.0
+                    if deadline is not None:
+                        timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+                    self._cond.wait(timeout=timeout)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+            self._in_flight += 1
+            waited = time.monotonic() - start
+            self._stats['total_wait'] += waited
+            self._stats['max_wait'] = max(self._stats['max_wait'], waited)
+            self._stats['wait_by_priority'][PRIORITY_NAMES.get(priority, str(priority))] += waited
+        return Permit(self, tokens)
+
+    def _release(self, permit: "Permit", rate_limited: bool):
+        latency = (permit.first_response_at or time.monotonic()) - permit.started_at
+        with self._cond:
+            self._in_flight -= 1
+            self._stats['requests'] += 1
+            self._stats['total_latency'] += latency
+            if rate_limited:
+                self._stats['rate_limited'] += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                self._cooldown_until = time.monotonic() + permit.retry_after
+                self.request_bucket.drain()
+                self.token_bucket.drain()
+            elif latency > self.target_latency:
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.9)
+            else:
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+            self._cond.notify_all()
+
+    def metrics(self) -> Dict:
+        """Return queue depth, wait times and the current concurrency limit."""
+        with self._cond:
+            requests = max(self._stats['requests'], 1)
+            return {
+                'queue_depth': len(self._waiters),
+                'queue_depth_by_priority': {
+                    name: sum(1 for priority, _ in self._waiters if priority == level)
+                    for level, name in PRIORITY_NAMES.items()
+                },
+                'in_flight': self._in_flight,
+                'concurrency_limit': round(self.concurrency_limit, 2),
+                'requests': self._stats['requests'],
+                'rate_limited': self._stats['rate_limited'],
+                'avg_wait_seconds': self._stats['total_wait'] / requests,
+                'max_wait_seconds': self._stats['max_wait'],
+                'wait_seconds_by_priority': dict(self._stats['wait_by_priority']),
+                'avg_latency_seconds': self._stats['total_latency'] / requests,
+                'cooldown_seconds': max(0.0, self._cooldown_until - time.monotonic())
+            }
+
+
+class Permit:
+    """A granted slot; used to reconcile the token estimate with actual usage."""
+
+    def __init__(self, limiter: LLMRateLimiter, tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.retry_after = 5.0
+        self.started_at = time.monotonic()
+        # Set by streamed calls when the first chunk arrives
+        self.first_response_at: Optional[float] = None
+
+    def record_usage(self, actual_tokens: Optional[int]):
+        """Charge the difference between the estimated and the reported token usage."""
+        if actual_tokens:
+            self.limiter.token_bucket.adjust(actual_tokens - self.tokens)
+
+
+class RateLimitedLLM:
+    """Wrap an LLM client so every call goes through a shared LLMRateLimiter.
+
+    deadline and cancelled bound how long calls wait for the limiter; see
+    LLMRateLimiter.acquire.
+    """
+
+    def __init__(self, llm, limiter: LLMRateLimiter, priority: int = INTERACTIVE,
+                 completion_tokens: int = 1500, max_retries: int = 2, deadline: Optional[float] = None,
+                 cancelled: Optional[threading.Event] = None):
+        self.llm = llm
+        self.limiter = limiter
+        self.priority = priority
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.cancelled = cancelled
+
+    def with_priority(self, priority: int) -> "RateLimitedLLM":
+        """Return a wrapper sharing the same client and limiter with another priority."""
+        return RateLimitedLLM(self.llm, self.limiter, priority, self.completion_tokens, self.max_retries,
+                              self.deadline, self.cancelled)
+
+    def for_call(self, deadline: Optional[float] = None,
+                 cancelled: Optional[threading.Event] = None) -> "RateLimitedLLM":
+        """Return a wrapper for one call attempt that stops waiting at the deadline or when cancelled."""
+        return RateLimitedLLM(self.llm, self.limiter, self.priority, self.completion_tokens, self.max_retries,
+                              deadline, cancelled)
+
+    def invoke(self, prompt, **kwargs):
+        """Invoke the wrapped client, retrying rate-limited calls after the limiter's cooldown."""
+        estimate = estimate_tokens(str(prompt)) + (kwargs.get('max_tokens') or self.completion_tokens)
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.limiter.acquire(estimate, self.priority, self.deadline, self.cancelled) as permit:
+                    response = self.llm.invoke(prompt, **kwargs)
+                    usage = getattr(response, 'usage_metadata', None) or {}
+                    permit.record_usage(usage.get('total_tokens'))
+                    return response
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+
+    def stream(self, prompt, **kwargs):
+        """Stream from the wrapped client, holding the permit until the stream ends.
+
+        Rate-limited calls are retried only if nothing has been yielded yet.
+        """
+        estimate = estimate_tokens(str(prompt)) + (kwargs.get('max_tokens') or self.completion_tokens)
+        for attempt in range(self.max_retries + 1):
+            yielded = False
+            try:
+                with self.limiter.acquire(estimate, self.priority, self.deadline, self.cancelled) as permit:
+                    usage = {}
+                    for chunk in self.llm.stream(prompt, **kwargs):
+                        if not yielded:
+                            permit.first_response_at = time.monotonic()
+                        yielded = True
+                        usage = getattr(chunk, 'usage_metadata', None) or usage
+                        yield chunk
+                    permit.record_usage(usage.get('total_tokens'))
+                    return
+            except Exception as e:
+                if yielded or attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+
+
+@lru_cache(maxsize=None)
+def get_shared_limiter() -> LLMRateLimiter:
+    """Return the process-wide limiter configured from the environment.
+
+    Set LLM_RATE_LIMIT_DB to a SQLite path to share the request and token
+    budgets between processes on the same host.
+    """
+    return LLMRateLimiter(
+        requests_per_minute=float(os.getenv('LLM_REQUESTS_PER_MINUTE', 30)),
+        tokens_per_minute=float(os.getenv('LLM_TOKENS_PER_MINUTE', 20000)),
+        max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+        target_latency=float(os.getenv('LLM_TARGET_LATENCY', 15)),
+        state_path=os.getenv('LLM_RATE_LIMIT_DB') or None
+    )
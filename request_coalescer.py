@@ -0,0 +1,140 @@
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator
+
+from stage_dag import hash_values
+
+
+class _Call:
+    """An upstream call that concurrent identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        # Streamed calls: chunks so far, replayed to followers as they arrive
+        self.chunks = []
+        self.cond = threading.Condition()
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for an identical in-flight call and share its result."""
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stream(self, key: str, fn: Callable[[], Iterator]) -> Iterator:
+        """Stream fn(), or replay the chunks of an identical in-flight stream as they arrive."""
+        call, leader = self._join(key)
+        if leader:
+            try:
+                for chunk in fn():
+                    with call.cond:
+                        call.chunks.append(chunk)
+                        call.cond.notify_all()
+                    yield chunk
+            except BaseException as e:
+                call.error = e if isinstance(e, Exception) else RuntimeError("Upstream stream was abandoned")
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                with call.cond:
+                    call.done.set()
+                    call.cond.notify_all()
+            return
+
+        index = 0
+        while True:
+            with call.cond:
+                while index >= len(call.chunks) and not call.done.is_set():
+                    call.cond.wait()
+                if index < len(call.chunks):
+                    chunk = call.chunks[index]
+                    index += 1
+                elif call.error is not None:
+                    raise call.error
+                else:
+                    return
+            yield chunk
+
+    def _join(self, key: str):
+        """Return the in-flight call for key and whether the caller leads it."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.upstream_calls += 1
+                return call, True
+            call.waiters += 1
+            self.coalesced_calls += 1
+            return call, False
+
+    def stats(self) -> Dict:
+        """Return how many upstream calls were made and how many were saved."""
+        with self._lock:
+            return {
+                'upstream_calls': self.upstream_calls,
+                'coalesced_calls': self.coalesced_calls,
+                'in_flight': len(self._calls)
+            }
+
+
+class CoalescingLLM:
+    """Wrap an LLM client so identical concurrent prompts share one upstream call.
+
+    Requests are identical when the namespace (typically the model and its
+    settings), the prompt and the call arguments all match. Only in-flight
+    calls are shared; completed results are not cached here.
+    """
+
+    def __init__(self, llm, group: SingleFlight, namespace: str = ''):
+        self.llm = llm
+        self.group = group
+        self.namespace = namespace
+
+    def with_priority(self, priority: int) -> "CoalescingLLM":
+        """Return a wrapper sharing the same coalescing group with another priority."""
+        return CoalescingLLM(self.llm.with_priority(priority), self.group, self.namespace)
+
+    def with_options(self, **options) -> "CoalescingLLM":
+        """Return a wrapper sharing the same coalescing group with the inner client's options changed."""
+        return CoalescingLLM(self.llm.with_options(**options), self.group, self.namespace)
+
+    def invoke(self, prompt, **kwargs):
+        key = hash_values('invoke', self.namespace, str(prompt), kwargs)
+        return self.group.do(key, lambda: self.llm.invoke(prompt, **kwargs))
+
+    def stream(self, prompt, **kwargs):
+        key = hash_values('stream', self.namespace, str(prompt), kwargs)
+        return self.group.stream(key, lambda: self.llm.stream(prompt, **kwargs))
+
+
+@lru_cache(maxsize=None)
+def get_shared_group() -> SingleFlight:
+    """Return the process-wide coalescing group for LLM calls."""
+    return SingleFlight()
@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+DEFAULT_RESULTS_DB = os.path.join(os.path.dirname(__file__), 'data', 'results.db')
+
+
+@contextmanager
+def _connect(path: str):
+    """Open a short-lived connection so the stores are safe to use from worker threads."""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+class ResultsStore:
+    """Durable SQLite store of tailoring results, keyed by user and input hash."""
+
+    def __init__(self, path: str = DEFAULT_RESULTS_DB, max_runs_per_user: int = 20, max_age_days: float = 30):
+        self.path = path
+        self.max_runs_per_user = max_runs_per_user
+        self.max_age_days = max_age_days
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tailor_runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    title TEXT,
+                    company TEXT,
+                    total_score INTEGER,
+                    payload TEXT NOT NULL,
+                    UNIQUE (user_id, input_hash)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tailor_runs_user ON tailor_runs (user_id, created_at)")
+
+    def _connect(self):
+        return _connect(self.path)
+
+    def save(self, user_id: str, input_hash: str, results: Dict) -> int:
+        """Save (or replace) the results of a run and return its run ID."""
+        job_requirements = results.get('job_requirements') or {}
+        final_score = (results.get('final_ats_score') or {}).get('total_score')
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO tailor_runs (user_id, input_hash, created_at, title, company, total_score, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, input_hash) DO UPDATE SET
+                    created_at = excluded.created_at,
+                    title = excluded.title,
+                    company = excluded.company,
+                    total_score = excluded.total_score,
+                    payload = excluded.payload
+                """,
+                (user_id, input_hash, time.time(), job_requirements.get('title'),
+                 job_requirements.get('company'), final_score, json.dumps(results, default=str))
+            )
+            run_id = conn.execute(
+                "SELECT run_id FROM tailor_runs WHERE user_id = ? AND input_hash = ?",
+                (user_id, input_hash)
+            ).fetchone()[0]
+            self._apply_retention(conn, user_id)
+        return run_id
+
+    def find(self, user_id: str, input_hash: str) -> Optional[Dict]:
+        """Return the stored results for these inputs, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM tailor_runs WHERE user_id = ? AND input_hash = ? AND created_at >= ?",
+                (user_id, input_hash, self._cutoff())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load(self, user_id: str, run_id: int) -> Optional[Dict]:
+        """Return the stored results of a past run."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM tailor_runs WHERE user_id = ? AND run_id = ?",
+                (user_id, run_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, user_id: str, limit: int = 20) -> List[Dict]:
+        """Return summaries of a user's past runs, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT run_id, created_at, title, company, total_score FROM tailor_runs
+                WHERE user_id = ? AND created_at >= ?
+                ORDER BY created_at DESC LIMIT ?
+                """,
+                (user_id, self._cutoff(), limit)
+            ).fetchall()
+        return [
+            {'run_id': row[0], 'created_at': row[1], 'title': row[2], 'company': row[3], 'total_score': row[4]}
+            for row in rows
+        ]
+
+    def delete(self, user_id: str, run_id: int):
+        """Delete a past run."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tailor_runs WHERE user_id = ? AND run_id = ?", (user_id, run_id))
+
+    def _cutoff(self) -> float:
+        return time.time() - self.max_age_days * 86400
+
+    def _apply_retention(self, conn: sqlite3.Connection, user_id: str):
+        """Drop expired runs and keep only the newest runs of this user."""
+        conn.execute("DELETE FROM tailor_runs WHERE created_at < ?", (self._cutoff(),))
+        conn.execute(
+            """
+            DELETE FROM tailor_runs WHERE user_id = ? AND run_id NOT IN (
+                SELECT run_id FROM tailor_runs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?
+            )
+            """,
+            (user_id, user_id, self.max_runs_per_user)
+        )
+
+
+class StageCheckpointStore:
+    """Durable SQLite checkpoints of stage outputs, keyed by stage memo key.
+
+    Has the get/put interface of StageMemo, so it can back a StageDAG:
+    outputs written as each stage completes let a failed or interrupted run
+    continue from its last successful stages, in any process. Checkpoints
+    older than ttl_hours are ignored and pruned on write.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULTS_DB, ttl_hours: float = 24):
+        self.path = path
+        self.ttl_hours = ttl_hours
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stage_checkpoints (
+                    memo_key TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    outputs TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_stage_checkpoints_created ON stage_checkpoints (created_at)")
+
+    def _connect(self):
+        return _connect(self.path)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the checkpointed outputs for a memo key, unless expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT outputs FROM stage_checkpoints WHERE memo_key = ? AND created_at >= ?",
+                (key, self._cutoff())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, outputs: Dict):
+        """Checkpoint the outputs of a completed stage and drop expired checkpoints."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stage_checkpoints (memo_key, created_at, outputs) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(outputs, default=str))
+            )
+            conn.execute("DELETE FROM stage_checkpoints WHERE created_at < ?", (self._cutoff(),))
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_hours * 3600
@@ -1,9 +1,16 @@
 import streamlit as st
 from typing import Dict, List
 import re
+from streamlit.errors import StreamlitAPIException
+from ui_metrics import measured_fragment
 
 class ResumeForm:
-    """Handle the interactive resume creation form."""
+    """Handle the interactive resume creation form.
+
+    Each step runs as a fragment: adding or removing entries reruns only the
+    step, and text fields are batched in forms so typing does not rerun at
+    all. Moving between steps reruns the app to update the progress bar.
+    """
     
     @staticmethod
     def initialize_form_state():
@@ -20,6 +27,18 @@ class ResumeForm:
                 'certifications': []
             }
     
+    @staticmethod
+    def rerun_step():
+        """Rerun only the current step's fragment.
+
+        Fragment-scoped reruns are only allowed while the fragment itself is
+        rerunning, so during a full app run this reruns the app instead.
+        """
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            st.rerun()
+    
     @staticmethod
     def validate_email(email: str) -> bool:
         """Validate email format."""
@@ -54,6 +73,7 @@ class ResumeForm:
                 else:
                     st.markdown(f"⚪ {step}")
     
+    @measured_fragment("form: personal")
     def personal_info_form(self):
         """Render personal information form."""
         st.subheader("Personal Information")
@@ -62,26 +82,28 @@ class ResumeForm:
         data = st.session_state.form_data['personal_info']
         
         # Personal details form
-        full_name = st.text_input("Full Name*", data.get('full_name', ''))
-        email = st.text_input("Email*", data.get('email', ''))
-        phone = st.text_input("Phone Number*", data.get('phone', ''))
-        location = st.text_input("Location", data.get('location', ''))
-        linkedin = st.text_input("LinkedIn Profile", data.get('linkedin', ''))
-        summary = st.text_area("Professional Summary", data.get('summary', ''), height=150)
-        
-        # Validation
-        is_valid = True
-        if not full_name:
-            st.error("Full name is required")
-            is_valid = False
-        if email and not self.validate_email(email):
-            st.error("Please enter a valid email address")
-            is_valid = False
-        if phone and not self.validate_phone(phone):
-            st.error("Please enter a valid phone number")
-            is_valid = False
+        with st.form("personal_info_form", border=False):
+            full_name = st.text_input("Full Name*", data.get('full_name', ''))
+            email = st.text_input("Email*", data.get('email', ''))
+            phone = st.text_input("Phone Number*", data.get('phone', ''))
+            location = st.text_input("Location", data.get('location', ''))
+            linkedin = st.text_input("LinkedIn Profile", data.get('linkedin', ''))
+            summary = st.text_area("Professional Summary", data.get('summary', ''), height=150)
+            submitted = st.form_submit_button("Next →")
         
-        if st.button("Next →"):
+        if submitted:
+            # Validation
+            is_valid = True
+            if not full_name:
+                st.error("Full name is required")
+                is_valid = False
+            if email and not self.validate_email(email):
+                st.error("Please enter a valid email address")
+                is_valid = False
+            if phone and not self.validate_phone(phone):
+                st.error("Please enter a valid phone number")
+                is_valid = False
+            
             if is_valid:
                 # Save data
                 st.session_state.form_data['personal_info'] = {
@@ -95,6 +117,7 @@ class ResumeForm:
                 st.session_state.form_step = 2
                 st.rerun()
     
+    @measured_fragment("form: education")
     def education_form(self):
         """Render education form."""
         st.subheader("Education")
@@ -107,19 +130,21 @@ class ResumeForm:
                 st.write(f"Years: {edu['start_year']} - {edu['end_year']}")
                 if st.button(f"Remove Entry #{i+1}"):
                     st.session_state.form_data['education'].pop(i)
-                    st.rerun()
+                    self.rerun_step()
         
         # Add new education entry
         with st.expander("Add Education", expanded=True):
-            degree = st.text_input("Degree/Certificate*", key="new_degree")
-            institution = st.text_input("Institution*", key="new_institution")
-            col1, col2 = st.columns(2)
-            with col1:
-                start_year = st.number_input("Start Year", min_value=1950, max_value=2024, value=2020)
-            with col2:
-                end_year = st.number_input("End Year", min_value=1950, max_value=2030, value=2024)
+            with st.form("add_education_form", clear_on_submit=True, border=False):
+                degree = st.text_input("Degree/Certificate*", key="new_degree")
+                institution = st.text_input("Institution*", key="new_institution")
+                col1, col2 = st.columns(2)
+                with col1:
+                    start_year = st.number_input("Start Year", min_value=1950, max_value=2024, value=2020)
+                with col2:
+                    end_year = st.number_input("End Year", min_value=1950, max_value=2030, value=2024)
+                add_entry = st.form_submit_button("Add Education Entry")
             
-            if st.button("Add Education Entry"):
+            if add_entry:
                 if degree and institution:
                     st.session_state.form_data['education'].append({
                         'degree': degree,
@@ -127,7 +152,7 @@ class ResumeForm:
                         'start_year': start_year,
                         'end_year': end_year
                     })
-                    st.rerun()
+                    self.rerun_step()
                 else:
                     st.error("Please fill in all required fields")
         
@@ -144,6 +169,7 @@ class ResumeForm:
                 else:
                     st.error("Please add at least one education entry")
     
+    @measured_fragment("form: experience")
     def experience_form(self):
         """Render work experience form."""
         st.subheader("Work Experience")
@@ -156,23 +182,25 @@ class ResumeForm:
                 st.write(f"Duration: {exp['start_date']} - {exp['end_date']}")
                 if st.button(f"Remove Entry #{i+1}"):
                     st.session_state.form_data['experience'].pop(i)
-                    st.rerun()
+                    self.rerun_step()
         
         # Add new experience entry
         with st.expander("Add Experience", expanded=True):
-            title = st.text_input("Job Title*", key="new_title")
-            company = st.text_input("Company*", key="new_company")
-            col1, col2 = st.columns(2)
-            with col1:
-                start_date = st.text_input("Start Date (MM/YYYY)*", key="new_start_date")
-            with col2:
-                end_date = st.text_input("End Date (MM/YYYY or Present)*", key="new_end_date")
-            responsibilities = st.text_area("Responsibilities and Achievements*", 
-                                         help="Use bullet points (•) for each point", 
-                                         height=150,
-                                         key="new_responsibilities")
+            with st.form("add_experience_form", clear_on_submit=True, border=False):
+                title = st.text_input("Job Title*", key="new_title")
+                company = st.text_input("Company*", key="new_company")
+                col1, col2 = st.columns(2)
+                with col1:
+                    start_date = st.text_input("Start Date (MM/YYYY)*", key="new_start_date")
+                with col2:
+                    end_date = st.text_input("End Date (MM/YYYY or Present)*", key="new_end_date")
+                responsibilities = st.text_area("Responsibilities and Achievements*", 
+                                             help="Use bullet points (•) for each point", 
+                                             height=150,
+                                             key="new_responsibilities")
+                add_entry = st.form_submit_button("Add Experience Entry")
             
-            if st.button("Add Experience Entry"):
+            if add_entry:
                 if all([title, company, start_date, end_date, responsibilities]):
                     st.session_state.form_data['experience'].append({
                         'title': title,
@@ -181,7 +209,7 @@ class ResumeForm:
                         'end_date': end_date,
                         'responsibilities': responsibilities.split('\n')
                     })
-                    st.rerun()
+                    self.rerun_step()
                 else:
                     st.error("Please fill in all required fields")
         
@@ -198,6 +226,7 @@ class ResumeForm:
                 else:
                     st.error("Please add at least one experience entry")
     
+    @measured_fragment("form: skills")
     def skills_form(self):
         """Render skills form."""
         st.subheader("Skills")
@@ -229,21 +258,23 @@ class ResumeForm:
                 st.write(f"Year: {cert['year']}")
                 if st.button(f"Remove Certification #{i+1}"):
                     st.session_state.form_data['certifications'].pop(i)
-                    st.rerun()
+                    self.rerun_step()
         
         with st.expander("Add Certification", expanded=True):
-            cert_name = st.text_input("Certification Name", key="new_cert_name")
-            cert_issuer = st.text_input("Issuing Organization", key="new_cert_issuer")
-            cert_year = st.number_input("Year", min_value=1950, max_value=2024, value=2024, key="new_cert_year")
+            with st.form("add_certification_form", clear_on_submit=True, border=False):
+                cert_name = st.text_input("Certification Name", key="new_cert_name")
+                cert_issuer = st.text_input("Issuing Organization", key="new_cert_issuer")
+                cert_year = st.number_input("Year", min_value=1950, max_value=2024, value=2024, key="new_cert_year")
+                add_entry = st.form_submit_button("Add Certification")
             
-            if st.button("Add Certification"):
+            if add_entry:
                 if cert_name and cert_issuer:
                     st.session_state.form_data['certifications'].append({
                         'name': cert_name,
                         'issuer': cert_issuer,
                         'year': cert_year
                     })
-                    st.rerun()
+                    self.rerun_step()
         
         col1, col2 = st.columns(2)
         with col1:
@@ -313,10 +344,12 @@ class ResumeForm:
         with col1:
             if st.button("← Back"):
                 st.session_state.form_step = 4
+                st.session_state.pop('generated_resume', None)
                 st.rerun()
         with col2:
             if st.button("Edit"):
                 st.session_state.form_step = 1
+                st.session_state.pop('generated_resume', None)
                 st.rerun()
         with col3:
             if st.button("Generate Resume →"):
@@ -0,0 +1,128 @@
+from typing import Any, Dict, List
+
+# Field names of the ResumeGenerator.format_resume_data schema
+PERSONAL_FIELDS = ['full_name', 'email', 'phone', 'location', 'linkedin', 'summary']
+EDUCATION_FIELDS = ['degree', 'institution', 'start_year', 'end_year']
+EXPERIENCE_FIELDS = ['title', 'company', 'start_date', 'end_date', 'responsibilities']
+CERTIFICATION_FIELDS = ['name', 'issuer', 'year']
+# Catch-all for sections the schema has no field for, so extraction does not drop them
+SECTION_FIELDS = ['title', 'items']
+LIST_FIELDS = ('responsibilities', 'items')
+
+RESUME_SCHEMA_PROMPT = """{
+    "personal_info": {"full_name": "", "email": "", "phone": "", "location": "", "linkedin": "", "summary": ""},
+    "education": [{"degree": "", "institution": "", "start_year": "", "end_year": ""}],
+    "experience": [{"title": "", "company": "", "start_date": "", "end_date": "", "responsibilities": [""]}],
+    "skills": {"technical": [""], "soft": [""]},
+    "certifications": [{"name": "", "issuer": "", "year": ""}],
+    "additional_sections": [{"title": "", "items": [""]}]
+}"""
+
+
+def empty_resume_data() -> Dict:
+    """Return an empty resume in the format_resume_data schema."""
+    return {
+        'personal_info': {field: '' for field in PERSONAL_FIELDS},
+        'education': [],
+        'experience': [],
+        'skills': {'technical': [], 'soft': []},
+        'certifications': [],
+        'additional_sections': []
+    }
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def _text_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split('\n')
+    if not isinstance(value, list):
+        return []
+    return [_text(item) for item in value if _text(item)]
+
+
+def _entries(value: Any, fields: List[str]) -> List[Dict]:
+    if not isinstance(value, list):
+        return []
+    entries = []
+    for item in value:
+        if not isinstance(item, dict):
+            continue
+        entry = {field: _text_list(item.get(field)) if field in LIST_FIELDS else _text(item.get(field))
+                 for field in fields}
+        if any(entry.values()):
+            entries.append(entry)
+    return entries
+
+
+def normalize_resume_data(data: Any) -> Dict:
+    """Coerce an extracted resume into the format_resume_data schema, dropping empty entries.
+
+    Sections the schema has no field for (projects, awards, publications,
+    languages, ...) are kept in additional_sections as titled item lists.
+    """
+    resume = empty_resume_data()
+    if not isinstance(data, dict):
+        return resume
+    personal_info = data.get('personal_info')
+    if isinstance(personal_info, dict):
+        resume['personal_info'] = {field: _text(personal_info.get(field)) for field in PERSONAL_FIELDS}
+    resume['education'] = _entries(data.get('education'), EDUCATION_FIELDS)
+    resume['experience'] = _entries(data.get('experience'), EXPERIENCE_FIELDS)
+    skills = data.get('skills')
+    if isinstance(skills, dict):
+        resume['skills'] = {'technical': _text_list(skills.get('technical')), 'soft': _text_list(skills.get('soft'))}
+    elif isinstance(skills, list):
+        resume['skills']['technical'] = _text_list(skills)
+    resume['certifications'] = _entries(data.get('certifications'), CERTIFICATION_FIELDS)
+    resume['additional_sections'] = _entries(data.get('additional_sections'), SECTION_FIELDS)
+    return resume
+
+
+def is_empty_resume(resume: Dict) -> bool:
+    """Check whether extraction produced nothing worth using."""
+    return not (resume['experience'] or resume['education'] or resume['skills']['technical'])
+
+
+def _span(start: str, end: str) -> str:
+    return f" ({start}-{end})" if start or end else ''
+
+
+def serialize_resume(resume: Dict) -> str:
+    """Render a structured resume as compact plain text for LLM prompts.
+
+    Only non-empty fields are written, one line per entry, which is far
+    shorter than the extracted PDF text or indented JSON.
+    """
+    info = resume['personal_info']
+    lines = []
+    contact = [info.get(field) for field in ('email', 'phone', 'location', 'linkedin') if info.get(field)]
+    if info.get('full_name') or contact:
+        lines.append(" | ".join([info.get('full_name') or 'Name not given'] + contact))
+    if info.get('summary'):
+        lines.append(f"Summary: {info['summary']}")
+    if resume['experience']:
+        lines.append("Experience:")
+        for exp in resume['experience']:
+            at = f" @ {exp['company']}" if exp['company'] else ''
+            lines.append(f"- {exp['title']}{at}{_span(exp['start_date'], exp['end_date'])}")
+            lines.extend(f"  * {item}" for item in exp['responsibilities'])
+    if resume['education']:
+        lines.append("Education:")
+        for edu in resume['education']:
+            lines.append(f"- {edu['degree']}, {edu['institution']}{_span(edu['start_year'], edu['end_year'])}")
+    if resume['skills']['technical']:
+        lines.append(f"Technical skills: {', '.join(resume['skills']['technical'])}")
+    if resume['skills']['soft']:
+        lines.append(f"Soft skills: {', '.join(resume['skills']['soft'])}")
+    if resume['certifications']:
+        lines.append("Certifications: " + "; ".join(
+            ", ".join(part for part in (cert['name'], cert['issuer'], cert['year']) if part)
+            for cert in resume['certifications']
+        ))
+    for section in resume.get('additional_sections', []):
+        lines.append(f"{section['title'] or 'Other'}:")
+        lines.extend(f"- {item}" for item in section['items'])
+    return "\n".join(lines)
@@ -0,0 +1,324 @@
+"""Matched and missing skill analytics across tailoring runs.
+
+Every completed run appends one row to a runs table (scores and skill
+counts) and one row per required skill to a skills table (matched or
+missing, and how it matched). Rows are buffered and written as Parquet
+part files under one directory, so several processes can record at once;
+`compact` merges the parts into one file per table sorted by time, and
+runs by itself once a table has more than `compact_parts` parts. Compaction
+holds a lock file exclusively and readers hold it shared, so no reader sees
+a part both merged and still present. Queries include the rows still
+buffered in this process without writing them out.
+
+Queries read only the columns they need into pandas, with the skill
+column dictionary-encoded as a categorical, and aggregate with vectorized
+operations, which keeps them fast at hundreds of thousands of runs:
+
+    python skill_analytics.py report --runs 1000      # recent missing skills, co-occurrence, ATS scores
+    python skill_analytics.py compact
+"""
+import argparse
+import atexit
+import fcntl
+import glob
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from skill_ontology import SkillOntology, normalize
+
+DEFAULT_ANALYTICS_DIR = os.path.join(os.path.dirname(__file__), 'data', 'skill_analytics')
+
+RUN_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('recorded_at', pa.float64()),
+    ('title', pa.string()),
+    ('company', pa.string()),
+    ('initial_score', pa.float32()),
+    ('final_score', pa.float32()),
+    ('matched_count', pa.int32()),
+    ('missing_count', pa.int32())
+])
+SKILL_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('recorded_at', pa.float64()),
+    ('skill', pa.dictionary(pa.int32(), pa.string())),
+    ('missing', pa.bool_()),
+    ('method', pa.dictionary(pa.int8(), pa.string()))
+])
+TABLES = {'runs': RUN_SCHEMA, 'skills': SKILL_SCHEMA}
+
+
+def _score(score_data) -> Optional[float]:
+    total = (score_data or {}).get('total_score') if isinstance(score_data, dict) else None
+    try:
+        return float(total)
+    except (TypeError, ValueError):
+        return None
+
+
+class SkillAnalytics:
+    """Append-only Parquet store of per-run skill matches with pandas aggregations."""
+
+    def __init__(self, directory: str = DEFAULT_ANALYTICS_DIR, ontology: Optional[SkillOntology] = None,
+                 flush_every: int = 50, flush_seconds: float = 60.0, compact_parts: int = 64):
+        self.directory = directory
+        self.ontology = ontology
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.compact_parts = compact_parts
+        self._buffers: Dict[str, List[Dict]] = {name: [] for name in TABLES}
+        self._buffered_runs = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        # Tables read from the part files, reused until the set of part files changes
+        self._tables: Dict[str, Tuple[Tuple, pa.Table]] = {}
+        # Query frames, reused until the part files or the buffered rows change
+        self._frames: Dict[str, Tuple[Tuple, pd.DataFrame]] = {}
+        for name in TABLES:
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+        atexit.register(self.flush)
+
+    def canonical_skill(self, skill: str) -> str:
+        """Return the name skills are counted under, so aliases of one skill count together."""
+        return self.ontology.canonical_name(skill) if self.ontology else normalize(skill)
+
+    def record(self, results: Dict, recorded_at: Optional[float] = None) -> str:
+        """Buffer the skills and scores of one tailoring run and return its run ID."""
+        run_id = uuid.uuid4().hex
+        recorded_at = recorded_at or time.time()
+        skill_matches = results.get('skill_matches') or {}
+        evidence = skill_matches.get('evidence') or {}
+        job_requirements = results.get('job_requirements') or {}
+        matched = skill_matches.get('matched_skills') or []
+        missing = skill_matches.get('missing_skills') or []
+
+        skill_rows = [{'run_id': run_id, 'recorded_at': recorded_at, 'skill': self.canonical_skill(skill),
+                       'missing': False, 'method': (evidence.get(skill) or {}).get('method')} for skill in matched]
+        skill_rows += [{'run_id': run_id, 'recorded_at': recorded_at, 'skill': self.canonical_skill(skill),
+                        'missing': True, 'method': None} for skill in missing]
+        run_row = {
+            'run_id': run_id,
+            'recorded_at': recorded_at,
+            'title': job_requirements.get('title'),
+            'company': job_requirements.get('company'),
+            'initial_score': _score(results.get('initial_ats_score')),
+            'final_score': _score(results.get('final_ats_score')),
+            'matched_count': len(matched),
+            'missing_count': len(missing)
+        }
+        with self._lock:
+            self._buffers['runs'].append(run_row)
+            self._buffers['skills'].extend(skill_rows)
+            self._buffered_runs += 1
+            due = (self._buffered_runs >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+        return run_id
+
+    def flush(self, auto_compact: bool = True):
+        """Write buffered rows as new part files, compacting tables that have too many."""
+        with self._lock:
+            buffers = self._buffers
+            self._buffers = {name: [] for name in TABLES}
+            self._buffered_runs = 0
+            self._last_flush = time.monotonic()
+        part = f"part-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+        for name, rows in buffers.items():
+            if rows:
+                self._write(pa.Table.from_pylist(rows, schema=TABLES[name]), name, part)
+        if auto_compact and self.compact_parts and any(
+                len(self._parts(name)) > self.compact_parts for name in TABLES):
+            # Another process already compacting will merge these parts too
+            self._compact(blocking=False)
+
+    def _write(self, table: pa.Table, name: str, filename: str):
+        # Written under a temporary name so readers never see a partial file
+        path = os.path.join(self.directory, name, filename)
+        pq.write_table(table, path + '.tmp', compression='zstd')
+        os.replace(path + '.tmp', path)
+
+    def _parts(self, name: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, name, '*.parquet')))
+
+    @contextmanager
+    def _locked(self, operation: int):
+        """Hold the store's lock file: exclusively to compact, shared to read part files."""
+        with open(os.path.join(self.directory, 'lock'), 'w') as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def compact(self) -> Dict[str, int]:
+        """Merge each table's part files into one, sorted by time, and return the row counts."""
+        self.flush(auto_compact=False)
+        return self._compact(blocking=True)
+
+    def _compact(self, blocking: bool) -> Dict[str, int]:
+        try:
+            with self._locked(fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB):
+                counts = {}
+                for name in TABLES:
+                    parts = self._parts(name)
+                    if len(parts) <= 1:
+                        counts[name] = pq.ParquetFile(parts[0]).metadata.num_rows if parts else 0
+                        continue
+                    table = pa.concat_tables([pq.read_table(part, schema=TABLES[name]) for part in parts])
+                    table = table.sort_by('recorded_at')
+                    self._write(table, name, f"compact-{time.time_ns()}-{os.getpid()}.parquet")
+                    for part in parts:
+                        os.remove(part)
+                    counts[name] = table.num_rows
+                return counts
+        except BlockingIOError:
+            return {}
+
+    def _load(self, name: str, columns: List[str]) -> pd.DataFrame:
+        """Return a table, with this process's buffered rows, as a DataFrame.
+
+        Part files are re-read only when they changed; buffered rows are
+        appended in memory, so queries write nothing.
+        """
+        with self._lock:
+            buffered = list(self._buffers[name])
+        with self._locked(fcntl.LOCK_SH):
+            parts = self._parts(name)
+            signature = tuple((part, os.path.getmtime(part)) for part in parts) + (tuple(columns),)
+            cached = self._tables.get(name)
+            if cached and cached[0] == signature:
+                table = cached[1]
+            else:
+                schema = pa.schema([TABLES[name].field(column) for column in columns])
+                table = pa.concat_tables([pq.read_table(part, columns=columns, schema=TABLES[name])
+                                          for part in parts]) if parts else schema.empty_table()
+                self._tables[name] = (signature, table)
+        key = signature + (len(buffered), buffered[-1]['run_id'] if buffered else None)
+        cached = self._frames.get(name)
+        if cached and cached[0] == key:
+            return cached[1]
+        if buffered:
+            table = pa.concat_tables([table, pa.Table.from_pylist(buffered, schema=TABLES[name]).select(columns)])
+        frame = table.to_pandas()
+        self._frames[name] = (key, frame)
+        return frame
+
+    def runs(self, recent: Optional[int] = None) -> pd.DataFrame:
+        """Return the runs table, optionally only the `recent` most recent runs."""
+        runs = self._load('runs', list(RUN_SCHEMA.names))
+        if recent:
+            runs = runs.nlargest(recent, 'recorded_at')
+        return runs
+
+    def _skills(self, recent: Optional[int] = None, missing: Optional[bool] = None) -> pd.DataFrame:
+        skills = self._load('skills', ['run_id', 'recorded_at', 'skill', 'missing'])
+        if recent:
+            cutoff = self.runs(recent)['recorded_at'].min()
+            skills = skills[skills['recorded_at'].to_numpy() >= cutoff]
+        if missing is not None:
+            skills = skills[skills['missing'].to_numpy() == missing]
+        return skills
+
+    def top_missing_skills(self, recent: Optional[int] = None, limit: int = 20) -> pd.DataFrame:
+        """Return the skills most often missing from resumes, with the share of runs they were missing in."""
+        skills = self._skills(recent, missing=True)
+        run_count = max(1, len(self.runs(recent)))
+        counts = skills['skill'].value_counts()
+        counts = counts[counts > 0].head(limit)
+        return pd.DataFrame({'skill': counts.index.astype(str), 'runs': counts.to_numpy(),
+                             'share': (counts.to_numpy() / run_count).round(3)})
+
+    def match_rates(self, recent: Optional[int] = None, min_runs: int = 5, limit: int = 20) -> pd.DataFrame:
+        """Return how often each frequently required skill was already on the resume, lowest first."""
+        skills = self._skills(recent)
+        grouped = skills.groupby('skill', observed=True)['missing'].agg(['size', 'mean'])
+        grouped = grouped[grouped['size'] >= min_runs]
+        rates = pd.DataFrame({'skill': grouped.index.astype(str), 'runs': grouped['size'].to_numpy(),
+                              'match_rate': (1 - grouped['mean'].to_numpy()).round(3)})
+        return rates.sort_values(['match_rate', 'runs'], ascending=[True, False]).head(limit).reset_index(drop=True)
+
+    def skill_cooccurrence(self, recent: Optional[int] = None, missing: Optional[bool] = True,
+                           vocabulary: int = 50, limit: int = 20) -> pd.DataFrame:
+        """Return the skill pairs that most often appear together in one run.
+
+        Only the `vocabulary` most frequent skills are paired. Counts come
+        from one product of the runs x skills indicator matrix.
+        """
+        skills = self._skills(recent, missing)
+        counts = skills['skill'].value_counts()
+        top = counts[counts > 0].index[:vocabulary]
+        skills = skills[skills['skill'].isin(top)]
+        if skills.empty:
+            return pd.DataFrame({'skill': [], 'other_skill': [], 'runs': []})
+        run_codes, _ = pd.factorize(skills['run_id'])
+        skill_codes = pd.Categorical(skills['skill'].astype(str), categories=top.astype(str)).codes
+        indicator = np.zeros((run_codes.max() + 1, len(top)), dtype=np.float32)
+        indicator[run_codes, skill_codes] = 1
+        counts = indicator.T @ indicator
+        first, second = np.triu_indices(len(top), k=1)
+        pair_counts = counts[first, second].astype(np.int64)
+        order = np.argsort(-pair_counts, kind='stable')[:limit]
+        order = order[pair_counts[order] > 0]
+        names = top.astype(str).to_numpy()
+        return pd.DataFrame({'skill': names[first[order]], 'other_skill': names[second[order]],
+                             'runs': pair_counts[order]})
+
+    def ats_score_distribution(self, recent: Optional[int] = None, bins: int = 10) -> Dict:
+        """Return summary statistics and histograms of initial and final ATS scores and their change."""
+        runs = self.runs(recent)
+        scores = pd.DataFrame({'initial': runs['initial_score'], 'final': runs['final_score']})
+        scores['improvement'] = scores['final'] - scores['initial']
+        edges = np.linspace(0, 100, bins + 1)
+        histograms = {column: np.histogram(scores[column].dropna().clip(0, 100), bins=edges)[0].tolist()
+                      for column in ('initial', 'final')}
+        summary = scores.describe(percentiles=[0.1, 0.5, 0.9]).round(2)
+        return {'runs': len(runs), 'summary': summary, 'bin_edges': edges.tolist(), 'histograms': histograms}
+
+
+@lru_cache(maxsize=None)
+def get_skill_analytics() -> SkillAnalytics:
+    """Return the process-wide analytics store (SKILL_ANALYTICS_DIR)."""
+    from skill_ontology import load_skill_ontology
+    return SkillAnalytics(os.getenv('SKILL_ANALYTICS_DIR', DEFAULT_ANALYTICS_DIR), ontology=load_skill_ontology(),
+                          compact_parts=int(os.getenv('SKILL_ANALYTICS_COMPACT_PARTS', 64)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report or compact skill analytics of tailoring runs")
+    parser.add_argument('--dir', default=os.getenv('SKILL_ANALYTICS_DIR', DEFAULT_ANALYTICS_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report = subparsers.add_parser('report', help="Print missing skills, co-occurrence and ATS scores")
+    report.add_argument('--runs', type=int, default=None, help="only the N most recent runs")
+    report.add_argument('--limit', type=int, default=20)
+    subparsers.add_parser('compact', help="Merge part files into one file per table")
+    args = parser.parse_args(argv)
+
+    analytics = SkillAnalytics(args.dir)
+    if args.command == 'compact':
+        print(analytics.compact())
+        return 0
+
+    with pd.option_context('display.width', 120, 'display.max_rows', args.limit):
+        print("Most frequently missing skills:")
+        print(analytics.top_missing_skills(args.runs, args.limit).to_string(index=False))
+        print("\nLowest match rates:")
+        print(analytics.match_rates(args.runs, limit=args.limit).to_string(index=False))
+        print("\nMissing skills that occur together:")
+        print(analytics.skill_cooccurrence(args.runs, limit=args.limit).to_string(index=False))
+        distribution = analytics.ats_score_distribution(args.runs)
+        print(f"\nATS scores over {distribution['runs']} runs:")
+        print(distribution['summary'].to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
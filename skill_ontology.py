@@ -0,0 +1,300 @@
+"""Skill alias ontology stored in a compact, memory-mapped hash table.
+
+File layout (little endian):
+    header   magic "SKO1", version, n_canonical, n_aliases, n_slots,
+             canonical table offset, alias list offset, string pool offset
+    slots    n_slots x (alias hash u64, alias string offset u32, canonical id u32)
+    canon    n_canonical x (name string offset u32, first alias u32, alias count u32)
+    aliases  n_aliases x alias string offset u32
+    strings  u16 length-prefixed UTF-8 strings
+
+Lookups hash the normalized alias and probe the open-addressing slot table
+directly in the mapped file, so loading is a single mmap and alias ->
+canonical lookups are O(1) without building any Python dicts.
+
+Build a file from JSON ({"canonical": ["alias", ...]}) or CSV (canonical,alias):
+    python skill_ontology.py build skills.json data/skill_ontology.skdb
+"""
+import csv
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+MAGIC = b'SKO1'
+VERSION = 1
+HEADER = struct.Struct('<4s7I')
+SLOT = struct.Struct('<QII')
+CANON = struct.Struct('<III')
+OFFSET = struct.Struct('<I')
+LENGTH = struct.Struct('<H')
+EMPTY = 0xFFFFFFFF
+
+DEFAULT_ONTOLOGY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'skill_ontology.skdb')
+
+# Small built-in ontology used when no external file is configured
+BUILTIN_ALIASES = {
+    'machine learning': ['ml'],
+    'artificial intelligence': ['ai'],
+    'large language models': ['large language model', 'llm', 'llms', 'llama', 'gpt', 'language model'],
+    'natural language processing': ['nlp'],
+    'javascript': ['js'],
+    'typescript': ['ts'],
+    'python': ['py'],
+    'react': ['reactjs', 'react.js'],
+    'node.js': ['nodejs', 'node'],
+    'database': ['databases', 'db'],
+    'user interface': ['ui'],
+    'user experience': ['ux'],
+    'rest api': ['apis', 'api', 'restful', 'rest'],
+    'amazon web services': ['aws'],
+    'google cloud platform': ['gcp'],
+    'microsoft azure': ['azure'],
+    'kubernetes': ['k8s'],
+    'ci/cd': ['continuous integration', 'continuous deployment', 'cicd'],
+    'object oriented programming': ['object-oriented', 'oop'],
+    'computer vision': ['cv'],
+    'java': ['java se', 'java ee'],
+    'go': ['golang'],
+    'rust': ['rustlang'],
+    'c++': ['cpp'],
+    'c#': ['csharp'],
+    'sql': ['t-sql', 'pl/sql'],
+    'postgresql': ['postgres', 'psql'],
+    'mysql': [],
+    'mongodb': ['mongo'],
+    'redis': [],
+    'docker': ['docker compose'],
+    'terraform': [],
+    'linux': ['unix'],
+    'git': ['github', 'gitlab'],
+    'apache spark': ['spark', 'pyspark'],
+    'apache kafka': ['kafka'],
+    'apache airflow': ['airflow'],
+    'pytorch': ['torch'],
+    'tensorflow': ['tf'],
+    'scikit-learn': ['sklearn'],
+    'pandas': [],
+    'graphql': [],
+    'html': ['html5'],
+    'css': ['css3'],
+    'angular': ['angularjs'],
+    'vue': ['vue.js', 'vuejs']
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+(?:[./-][a-z0-9+#]+)*')
+
+
+def normalize(term: str) -> str:
+    """Normalize a skill or alias for lookup: lowercase, single spaces."""
+    return " ".join(term.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into skill tokens, keeping forms such as "node.js", "ci/cd" and "c++"."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def token_ngrams(text: str, max_n: int = 4) -> List[str]:
+    """Return every 1..max_n token n-gram of text, longest first."""
+    tokens = tokenize(text)
+    return [" ".join(tokens[start:start + n])
+            for n in range(min(max_n, len(tokens)), 0, -1)
+            for start in range(len(tokens) - n + 1)]
+
+
+def _hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def build_ontology_bytes(entries: Dict[str, Iterable[str]], load_factor: float = 0.7) -> bytes:
+    """Serialize {canonical: aliases} into the indexed binary format."""
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(value: str) -> int:
+        if value not in string_offsets:
+            data = value.encode('utf-8')[:0xFFFF]
+            string_offsets[value] = len(strings)
+            strings.extend(LENGTH.pack(len(data)))
+            strings.extend(data)
+        return string_offsets[value]
+
+    canon_rows = []
+    alias_offsets = []
+    alias_owner = {}
+    for canon_id, (canonical, aliases) in enumerate(entries.items()):
+        canonical = normalize(canonical)
+        names = [canonical] + [normalize(alias) for alias in aliases]
+        unique = list(dict.fromkeys(name for name in names if name))
+        canon_rows.append((intern(canonical), len(alias_offsets), len(unique)))
+        for name in unique:
+            alias_offsets.append(intern(name))
+            # First canonical to claim an alias wins
+            alias_owner.setdefault(name, canon_id)
+
+    n_slots = 1
+    while n_slots < max(8, len(alias_owner) / load_factor):
+        n_slots *= 2
+    slots = [(0, EMPTY, EMPTY)] * n_slots
+    for alias, canon_id in alias_owner.items():
+        h = _hash(alias)
+        i = h & (n_slots - 1)
+        while slots[i][2] != EMPTY:
+            i = (i + 1) & (n_slots - 1)
+        slots[i] = (h, string_offsets[alias], canon_id)
+
+    slots_off = HEADER.size
+    canon_off = slots_off + n_slots * SLOT.size
+    alias_off = canon_off + len(canon_rows) * CANON.size
+    strings_off = alias_off + len(alias_offsets) * OFFSET.size
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, len(canon_rows), len(alias_offsets), n_slots,
+                                canon_off, alias_off, strings_off))
+    for slot in slots:
+        out.extend(SLOT.pack(*slot))
+    for row in canon_rows:
+        out.extend(CANON.pack(*row))
+    for offset in alias_offsets:
+        out.extend(OFFSET.pack(offset))
+    out.extend(strings)
+    return bytes(out)
+
+
+def build_ontology_file(entries: Dict[str, Iterable[str]], path: str) -> str:
+    """Write an ontology file atomically."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(build_ontology_bytes(entries))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_ontology_source(path: str) -> Dict[str, List[str]]:
+    """Read {canonical: aliases} from a JSON object or a two-column CSV."""
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    entries: Dict[str, List[str]] = {}
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#'):
+                continue
+            entries.setdefault(row[0], [])
+            entries[row[0]].extend(alias for alias in row[1:] if alias)
+    return entries
+
+
+class SkillOntology:
+    """Read-only view over an ontology buffer (a memory-mapped file or bytes)."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        (magic, version, self.n_canonical, self.n_aliases, self._n_slots,
+         self._canon_off, self._alias_off, self._strings_off) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a skill ontology file")
+        self._mask = self._n_slots - 1
+
+    @classmethod
+    def open(cls, path: str) -> "SkillOntology":
+        """Memory-map an ontology file."""
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_entries(cls, entries: Dict[str, Iterable[str]]) -> "SkillOntology":
+        """Build an in-memory ontology, mainly for the built-in aliases."""
+        return cls(build_ontology_bytes(entries))
+
+    def _string(self, offset: int) -> str:
+        start = self._strings_off + offset
+        (length,) = LENGTH.unpack_from(self._buffer, start)
+        return bytes(self._buffer[start + 2:start + 2 + length]).decode('utf-8')
+
+    def canonical_id(self, term: str) -> Optional[int]:
+        """Return the canonical skill ID for an alias, or None if unknown."""
+        term = normalize(term)
+        h = _hash(term)
+        i = h & self._mask
+        while True:
+            slot_hash, string_off, canon_id = SLOT.unpack_from(self._buffer, HEADER.size + i * SLOT.size)
+            if canon_id == EMPTY:
+                return None
+            if slot_hash == h and self._string(string_off) == term:
+                return canon_id
+            i = (i + 1) & self._mask
+
+    def canonical(self, term: str) -> Optional[str]:
+        """Return the canonical skill name for an alias, or None if unknown."""
+        canon_id = self.canonical_id(term)
+        return None if canon_id is None else self.name(canon_id)
+
+    def canonical_name(self, term: str) -> str:
+        """Return the canonical skill name for an alias, or the normalized term if unknown."""
+        return self.canonical(term) or normalize(term)
+
+    def name(self, canon_id: int) -> str:
+        name_off, _, _ = CANON.unpack_from(self._buffer, self._canon_off + canon_id * CANON.size)
+        return self._string(name_off)
+
+    def aliases(self, canon_id: int) -> List[str]:
+        """Return the canonical name followed by all of its aliases."""
+        _, first, count = CANON.unpack_from(self._buffer, self._canon_off + canon_id * CANON.size)
+        return [self._string(OFFSET.unpack_from(self._buffer, self._alias_off + (first + k) * OFFSET.size)[0])
+                for k in range(count)]
+
+    def find(self, text: str, max_ngram: int = 4) -> List[int]:
+        """Return canonical IDs of every alias appearing as a token n-gram in text, in order."""
+        found = []
+        for ngram in token_ngrams(text, max_ngram):
+            canon_id = self.canonical_id(ngram)
+            if canon_id is not None and canon_id not in found:
+                found.append(canon_id)
+        return found
+
+    def expand(self, skill: str, max_aliases: Optional[int] = None) -> List[str]:
+        """Return the skill and the aliases of every canonical skill it mentions."""
+        skill = normalize(skill)
+        canon_ids = []
+        exact = self.canonical_id(skill)
+        if exact is not None:
+            canon_ids.append(exact)
+        canon_ids.extend(canon_id for canon_id in self.find(skill) if canon_id != exact)
+
+        variations = [skill]
+        for canon_id in canon_ids:
+            aliases = self.aliases(canon_id)
+            variations.extend(aliases[:max_aliases] if max_aliases else aliases)
+        return list(dict.fromkeys(variations))
+
+
+@lru_cache(maxsize=None)
+def load_skill_ontology(path: Optional[str] = None) -> SkillOntology:
+    """Return the configured ontology (SKILL_ONTOLOGY_PATH), or the built-in one."""
+    path = path or os.getenv('SKILL_ONTOLOGY_PATH', DEFAULT_ONTOLOGY_PATH)
+    if os.path.exists(path):
+        return SkillOntology.open(path)
+    return SkillOntology.from_entries(BUILTIN_ALIASES)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a skill ontology file")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Build a .skdb file from JSON or CSV")
+    build.add_argument('source')
+    build.add_argument('output', nargs='?', default=DEFAULT_ONTOLOGY_PATH)
+    args = parser.parse_args()
+
+    entries = read_ontology_source(args.source)
+    entries = {**BUILTIN_ALIASES, **entries}
+    build_ontology_file(entries, args.output)
+    ontology = SkillOntology.open(args.output)
+    print(f"Wrote {args.output}: {ontology.n_canonical} skills, {ontology.n_aliases} aliases")
@@ -0,0 +1,365 @@
+import copy
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Key a stage result carries when it is a fallback standing in for a failed step
+DEGRADED = 'degraded'
+
+
+class Stage:
+    """A pipeline stage that declares the values it reads and writes.
+
+    fn is called with one keyword argument per input and must return a dict
+    keyed by the declared outputs (or the bare value when there is exactly
+    one output).
+
+    The memo key is the stage name, its version and the content hash of each
+    input. version should change whenever the same inputs would produce
+    different outputs (a new prompt, model or threshold). fingerprint maps an
+    input name to a function returning the part of the input the stage
+    depends on, so edits elsewhere in that input do not invalidate the stage.
+
+    A result with a truthy DEGRADED key is a fallback (for example default
+    scores after an LLM error). It is passed on without the key but never
+    memoized, so the next run tries the stage again.
+    """
+
+    def __init__(self, name: str, fn: Callable, inputs: List[str], outputs: List[str], memoize: bool = True,
+                 partial: bool = False, version: str = '', fingerprint: Optional[Dict[str, Callable]] = None):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.memoize = memoize
+        # Stages that report partial results accept an on_partial(key, value) keyword
+        self.partial = partial
+        self.version = version
+        self.fingerprint = fingerprint or {}
+
+    def call(self, values: Dict, on_partial: Optional[Callable] = None) -> Tuple[Dict, bool]:
+        """Run the stage on its inputs; return its result as a dict of outputs and whether it is degraded."""
+        kwargs = {name: values[name] for name in self.inputs}
+        if self.partial and on_partial:
+            kwargs['on_partial'] = on_partial
+        result = self.fn(**kwargs)
+        degraded = isinstance(result, dict) and bool(result.get(DEGRADED))
+        if degraded:
+            result = {key: value for key, value in result.items() if key != DEGRADED}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}, degraded
+        missing = [name for name in self.outputs if name not in result]
+        if missing:
+            raise ValueError(f"Stage '{self.name}' did not produce {missing}")
+        return {name: result[name] for name in self.outputs}, degraded
+
+
+class StageMemo:
+    """Thread-safe LRU cache of stage outputs keyed by input hash.
+
+    The memo is shared across runs and sessions, so outputs are deep-copied
+    on the way in and out; a caller mutating its result cannot change what
+    later runs get.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            outputs = self._entries[key]
+        return copy.deepcopy(outputs)
+
+    def put(self, key: str, outputs: Dict):
+        outputs = copy.deepcopy(outputs)
+        with self._lock:
+            self._entries[key] = outputs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def hash_values(*values: Any) -> str:
+    """Return a stable content hash for JSON-like values."""
+    payload = json.dumps(values, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def source_hash(*objects: Any) -> str:
+    """Return a content hash of the source of functions and the values of other objects.
+
+    For stage versions: prompt templates live in the code of the functions
+    that send them, so editing a prompt changes the hash.
+    """
+    parts = []
+    for obj in objects:
+        fn = getattr(obj, '__func__', obj)
+        if not callable(fn):
+            parts.append(obj)
+            continue
+        try:
+            parts.append(inspect.getsource(fn))
+        except (OSError, TypeError):
+            parts.append(getattr(fn, '__qualname__', repr(fn)))
+    return hash_values(*parts)
+
+
+def normalize_whitespace(text: Any) -> str:
+    """Fingerprint for pasted text: edits that only change whitespace keep the same hash."""
+    return " ".join(str(text).split())
+
+
+class DAGRun:
+    """Outputs and timing of one execution of a StageDAG."""
+
+    def __init__(self, dag: "StageDAG"):
+        self.dag = dag
+        self.values: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict] = {}
+        # Content hash of every input each stage ran (or was reused) with
+        self.stage_inputs: Dict[str, Dict[str, str]] = {}
+        self._value_hashes: Dict[str, str] = {}
+        # Values produced by degraded stages, or computed from such values
+        self._degraded_values = set()
+        self.started_at = time.perf_counter()
+        self.wall_time = 0.0
+
+    def reused_stages(self) -> List[str]:
+        """Return the stages whose outputs came from the memo or a checkpoint, in execution order."""
+        return [stage.name for stage in self.dag.topological_order()
+                if self.timings.get(stage.name, {}).get('cached')]
+
+    def restored_stages(self) -> List[str]:
+        """Return the stages whose outputs were restored from a checkpoint of an earlier run."""
+        return [stage.name for stage in self.dag.topological_order()
+                if self.timings.get(stage.name, {}).get('restored')]
+
+    def degraded_stages(self) -> List[str]:
+        """Return the stages that fell back to a degraded result, in execution order."""
+        return [stage.name for stage in self.dag.topological_order()
+                if self.timings.get(stage.name, {}).get('degraded')]
+
+    def critical_path(self) -> Dict:
+        """Return the longest chain of dependent stages and its share of the wall time."""
+        finish = {}
+        previous = {}
+        for stage in self.dag.topological_order():
+            duration = self.timings.get(stage.name, {}).get('duration', 0.0)
+            best_dep, best_time = None, 0.0
+            for dep in self.dag.dependencies(stage):
+                if finish.get(dep, 0.0) > best_time:
+                    best_dep, best_time = dep, finish[dep]
+            finish[stage.name] = best_time + duration
+            previous[stage.name] = best_dep
+
+        if not finish:
+            return {'path': [], 'length': 0.0, 'wall_time': self.wall_time}
+
+        node = max(finish, key=finish.get)
+        path = []
+        while node:
+            timing = self.timings.get(node, {})
+            path.append({
+                'stage': node,
+                'duration': timing.get('duration', 0.0),
+                'cached': timing.get('cached', False)
+            })
+            node = previous[node]
+        path.reverse()
+        return {'path': path, 'length': finish[max(finish, key=finish.get)], 'wall_time': self.wall_time}
+
+
+class StageDAG:
+    """Run stages as soon as their inputs are available, with memoized outputs.
+
+    checkpoints is an optional durable store with the memo's get/put
+    interface. Every completed stage is written to it, and stages missing
+    from the memo are looked up there, so a run retried after a failure (or
+    in another process) continues from the stages that already succeeded.
+    """
+
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None, memo: Optional[StageMemo] = None,
+                 checkpoints=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers or max(1, len(stages))
+        self.memo = memo if memo is not None else StageMemo()
+        self.checkpoints = checkpoints
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' is produced by both "
+                                     f"'{self.producers[output]}' and '{stage.name}'")
+                self.producers[output] = stage.name
+        self._order = self._toposort()
+
+    def dependencies(self, stage: Stage) -> List[str]:
+        """Return the names of the stages whose outputs this stage reads."""
+        return sorted({self.producers[name] for name in stage.inputs if name in self.producers})
+
+    def external_inputs(self) -> List[str]:
+        """Return the input names that must be supplied to run()."""
+        return sorted({name for stage in self.stages.values() for name in stage.inputs
+                       if name not in self.producers})
+
+    def topological_order(self) -> List[Stage]:
+        return list(self._order)
+
+    def _toposort(self) -> List[Stage]:
+        """Order stages so that producers come before consumers, rejecting cycles."""
+        order, state = [], {}
+
+        def visit(name: str):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            state[name] = 'visiting'
+            for dep in self.dependencies(self.stages[name]):
+                visit(dep)
+            state[name] = 'done'
+            order.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    @staticmethod
+    def input_hashes(stage: Stage, values: Dict, cache: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Return the content hash of each stage input, after its fingerprint.
+
+        Hashes of whole values are kept in cache, so a value read by several
+        stages is hashed once per run.
+        """
+        hashes = {}
+        for name in stage.inputs:
+            if name in stage.fingerprint:
+                hashes[name] = hash_values(stage.fingerprint[name](values[name]))
+            elif cache is not None and name in cache:
+                hashes[name] = cache[name]
+            else:
+                hashes[name] = hash_values(values[name])
+                if cache is not None:
+                    cache[name] = hashes[name]
+        return hashes
+
+    def memo_key(self, stage: Stage, values: Dict, input_hashes: Optional[Dict[str, str]] = None) -> str:
+        """Return the memo key of a stage for the given input values."""
+        input_hashes = input_hashes or self.input_hashes(stage, values)
+        return hash_values(stage.name, stage.version, [input_hashes[name] for name in stage.inputs])
+
+    def _reuse(self, key: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Return the saved outputs for a memo key and where they came from ('cached' or 'restored')."""
+        outputs = self.memo.get(key)
+        if outputs is not None:
+            return outputs, 'cached'
+        if self.checkpoints is not None:
+            outputs = self.checkpoints.get(key)
+            if outputs is not None:
+                self.memo.put(key, outputs)
+                return outputs, 'restored'
+        return None, None
+
+    def _save(self, key: str, outputs: Dict):
+        self.memo.put(key, outputs)
+        if self.checkpoints is not None:
+            self.checkpoints.put(key, outputs)
+
+    def run(self, inputs: Dict, on_stage_start: Optional[Callable] = None,
+            on_stage_end: Optional[Callable] = None, on_partial: Optional[Callable] = None,
+            reuse: bool = True) -> DAGRun:
+        """Execute the DAG on the given external inputs.
+
+        on_stage_start(name) and on_stage_end(name, status) are called from
+        the scheduling thread, with status one of 'done', 'cached' (from the
+        memo), 'restored' (from a checkpoint), 'degraded' (a fallback
+        result) or 'failed'. Degraded results, and the outputs of stages
+        that read them, are neither memoized nor checkpointed. With reuse
+        False every stage runs again and its outputs replace the saved ones.
+        on_partial(name, key, value) is called from stage threads as
+        streaming stages complete parts of their output.
+
+        When a stage fails no further stages are started, the stages already
+        running are finished and saved, and the first error is raised.
+        """
+        missing = [name for name in self.external_inputs() if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {missing}")
+
+        run = DAGRun(self)
+        run.values.update(inputs)
+        pending = dict(self.stages)
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag-stage") as executor:
+            while (pending and error is None) or running:
+                ready = [stage for stage in pending.values()
+                         if error is None and all(name in run.values for name in stage.inputs)]
+                for stage in ready:
+                    del pending[stage.name]
+                    hashes = self.input_hashes(stage, run.values, run._value_hashes)
+                    run.stage_inputs[stage.name] = hashes
+                    key = self.memo_key(stage, run.values, hashes) if stage.memoize else None
+                    saved, source = self._reuse(key) if key and reuse else (None, None)
+                    if saved is not None:
+                        run.values.update(saved)
+                        run.timings[stage.name] = {'duration': 0.0, 'cached': True, 'restored': source == 'restored'}
+                        if on_stage_end:
+                            on_stage_end(stage.name, source)
+                        continue
+                    if on_stage_start:
+                        on_stage_start(stage.name)
+                    values = {name: run.values[name] for name in stage.inputs}
+                    stage_partial = (lambda key, value, name=stage.name: on_partial(name, key, value)) \
+                        if on_partial else None
+                    future = executor.submit(self._timed_call, stage, values, stage_partial)
+                    running[future] = (stage, key)
+
+                if ready and not running:
+                    # Only cache hits were scheduled; look for newly ready stages.
+                    continue
+                if not running:
+                    if pending:
+                        raise ValueError(f"Stages can never run: {sorted(pending)}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key = running.pop(future)
+                    try:
+                        outputs, degraded, duration = future.result()
+                    except Exception as e:
+                        error = error or e
+                        if on_stage_end:
+                            on_stage_end(stage.name, 'failed')
+                        continue
+                    run.values.update(outputs)
+                    run.timings[stage.name] = {'duration': duration, 'cached': False, 'degraded': degraded}
+                    if degraded or run._degraded_values.intersection(stage.inputs):
+                        run._degraded_values.update(outputs)
+                    elif key:
+                        self._save(key, outputs)
+                    if on_stage_end:
+                        on_stage_end(stage.name, 'degraded' if degraded else 'done')
+
+        run.wall_time = time.perf_counter() - run.started_at
+        if error is not None:
+            raise error
+        return run
+
+    @staticmethod
+    def _timed_call(stage: Stage, values: Dict, on_partial: Optional[Callable] = None):
+        start = time.perf_counter()
+        outputs, degraded = stage.call(values, on_partial)
+        return outputs, degraded, time.perf_counter() - start
@@ -0,0 +1,258 @@
+import json
+from typing import Any, Callable, Optional, Tuple
+
+_LITERALS = {
+    'true': True, 'false': False, 'null': None,
+    'True': True, 'False': False, 'None': None
+}
+
+
+class _Frame:
+    """An open object or array on the parser stack."""
+
+    def __init__(self, container, path: Tuple):
+        self.container = container
+        self.path = path
+        self.key = None
+        # Objects: 'key' -> 'colon' -> 'value' -> 'comma'; arrays: 'value' -> 'comma'
+        self.state = 'key' if isinstance(container, dict) else 'value'
+
+    @property
+    def is_object(self) -> bool:
+        return isinstance(self.container, dict)
+
+
+class IncrementalJSONParser:
+    """Tolerant, incremental JSON parser for streamed LLM output.
+
+    Text is fed in arbitrary chunks. Anything before the first '{' or '['
+    (prose, ```json fences) and after the root value closes is ignored.
+    on_value(path, value) is called as soon as each value is complete, so
+    callers can surface e.g. every section_scores entry while the rest of the
+    response is still streaming.
+
+    Common LLM malformations are repaired instead of failing the whole call:
+    trailing or missing commas, single-quoted strings, unquoted keys, Python
+    literals (True/False/None), raw newlines inside strings, // comments,
+    unquoted values such as http://example.com, unescaped quotes inside
+    strings and truncated output (open strings and containers are closed by
+    close()).
+
+    A quote ends a string only when the next non-blank characters are one of
+    , : } ] or //, or follow a line break; otherwise it is kept as part of
+    the string. So two strings on one line without a comma between them (["a"
+    "b"]) are read as one string, and // after a value that is not quoted
+    starts no comment. Repaired output of a truncated response is
+    incomplete: callers must check that the fields they need are present.
+    """
+
+    def __init__(self, on_value: Optional[Callable[[Tuple, Any], None]] = None):
+        self.on_value = on_value
+        self.root = None
+        self._stack = []
+        self._mode = 'seek'
+        self._buf = []
+        self._quote = None
+        self._escape = False
+        # Blanks after a quote that may or may not end the string
+        self._gap = []
+        # A '/' after a quote, which ends the string if another '/' follows
+        self._slash = False
+        self._started = False
+
+    def feed(self, chunk: str):
+        """Consume the next chunk of streamed text."""
+        for c in chunk:
+            mode = self._mode
+            if mode == 'done':
+                return
+            if mode == 'string':
+                self._string_char(c)
+            elif mode == 'string_end':
+                self._string_end_char(c)
+            elif mode == 'comment':
+                if c == '\n':
+                    self._mode = 'value'
+            elif mode == 'seek':
+                if c in '{[':
+                    self._mode = 'value'
+                    self._open(c)
+            else:
+                self._value_char(c)
+
+    def close(self) -> Any:
+        """Finish parsing, closing anything left open, and return the root value."""
+        if self._mode in ('string', 'string_end'):
+            self._finish_string()
+        elif self._mode == 'bare':
+            self._finish_bare()
+        while self._stack:
+            self._close()
+        self._mode = 'done'
+        return self.root
+
+    def _string_char(self, c: str):
+        if self._escape:
+            self._escape = False
+            self._buf.append(c)
+        elif c == '\\':
+            self._escape = True
+            self._buf.append(c)
+        elif c == self._quote:
+            self._mode = 'string_end'
+            self._gap = []
+            self._slash = False
+        else:
+            self._buf.append(c)
+
+    def _string_end_char(self, c: str):
+        if self._slash:
+            self._slash = False
+            if c == '/':
+                self._finish_string()
+                self._mode = 'comment'
+                return
+            self._gap.append('/')
+        elif c == '/':
+            self._slash = True
+            return
+        elif c.isspace():
+            self._gap.append(c)
+            return
+        if c in ',:}]' or '\n' in self._gap:
+            self._finish_string()
+            self._value_char(c)
+            return
+        # The quote was followed by more text, so it was an unescaped quote inside the string
+        self._buf.append('\\"' if self._quote == '"' else self._quote)
+        self._buf.extend(self._gap)
+        self._mode = 'string'
+        self._string_char(c)
+
+    def _value_char(self, c: str):
+        if self._mode == 'bare':
+            # Unquoted keys end at a colon; unquoted values (e.g. URLs) may contain colons and slashes
+            terminators = ',:{}[]"\'/' if self._stack and self._expects_key() else ',{}[]"'
+            if c.isspace() or c in terminators:
+                self._finish_bare()
+            else:
+                self._buf.append(c)
+                return
+
+        if c.isspace():
+            return
+        if c in '{[':
+            self._open(c)
+        elif c in '}]':
+            self._close()
+        elif c == ',':
+            frame = self._stack[-1]
+            if frame.is_object:
+                frame.key = None
+                frame.state = 'key'
+            else:
+                frame.state = 'value'
+        elif c == ':':
+            self._stack[-1].state = 'value'
+        elif c in '"\'':
+            self._mode = 'string'
+            self._quote = c
+            self._buf = []
+        elif c == '/':
+            self._mode = 'comment'
+        else:
+            self._mode = 'bare'
+            self._buf = [c]
+
+    def _expects_key(self) -> bool:
+        frame = self._stack[-1]
+        # 'comma' tolerates a missing comma between two members
+        return frame.is_object and frame.state in ('key', 'comma')
+
+    def _finish_string(self):
+        raw = "".join(self._buf)
+        self._mode = 'value'
+        if self._quote == "'":
+            raw = raw.replace("\\'", "'").replace('"', '\\"')
+        try:
+            text = json.loads(f'"{raw}"', strict=False)
+        except json.JSONDecodeError:
+            text = raw.replace('\\"', '"').replace('\\n', '\n')
+        self._scalar(text, is_key_candidate=True)
+
+    def _finish_bare(self):
+        token = "".join(self._buf)
+        self._mode = 'value'
+        if self._stack and self._expects_key():
+            self._scalar(token, is_key_candidate=True)
+            return
+        if token in _LITERALS:
+            value = _LITERALS[token]
+        else:
+            try:
+                value = json.loads(token)
+            except json.JSONDecodeError:
+                value = token
+        self._scalar(value, is_key_candidate=False)
+
+    def _scalar(self, value: Any, is_key_candidate: bool):
+        if not self._stack:
+            return
+        frame = self._stack[-1]
+        if is_key_candidate and self._expects_key():
+            frame.key = value
+            frame.state = 'colon'
+        else:
+            self._attach(value)
+
+    def _open(self, c: str):
+        container = {} if c == '{' else []
+        if not self._stack:
+            if self._started:
+                return
+            self._started = True
+            self._stack.append(_Frame(container, ()))
+            return
+        self._stack.append(_Frame(container, self._child_path()))
+
+    def _close(self):
+        if self._mode == 'bare':
+            self._finish_bare()
+        frame = self._stack.pop()
+        if self._stack:
+            self._attach(frame.container, path=frame.path)
+        else:
+            self.root = frame.container
+            self._emit(frame.path, frame.container)
+            self._mode = 'done'
+
+    def _child_path(self) -> Tuple:
+        frame = self._stack[-1]
+        if frame.is_object:
+            return frame.path + (frame.key,)
+        return frame.path + (len(frame.container),)
+
+    def _attach(self, value: Any, path: Optional[Tuple] = None):
+        frame = self._stack[-1]
+        path = path if path is not None else self._child_path()
+        if frame.is_object:
+            if frame.key is None:
+                # A value without a key cannot be placed; drop it
+                return
+            frame.container[frame.key] = value
+            frame.key = None
+        else:
+            frame.container.append(value)
+        frame.state = 'comma'
+        self._emit(path, value)
+
+    def _emit(self, path: Tuple, value: Any):
+        if self.on_value:
+            self.on_value(path, value)
+
+
+def parse_json_tolerant(text: str) -> Any:
+    """Parse a complete LLM response with the tolerant parser."""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,81 @@
+"""ONNX embeddings must agree with the PyTorch model they were exported from.
+
+By default a tiny, randomly initialized BERT sentence-transformer is built
+and exported with export_onnx_model (int8 quantized, as in production), so
+the check runs offline in CI. Set EMBEDDING_ONNX_DIR to a real export (and
+EMBEDDING_MODEL to its PyTorch model, if not the one it was exported from)
+to check that instead.
+"""
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('onnxruntime')
+pytest.importorskip('tokenizers')
+pytest.importorskip('onnx')
+torch = pytest.importorskip('torch')
+pytest.importorskip('sentence_transformers')
+
+from benchmark import SAMPLE_SENTENCES, SAMPLE_SKILLS, check_embedding_agreement  # noqa: E402
+from embedding_backends import (OnnxEmbeddingBackend, SentenceTransformerBackend,  # noqa: E402
+                                export_onnx_model)
+
+MIN_COSINE = 0.99
+
+
+def build_tiny_model(directory: str) -> str:
+    """Save a small random BERT sentence-transformer whose vocabulary covers the sample texts."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = sorted({word for text in SAMPLE_SKILLS + SAMPLE_SENTENCES
+                    for word in re.findall(r'\w+|[^\w\s]', text.lower())})
+    os.makedirs(directory, exist_ok=True)
+    vocab_path = os.path.join(directory, 'vocab.txt')
+    with open(vocab_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + words) + "\n")
+
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(words) + 5, hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+                        intermediate_size=128, max_position_embeddings=128)
+    BertModel(config).save_pretrained(directory)
+    BertTokenizerFast(vocab_file=vocab_path, do_lower_case=True).save_pretrained(directory)
+    model = SentenceTransformer(modules=[models.Transformer(directory, max_seq_length=64),
+                                         models.Pooling(64, 'mean'), models.Normalize()], device='cpu')
+    model.save(os.path.join(directory, 'sentence_transformer'))
+    return os.path.join(directory, 'sentence_transformer')
+
+
+@pytest.fixture(scope='session')
+def backends(tmp_path_factory):
+    model_dir = os.getenv('EMBEDDING_ONNX_DIR')
+    if model_dir:
+        with open(os.path.join(model_dir, 'embedding_config.json'), encoding='utf-8') as f:
+            model_name = os.getenv('EMBEDDING_MODEL', json.load(f)['source_model'])
+    else:
+        root = tmp_path_factory.mktemp('embedding')
+        model_name = build_tiny_model(str(root / 'torch'))
+        model_dir = export_onnx_model(model_name, str(root / 'onnx'))
+    return SentenceTransformerBackend(model_name), OnnxEmbeddingBackend(model_dir)
+
+
+def test_onnx_embeddings_match_pytorch(backends):
+    reference, onnx = backends
+    agreement = check_embedding_agreement(reference, onnx, SAMPLE_SKILLS, SAMPLE_SENTENCES)
+    assert agreement['min_cosine'] >= MIN_COSINE, agreement
+
+
+def test_onnx_embeddings_are_normalized_and_batch_independent(backends):
+    _, onnx = backends
+    texts = SAMPLE_SKILLS + SAMPLE_SENTENCES
+    batched = onnx.encode(texts, batch_size=8, normalize_embeddings=True)
+    single = np.vstack([onnx.encode([text], normalize_embeddings=True) for text in texts])
+    np.testing.assert_allclose(np.linalg.norm(batched, axis=1), 1.0, atol=1e-5)
+    # Padding to the longest text in a batch must not change the pooled embedding
+    assert np.sum(batched * single, axis=1).min() >= 0.9999
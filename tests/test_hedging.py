@@ -0,0 +1,134 @@
+"""HedgedLLM deadlines, hedged duplicate requests and the hedge budget."""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hedging import DeadlineExceeded, HedgeBudget, HedgedLLM, LatencyTracker  # noqa: E402
+
+
+class ScriptedLLM:
+    """Fake client whose n-th call takes delays[n] seconds (the last delay repeats)."""
+
+    def __init__(self, *delays):
+        self.delays = delays
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        return index, self.delays[min(index, len(self.delays) - 1)]
+
+    def invoke(self, prompt, **kwargs):
+        index, delay = self._delay()
+        time.sleep(delay)
+        return SimpleNamespace(content=f"attempt {index}")
+
+    def stream(self, prompt, **kwargs):
+        index, delay = self._delay()
+        time.sleep(delay)
+        for word in (f"attempt {index}", "done"):
+            yield SimpleNamespace(content=word)
+
+
+def warm_tracker(seconds=0.05, key='default'):
+    """Return a tracker whose hedging threshold for key is `seconds`."""
+    tracker = LatencyTracker()
+    for _ in range(20):
+        tracker.record(key, seconds)
+    return tracker
+
+
+def test_budget_caps_hedges_to_a_fraction_of_primaries():
+    budget = HedgeBudget(ratio=0.5, burst=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.earn()
+    assert not budget.try_spend()
+    budget.earn()
+    assert budget.try_spend()
+    for _ in range(10):
+        budget.earn()
+    assert budget.stats() == {'primaries': 12, 'hedges': 2, 'hedge_wins': 0, 'credits': 1.0}
+
+
+def test_slow_call_is_hedged_and_the_faster_answer_wins():
+    llm, budget = ScriptedLLM(1.0, 0.0), HedgeBudget(ratio=0.1, burst=1)
+    client = HedgedLLM(llm, warm_tracker(), budget, hedge=True)
+    start = time.monotonic()
+    assert client.invoke("prompt").content == "attempt 1"
+    assert time.monotonic() - start < 0.5
+    assert llm.calls == 2
+    assert budget.stats()['hedges'] == 1 and budget.stats()['hedge_wins'] == 1
+
+
+def test_no_hedge_once_the_budget_is_exhausted():
+    llm, budget = ScriptedLLM(0.3), HedgeBudget(ratio=0.0, burst=1)
+    client = HedgedLLM(llm, warm_tracker(), budget, hedge=True)
+    client.invoke("first")
+    assert llm.calls == 2
+    # The second slow call waits for its only attempt
+    assert client.invoke("second").content == "attempt 2"
+    assert llm.calls == 3
+    assert budget.stats()['hedges'] == 1
+
+
+def test_no_hedge_without_enough_latency_samples():
+    llm, budget = ScriptedLLM(0.2), HedgeBudget()
+    tracker = LatencyTracker()
+    tracker.record('default', 0.01)
+    assert HedgedLLM(llm, tracker, budget, hedge=True).invoke("prompt").content == "attempt 0"
+    assert llm.calls == 1 and budget.stats()['hedges'] == 0
+
+
+def test_deadline_raises_instead_of_waiting():
+    client = HedgedLLM(ScriptedLLM(1.0), LatencyTracker(), HedgeBudget())
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.with_options(deadline=time.monotonic() + 0.1).invoke("prompt")
+    assert time.monotonic() - start < 0.5
+    with pytest.raises(DeadlineExceeded):
+        client.with_options(deadline=time.monotonic() - 1).invoke("prompt")
+
+
+def test_deadline_with_hedging_covers_both_attempts():
+    llm = ScriptedLLM(1.0)
+    client = HedgedLLM(llm, warm_tracker(), HedgeBudget(burst=1), hedge=True, deadline=time.monotonic() + 0.2)
+    with pytest.raises(DeadlineExceeded):
+        client.invoke("prompt")
+    assert llm.calls == 2
+
+
+def test_abandoned_attempts_are_cancelled():
+    events = []
+
+    class LimitedLLM(ScriptedLLM):
+        def for_call(self, deadline=None, cancelled=None):
+            events.append(cancelled)
+            return self
+
+    client = HedgedLLM(LimitedLLM(0.0), LatencyTracker(), HedgeBudget())
+    client.invoke("prompt")
+    assert len(events) == 1 and events[0].is_set()
+
+
+def test_stream_hedges_on_the_first_chunk():
+    llm, budget = ScriptedLLM(1.0, 0.0), HedgeBudget(burst=1)
+    client = HedgedLLM(llm, warm_tracker(), budget, hedge=True)
+    start = time.monotonic()
+    assert [chunk.content for chunk in client.stream("prompt")] == ["attempt 1", "done"]
+    assert time.monotonic() - start < 0.5
+    assert budget.stats()['hedge_wins'] == 1
+
+
+def test_stream_deadline_covers_the_whole_stream():
+    client = HedgedLLM(ScriptedLLM(1.0), LatencyTracker(), HedgeBudget(), deadline=time.monotonic() + 0.1)
+    with pytest.raises(DeadlineExceeded):
+        list(client.stream("prompt"))
@@ -0,0 +1,23 @@
+"""Title detection of the rule-based job description extractor."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('nltk')
+
+from jd_extractor import JobDescriptionExtractor  # noqa: E402
+
+
+@pytest.mark.parametrize('text, title', [
+    ("Job Title: Platform Engineer\nWe are hiring a Backend Engineer.", "Platform Engineer"),
+    ("We are hiring a Backend Engineer at Contoso.\nYou will build APIs.", "Backend Engineer"),
+    ("Contoso\nWe're hiring an SRE Lead to run our platform.", "SRE Lead"),
+    ("## Senior Data Engineer\nAbout the team", "Senior Data Engineer"),
+    ("Our engineers love Python.\nStaff Engineer (Platform)\nRemote", "Staff Engineer (Platform)"),
+    ("Join us!\nYou will work with a developer team that ships weekly.", None),
+])
+def test_title(text, title):
+    assert JobDescriptionExtractor._title(text.splitlines()) == title
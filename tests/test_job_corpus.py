@@ -0,0 +1,70 @@
+"""JobCorpus inserts, reloads and recovery from failed inserts."""
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_corpus import JobCorpus  # noqa: E402
+
+
+class HashEmbedder:
+    """Deterministic stand-in for an embedding backend: one pseudo-random vector per text."""
+
+    name = 'hash'
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        vectors = np.array([np.random.RandomState(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).randn(16)
+                            for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def posting(url, title, skills):
+    return {'url': url, 'job_requirements': {'title': title, 'company': "Contoso", 'skills': skills}}
+
+
+def test_directory_is_created_on_first_insert(tmp_path):
+    directory = str(tmp_path / 'corpus')
+    corpus = JobCorpus(directory, HashEmbedder())
+    assert not os.path.exists(directory)
+    assert len(corpus) == 0 and corpus.search("Python developer") == []
+    assert corpus.add([posting('https://jobs/1', "Data Engineer", ["python", "sql"])]) == 1
+    assert os.path.isdir(directory)
+
+
+def test_inserts_are_visible_to_other_corpus_objects(tmp_path):
+    writer = JobCorpus(str(tmp_path), HashEmbedder())
+    writer.add([posting('https://jobs/1', "Data Engineer", ["python", "sql"]),
+                posting('https://jobs/2', "Frontend Developer", ["javascript", "react"])])
+    assert writer.add([posting('https://jobs/1', "Data Engineer", ["python", "sql"]),
+                       posting('https://jobs/3', "Backend Engineer", ["python", "go"])]) == 1
+
+    reader = JobCorpus(str(tmp_path), HashEmbedder())
+    assert len(reader) == 3
+    assert reader.vocab == ['python', 'sql', 'javascript', 'react', 'go']
+    results = reader.search("Python and SQL every day", k=1)
+    assert results[0]['url'] == 'https://jobs/1'
+    assert results[0]['matched_skills'] == ['python', 'sql']
+
+
+def test_failed_insert_leaves_the_vocabulary_unchanged(tmp_path, monkeypatch):
+    corpus = JobCorpus(str(tmp_path), HashEmbedder())
+    corpus.add([posting('https://jobs/1', "Data Engineer", ["python"])])
+
+    def fail(**changes):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(corpus, '_commit', fail)
+        with pytest.raises(OSError):
+            corpus.add([posting('https://jobs/2', "Backend Engineer", ["go", "python"])])
+    assert corpus.vocab_ids == {'python': 0} and corpus.vocab == ['python']
+
+    assert corpus.add([posting('https://jobs/3', "Platform Engineer", ["kubernetes", "go"])]) == 1
+    assert corpus.add([posting('https://jobs/2', "Backend Engineer", ["go", "python"])]) == 1
+    assert JobCorpus(str(tmp_path), HashEmbedder()).vocab == ['python', 'kubernetes', 'go']
+    skills = {result['url']: result['matched_skills'] for result in corpus.search("I write Go and Python", k=3)}
+    assert skills['https://jobs/2'] == ['go', 'python']
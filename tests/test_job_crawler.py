@@ -0,0 +1,144 @@
+"""JobCrawler politeness and retries against a local aiohttp server."""
+import asyncio
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('aiohttp')
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from job_crawler import JobCrawler, ingest_postings  # noqa: E402
+
+PAGE = "<html><body><main><h1>Data Engineer</h1><p>Python and SQL</p></main></body></html>"
+
+
+def serve(routes, robots=None):
+    """Run a test against a local server with the given routes; robots is the robots.txt body."""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    if robots is not None:
+        async def robots_txt(request):
+            return web.Response(text=robots)
+        app.router.add_get('/robots.txt', robots_txt)
+
+    def run(test):
+        async def main():
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                return await test(lambda path: str(server.make_url(path)))
+            finally:
+                await server.close()
+        return asyncio.run(main())
+    return run
+
+
+async def crawl_all(crawler, urls):
+    return {result.url: result async for result in crawler.crawl(urls)}
+
+
+def test_503_with_retry_after_is_retried():
+    calls = []
+
+    async def flaky(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return web.Response(status=503, headers={'Retry-After': '0.3'})
+        return web.Response(text=PAGE, content_type='text/html')
+
+    async def test(url):
+        crawler = JobCrawler(host_delay=0, max_retries=2, backoff=5)
+        return (await crawl_all(crawler, [url('/job')]))[url('/job')]
+
+    result = serve({'/job': flaky})(test)
+    assert result.ok and result.status == 200 and result.attempts == 2
+    assert "Data Engineer" in result.text
+    # Retry-After is used instead of the (much longer) exponential backoff
+    assert 0.3 <= calls[1] - calls[0] < 2
+
+
+def test_robots_disallowed_path_is_skipped():
+    hits = []
+
+    async def page(request):
+        hits.append(request.path)
+        return web.Response(text=PAGE, content_type='text/html')
+
+    async def test(url):
+        crawler = JobCrawler(host_delay=0)
+        return await crawl_all(crawler, [url('/private/job'), url('/jobs/1')])
+
+    results = serve({'/private/job': page, '/jobs/1': page},
+                    robots="User-agent: *\nDisallow: /private/\n")(test)
+    assert [result.error for result in results.values()] == ["Disallowed by robots.txt", None]
+    assert hits == ['/jobs/1']
+
+
+def test_per_host_concurrency_and_delay():
+    starts, active, peak = [], [0], [0]
+
+    async def slow(request):
+        starts.append(time.monotonic())
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.3)
+        active[0] -= 1
+        return web.Response(text=PAGE, content_type='text/html')
+
+    async def test(url):
+        crawler = JobCrawler(per_host_limit=2, host_delay=0.1, respect_robots=False)
+        return await crawl_all(crawler, [url(f'/jobs/{i}') for i in range(6)])
+
+    results = serve({'/jobs/{id}': slow})(test)
+    assert all(result.ok for result in results.values())
+    assert peak[0] == 2
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert min(gaps) >= 0.09
+
+
+def test_connection_errors_give_up_after_configured_attempts():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/job"
+    crawler = JobCrawler(host_delay=0, max_retries=2, backoff=0.01, respect_robots=False)
+    result = asyncio.run(crawl_all(crawler, [url]))[url]
+    assert not result.ok and result.status is None
+    assert result.attempts == 3
+    assert "Connect" in result.error
+
+
+class FakeTailor:
+    def with_priority(self, priority):
+        return self
+
+    def parse_job_description(self, text, is_url):
+        return {'title': text.splitlines()[0]}
+
+
+def test_parsed_postings_are_yielded_before_slower_fetches_finish():
+    async def fast(request):
+        return web.Response(text=PAGE, content_type='text/html')
+
+    async def stuck(request):
+        await asyncio.sleep(2)
+        return web.Response(text=PAGE, content_type='text/html')
+
+    async def test(url):
+        start = time.monotonic()
+        crawler = JobCrawler(host_delay=0, per_host_limit=4, respect_robots=False)
+        async for result, requirements in ingest_postings([url('/fast'), url('/stuck')], FakeTailor(), crawler):
+            return result.url, requirements, time.monotonic() - start
+
+    returned_url, requirements, seconds = serve({'/fast': fast, '/stuck': stuck})(test)
+    assert returned_url.endswith('/fast')
+    assert requirements == {'title': 'Data Engineer'}
+    assert seconds < 1
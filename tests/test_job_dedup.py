@@ -0,0 +1,78 @@
+"""NearDuplicateIndex reuse of parsed requirements for reposted jobs."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_dedup import NearDuplicateIndex  # noqa: E402
+
+BODY = ("Contoso is hiring a {level} Data Engineer to join the analytics platform team in Berlin. "
+        "You will design and operate batch and streaming pipelines in Python and SQL, own our Airflow "
+        "deployment on Kubernetes, model data in the warehouse with dbt, and work closely with analysts "
+        "and product managers to ship reliable datasets. Requirements: {years} years of experience with "
+        "Python, SQL, Spark or Flink, Airflow, Docker and a cloud provider such as AWS or GCP. Experience "
+        "with Kafka, data quality tooling and infrastructure as code with Terraform is a plus. We offer "
+        "flexible hours, a learning budget, hybrid work and thirty days of paid vacation every year.")
+REQUIREMENTS = {'title': "Senior Data Engineer", 'skills': ['Python', 'SQL', 'Airflow']}
+
+
+def test_exact_repost_is_found():
+    index = NearDuplicateIndex()
+    text = BODY.format(level="Senior", years=5)
+    index.add(text, REQUIREMENTS)
+    requirements, similarity = index.query("  " + text.upper() + "\n")
+    assert requirements == REQUIREMENTS and similarity == 1.0
+    assert index.hits == 1
+
+
+def test_lightly_edited_repost_is_found():
+    index = NearDuplicateIndex()
+    index.add(BODY.format(level="Senior", years=5), REQUIREMENTS)
+    repost = BODY.format(level="Senior", years=5).replace("thirty days", "30 days") + " Apply by Friday."
+    match = index.query(repost)
+    assert match is not None
+    assert match[0] == REQUIREMENTS and match[1] >= index.threshold
+
+
+def test_senior_and_junior_postings_do_not_match():
+    index = NearDuplicateIndex()
+    senior, junior = BODY.format(level="Senior", years=5), BODY.format(level="Junior", years=5)
+    # The texts alone are similar enough to pass the threshold
+    assert np.mean(index.signature(senior) == index.signature(junior)) >= index.threshold
+    index.add(senior, REQUIREMENTS)
+    assert index.query(junior) is None
+    assert index.query(BODY.format(level="Senior", years=1)) is None
+    assert index.misses == 2
+
+
+def test_cached_title_must_appear_in_the_posting():
+    index = NearDuplicateIndex()
+    text = BODY.format(level="Senior", years=5)
+    index.add(text, {'title': "Senior Platform Engineer"})
+    assert index.query(text + " Apply by Friday.") is None
+
+
+def test_unrelated_posting_does_not_match():
+    index = NearDuplicateIndex()
+    index.add(BODY.format(level="Senior", years=5), REQUIREMENTS)
+    assert index.query("Bakery in Lyon seeks a pastry chef for early morning shifts, weekends included.") is None
+
+
+def test_returned_requirements_are_copies():
+    index = NearDuplicateIndex()
+    text = BODY.format(level="Senior", years=5)
+    index.add(text, REQUIREMENTS)
+    index.query(text)[0]['skills'].append('COBOL')
+    assert index.query(text)[0] == REQUIREMENTS
+
+
+def test_least_recently_used_posting_is_evicted():
+    index = NearDuplicateIndex(max_entries=2)
+    texts = [BODY.format(level=level, years=5) for level in ("Senior", "Junior", "Staff")]
+    for text in texts:
+        index.add(text, {'title': ''})
+    assert len(index) == 2
+    assert index.query(texts[0]) is None
+    assert index.query(texts[2]) is not None
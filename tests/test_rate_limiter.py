@@ -0,0 +1,153 @@
+"""LLMRateLimiter token buckets, adaptive concurrency and the RateLimitedLLM wrapper."""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hedging import DeadlineExceeded  # noqa: E402
+from rate_limiter import (BATCH, INTERACTIVE, LLMRateLimiter, RateLimitedLLM, SQLiteTokenBucket,  # noqa: E402
+                          TokenBucket)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(status_code=429, headers={'retry-after': str(retry_after)})
+
+
+class SlowStreamLLM:
+    """Fake client that answers at once and then keeps streaming for `seconds`."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def invoke(self, prompt, **kwargs):
+        time.sleep(self.seconds)
+        return SimpleNamespace(content="done", usage_metadata=None)
+
+    def stream(self, prompt, **kwargs):
+        yield SimpleNamespace(content="first", usage_metadata=None)
+        time.sleep(self.seconds)
+        yield SimpleNamespace(content="last", usage_metadata=None)
+
+
+def test_long_streams_are_judged_by_their_first_chunk():
+    limiter = LLMRateLimiter(target_latency=0.1)
+    client = RateLimitedLLM(SlowStreamLLM(0.3), limiter)
+    assert [chunk.content for chunk in client.stream("prompt")] == ["first", "last"]
+    assert limiter.concurrency_limit == 4.25
+
+
+def test_slow_calls_lower_the_concurrency_limit():
+    limiter = LLMRateLimiter(target_latency=0.1)
+    RateLimitedLLM(SlowStreamLLM(0.3), limiter).invoke("prompt")
+    assert limiter.concurrency_limit == 3.6
+
+
+def test_token_bucket_reports_the_wait_for_missing_tokens():
+    bucket = TokenBucket('tokens', per_minute=60)
+    assert bucket.try_take(60) == 0.0
+    assert bucket.try_take(30) == pytest.approx(30, abs=0.1)
+    bucket.adjust(-10)
+    assert bucket.try_take(10) == 0.0
+    # Requests larger than the bucket wait for a full bucket rather than forever
+    assert bucket.try_take(1000) == pytest.approx(60, abs=0.1)
+
+
+def test_token_bucket_usage_can_go_into_debt():
+    bucket = TokenBucket('tokens', per_minute=600)
+    bucket.adjust(900)
+    assert bucket.try_take(1) == pytest.approx(30.1, abs=0.1)
+    # Draining keeps the debt
+    bucket.drain()
+    assert bucket.try_take(600) == pytest.approx(90, abs=0.1)
+
+
+def test_sqlite_buckets_share_their_level(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    first, second = SQLiteTokenBucket('requests', 60, path), SQLiteTokenBucket('requests', 60, path)
+    assert first.try_take(60) == 0.0
+    assert second.try_take(30) == pytest.approx(30, abs=0.1)
+
+
+def test_fast_calls_raise_the_concurrency_limit_up_to_the_maximum():
+    limiter = LLMRateLimiter(max_concurrency=5, requests_per_minute=1000)
+    client = RateLimitedLLM(SlowStreamLLM(0.0), limiter)
+    for _ in range(10):
+        client.invoke("prompt")
+    assert limiter.concurrency_limit == 5
+    assert limiter.metrics()['requests'] == 10
+
+
+def test_rate_limit_error_halves_the_limit_and_is_retried_after_the_cooldown():
+    limiter = LLMRateLimiter(requests_per_minute=6000, tokens_per_minute=10 ** 6)
+    calls = []
+
+    class FlakyLLM:
+        def invoke(self, prompt, **kwargs):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RateLimitError(retry_after=0.2)
+            return SimpleNamespace(content="ok", usage_metadata={'total_tokens': 10})
+
+    assert RateLimitedLLM(FlakyLLM(), limiter).invoke("prompt").content == "ok"
+    assert calls[1] - calls[0] >= 0.2
+    metrics = limiter.metrics()
+    assert metrics['rate_limited'] == 1 and metrics['requests'] == 2
+    # Halved from 4 to 2, then one additive step
+    assert limiter.concurrency_limit == 2.5
+
+
+def test_errors_other_than_rate_limits_are_not_retried():
+    calls = []
+
+    class BrokenLLM:
+        def invoke(self, prompt, **kwargs):
+            calls.append(1)
+            raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        RateLimitedLLM(BrokenLLM(), LLMRateLimiter()).invoke("prompt")
+    assert len(calls) == 1
+
+
+def test_interactive_calls_are_served_before_batch_calls():
+    limiter = LLMRateLimiter(min_concurrency=1, max_concurrency=1, requests_per_minute=6000)
+    order, threads = [], []
+
+    def take(priority, name):
+        with limiter.acquire(1, priority):
+            order.append(name)
+
+    with limiter.acquire(1):
+        # Queue a batch call, then an interactive one, while the only slot is taken
+        for priority, name in ((BATCH, 'batch'), (INTERACTIVE, 'interactive')):
+            threads.append(threading.Thread(target=take, args=(priority, name)))
+            threads[-1].start()
+            while limiter.metrics()['queue_depth'] < len(threads):
+                time.sleep(0.005)
+    for thread in threads:
+        thread.join(5)
+    assert order == ['interactive', 'batch']
+
+
+def test_waiting_stops_at_the_deadline_or_when_cancelled():
+    limiter = LLMRateLimiter(min_concurrency=1, max_concurrency=1, requests_per_minute=6000)
+    cancelled = threading.Event()
+    cancelled.set()
+    with limiter.acquire(1):
+        with pytest.raises(DeadlineExceeded):
+            with limiter.acquire(1, deadline=time.monotonic() + 0.05):
+                pass
+        with pytest.raises(CancelledError):
+            with limiter.acquire(1, cancelled=cancelled):
+                pass
+    assert limiter.metrics()['queue_depth'] == 0 and limiter.metrics()['in_flight'] == 0
@@ -0,0 +1,103 @@
+"""SingleFlight and CoalescingLLM sharing of identical in-flight calls."""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_coalescer import CoalescingLLM, SingleFlight  # noqa: E402
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class BlockingLLM:
+    """Fake client whose calls block until release is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def invoke(self, prompt, **kwargs):
+        self.calls.append(prompt)
+        self.release.wait(5)
+        return f"answer to {prompt}"
+
+    def stream(self, prompt, **kwargs):
+        self.calls.append(prompt)
+        for word in ("one", "two", "three"):
+            self.release.wait(5)
+            yield word
+
+
+def run_concurrently(group, callers, fn):
+    """Start callers threads through fn, wait until all but the leader have joined, return their futures."""
+    executor = ThreadPoolExecutor(max_workers=callers)
+    futures = [executor.submit(fn) for _ in range(callers)]
+    wait_for(lambda: group.stats()['coalesced_calls'] == callers - 1)
+    executor.shutdown(wait=False)
+    return futures
+
+
+def test_concurrent_identical_calls_share_one_invocation():
+    group, llm = SingleFlight(), BlockingLLM()
+    client = CoalescingLLM(llm, group, 'model')
+    futures = run_concurrently(group, 5, lambda: client.invoke("summarize"))
+    llm.release.set()
+    assert [future.result(5) for future in futures] == ["answer to summarize"] * 5
+    assert llm.calls == ["summarize"]
+    assert group.stats() == {'upstream_calls': 1, 'coalesced_calls': 4, 'in_flight': 0}
+
+
+def test_different_prompts_and_arguments_are_not_coalesced():
+    group, llm = SingleFlight(), BlockingLLM()
+    llm.release.set()
+    client = CoalescingLLM(llm, group, 'model')
+    client.invoke("a")
+    client.invoke("b")
+    client.invoke("a", stop=["\n"])
+    CoalescingLLM(llm, group, 'other-model').invoke("a")
+    assert len(llm.calls) == 4 and group.stats()['coalesced_calls'] == 0
+
+
+def test_completed_calls_are_not_cached():
+    group, llm = SingleFlight(), BlockingLLM()
+    llm.release.set()
+    client = CoalescingLLM(llm, group)
+    client.invoke("a")
+    client.invoke("a")
+    assert llm.calls == ["a", "a"]
+
+
+def test_leader_error_is_raised_to_every_caller():
+    group = SingleFlight()
+    release, calls = threading.Event(), []
+
+    def fail():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("rate limited")
+
+    futures = run_concurrently(group, 3, lambda: group.do('key', fail))
+    release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="rate limited"):
+            future.result(5)
+    assert len(calls) == 1 and group.stats()['in_flight'] == 0
+
+
+def test_followers_replay_the_leaders_stream():
+    group, llm = SingleFlight(), BlockingLLM()
+    client = CoalescingLLM(llm, group)
+    futures = run_concurrently(group, 3, lambda: list(client.stream("write")))
+    llm.release.set()
+    assert [future.result(5) for future in futures] == [["one", "two", "three"]] * 3
+    assert llm.calls == ["write"]
@@ -0,0 +1,158 @@
+"""StageDAG scheduling and reuse of memoized stage outputs."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stage_dag import Stage, StageDAG, StageMemo, normalize_whitespace, source_hash  # noqa: E402
+
+
+def counting_dag(memo=None):
+    """Return a two-stage DAG (words -> count) and the number of times each stage ran."""
+    calls = {'split': 0, 'count': 0}
+
+    def split(text):
+        calls['split'] += 1
+        return text.split()
+
+    def count(words):
+        calls['count'] += 1
+        return {'count': len(words), 'first': words[0] if words else None}
+
+    dag = StageDAG([Stage('split', split, ['text'], ['words']),
+                    Stage('count', count, ['words'], ['count', 'first'])], memo=memo)
+    return dag, calls
+
+
+def test_outputs_flow_between_stages():
+    dag, _ = counting_dag()
+    run = dag.run({'text': "python sql docker"})
+    assert run.values['words'] == ['python', 'sql', 'docker']
+    assert run.values['count'] == 3 and run.values['first'] == 'python'
+    assert [stage.name for stage in dag.topological_order()] == ['split', 'count']
+
+
+def test_memo_hit_skips_stage_and_miss_runs_it():
+    dag, calls = counting_dag()
+    dag.run({'text': "python sql"})
+    run = dag.run({'text': "python sql"})
+    assert calls == {'split': 1, 'count': 1}
+    assert run.reused_stages() == ['split', 'count']
+    assert run.values['count'] == 2
+
+    run = dag.run({'text': "python sql go"})
+    assert calls == {'split': 2, 'count': 2}
+    assert run.reused_stages() == []
+
+
+def test_reuse_false_runs_every_stage_again():
+    dag, calls = counting_dag()
+    dag.run({'text': "python"})
+    run = dag.run({'text': "python"}, reuse=False)
+    assert calls == {'split': 2, 'count': 2}
+    assert run.reused_stages() == []
+
+
+def test_memo_is_shared_between_dags():
+    memo = StageMemo()
+    first, first_calls = counting_dag(memo)
+    second, second_calls = counting_dag(memo)
+    first.run({'text': "rust"})
+    second.run({'text': "rust"})
+    assert first_calls == {'split': 1, 'count': 1}
+    assert second_calls == {'split': 0, 'count': 0}
+
+
+def test_mutating_a_result_does_not_change_the_memo():
+    dag, _ = counting_dag()
+    run = dag.run({'text': "python sql"})
+    run.values['words'].append('cobol')
+    assert dag.run({'text': "python sql"}).values['words'] == ['python', 'sql']
+
+
+def test_memo_evicts_least_recently_used():
+    memo = StageMemo(max_entries=2)
+    memo.put('a', {'x': 1})
+    memo.put('b', {'x': 2})
+    memo.get('a')
+    memo.put('c', {'x': 3})
+    assert memo.get('b') is None
+    assert memo.get('a') == {'x': 1} and memo.get('c') == {'x': 3}
+
+
+def test_fingerprint_ignores_unrelated_edits():
+    calls = []
+
+    def title(job):
+        calls.append(job)
+        return job['title'].upper()
+
+    dag = StageDAG([Stage('title', title, ['job'], ['title'], fingerprint={'job': lambda job: job['title']})])
+    dag.run({'job': {'title': "engineer", 'notes': "a"}})
+    run = dag.run({'job': {'title': "engineer", 'notes': "b"}})
+    assert len(calls) == 1 and run.reused_stages() == ['title']
+    dag.run({'job': {'title': "analyst", 'notes': "b"}})
+    assert len(calls) == 2
+
+
+def test_degraded_results_are_not_memoized():
+    calls, results = [], [{'score': 0, 'degraded': True}, {'score': 7}]
+
+    def score(words):
+        calls.append(words)
+        return results[len(calls) - 1]
+
+    dag = StageDAG([Stage('score', score, ['words'], ['score']),
+                    Stage('label', lambda score: f"score {score}", ['score'], ['label'])])
+    run = dag.run({'words': ['python']})
+    assert run.degraded_stages() == ['score']
+    assert run.values['score'] == {'score': 0}
+    run = dag.run({'words': ['python']})
+    # Neither the fallback nor the stage reading it was reused
+    assert len(calls) == 2 and run.reused_stages() == []
+    assert run.degraded_stages() == []
+    assert dag.run({'words': ['python']}).reused_stages() == ['score', 'label']
+
+
+def test_degraded_results_are_not_checkpointed():
+    class Checkpoints:
+        def __init__(self):
+            self.saved = {}
+
+        def get(self, key):
+            return self.saved.get(key)
+
+        def put(self, key, outputs):
+            self.saved[key] = outputs
+
+    checkpoints = Checkpoints()
+    dag = StageDAG([Stage('a', lambda x: {'degraded': True, 'y': x}, ['x'], ['y']),
+                    Stage('b', lambda y: y, ['y'], ['z'])], checkpoints=checkpoints)
+    dag.run({'x': 1})
+    assert checkpoints.saved == {}
+
+
+def test_whitespace_only_edits_reuse_the_stage():
+    calls = []
+    stage = Stage('parse', lambda resume: calls.append(resume) or resume.split(), ['resume'], ['words'],
+                  fingerprint={'resume': normalize_whitespace})
+    dag = StageDAG([stage])
+    dag.run({'resume': "Python  developer\n"})
+    assert dag.run({'resume': "Python developer"}).reused_stages() == ['parse']
+    assert len(calls) == 1
+
+
+def test_new_stage_version_invalidates_saved_outputs():
+    memo = StageMemo()
+
+    def prompt_v1(text):
+        return "v1"
+
+    def prompt_v2(text):
+        return "v2"
+
+    assert source_hash(prompt_v1) != source_hash(prompt_v2)
+    StageDAG([Stage('s', prompt_v1, ['text'], ['out'], version=source_hash(prompt_v1))], memo=memo).run({'text': ""})
+    run = StageDAG([Stage('s', prompt_v2, ['text'], ['out'], version=source_hash(prompt_v2))],
+                   memo=memo).run({'text': ""})
+    assert run.values['out'] == "v2" and run.reused_stages() == []
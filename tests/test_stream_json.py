@@ -0,0 +1,73 @@
+"""Repairs and incremental output of the tolerant streaming JSON parser."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream_json import IncrementalJSONParser, parse_json_tolerant  # noqa: E402
+
+
+def test_line_comments_after_values_are_dropped():
+    assert parse_json_tolerant('{"a": "x" // note\n}') == {'a': 'x'}
+    assert parse_json_tolerant('{"a": "x"// note\n"b": 2, // more\n"c": 3}') == {'a': 'x', 'b': 2, 'c': 3}
+    assert parse_json_tolerant('["a", // first\n"b"]') == ['a', 'b']
+
+
+def test_slashes_inside_strings_are_kept():
+    assert parse_json_tolerant('{"url": "http://example.com/a//b", "path": "a"/b"}') == \
+        {'url': 'http://example.com/a//b', 'path': 'a"/b'}
+
+
+def test_valid_json_is_parsed_unchanged():
+    text = '{"title": "Engineer", "skills": ["Python", "SQL"], "years": 5, "remote": true, "salary": null}'
+    assert parse_json_tolerant(text) == {'title': 'Engineer', 'skills': ['Python', 'SQL'], 'years': 5,
+                                         'remote': True, 'salary': None}
+
+
+def test_prose_and_fences_around_the_value_are_ignored():
+    text = 'Here is the result:\n```json\n{"score": 0.8}\n```\nLet me know if you need more.'
+    assert parse_json_tolerant(text) == {'score': 0.8}
+
+
+def test_common_malformations_are_repaired():
+    assert parse_json_tolerant("{'name': 'Ada', 'tags': ['a', 'b',],}") == {'name': 'Ada', 'tags': ['a', 'b']}
+    assert parse_json_tolerant('{"a": 1 "b": 2}') == {'a': 1, 'b': 2}
+    assert parse_json_tolerant('[1 2 3]') == [1, 2, 3]
+    assert parse_json_tolerant('{name: "Ada", level: 3}') == {'name': 'Ada', 'level': 3}
+    assert parse_json_tolerant('{"x": True, "y": False, "z": None}') == {'x': True, 'y': False, 'z': None}
+    assert parse_json_tolerant('{"link": http://example.com/jobs?id=1}') == {'link': 'http://example.com/jobs?id=1'}
+
+
+def test_raw_newlines_and_inner_quotes_are_kept_in_strings():
+    assert parse_json_tolerant('{"text": "line one\nline two"}') == {'text': "line one\nline two"}
+    assert parse_json_tolerant('{"quote": "she said "hello" twice"}') == {'quote': 'she said "hello" twice'}
+    assert parse_json_tolerant("{'note': \"it's fine\"}") == {'note': "it's fine"}
+
+
+def test_truncated_output_is_closed():
+    assert parse_json_tolerant('{"skills": ["Python", "SQ') == {'skills': ['Python', 'SQ']}
+    assert parse_json_tolerant('{"a": {"b": [1, 2') == {'a': {'b': [1, 2]}}
+    assert parse_json_tolerant('{"a": 1, "b"') == {'a': 1}
+    assert parse_json_tolerant('{"a": tr') == {'a': 'tr'}
+    assert parse_json_tolerant('no json here') is None
+
+
+def test_values_are_reported_as_they_complete():
+    seen = []
+    parser = IncrementalJSONParser(lambda path, value: seen.append((path, value)))
+    parser.feed('{"scores": [{"name": "skills", "score": 0.')
+    assert seen == [(('scores', 0, 'name'), 'skills')]
+    parser.feed('9}, {"name": "experience"')
+    assert (('scores', 0), {'name': 'skills', 'score': 0.9}) in seen
+    parser.feed('}]} trailing text {"ignored": 1}')
+    assert parser.close() == {'scores': [{'name': 'skills', 'score': 0.9}, {'name': 'experience'}]}
+    assert seen[-1] == ((), parser.root)
+
+
+def test_chunk_boundaries_do_not_change_the_result():
+    text = '{\'a\': "x" // note\n, b: [1, 2 3], "c": "say "hi"", d: None}'
+    expected = parse_json_tolerant(text)
+    parser = IncrementalJSONParser()
+    for c in text:
+        parser.feed(c)
+    assert parser.close() == expected == {'a': 'x', 'b': [1, 2, 3], 'c': 'say "hi"', 'd': None}
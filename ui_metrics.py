@@ -0,0 +1,77 @@
+"""Rerun counts and render times of the Streamlit app and its fragments.
+
+Every full script run is recorded under the "app" scope and every run of a
+measured fragment under its own scope. A widget inside a fragment should
+only add a run to its fragment's scope; an interaction that adds an "app"
+run instead reran the whole script.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict
+
+import streamlit as st
+
+
+class UIMetrics:
+    """Run counts and render seconds per scope."""
+
+    def __init__(self):
+        self._scopes: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, scope: str, seconds: float):
+        with self._lock:
+            stats = self._scopes.setdefault(scope, {'runs': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            stats['runs'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {scope: {'runs': stats['runs'],
+                            'avg_ms': round(1000 * stats['total_seconds'] / stats['runs'], 1),
+                            'max_ms': round(1000 * stats['max_seconds'], 1)}
+                    for scope, stats in sorted(self._scopes.items())}
+
+
+@lru_cache(maxsize=None)
+def get_ui_metrics() -> UIMetrics:
+    """Return the process-wide metrics of all sessions."""
+    return UIMetrics()
+
+
+def session_ui_metrics() -> UIMetrics:
+    """Return the metrics of the current session."""
+    if 'ui_metrics' not in st.session_state:
+        st.session_state.ui_metrics = UIMetrics()
+    return st.session_state.ui_metrics
+
+
+@contextmanager
+def measure(scope: str):
+    """Record one run of scope and how long it took to render.
+
+    st.rerun() and st.stop() end a run by raising, so the run is recorded in
+    a finally block.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        session_ui_metrics().record(scope, seconds)
+        get_ui_metrics().record(scope, seconds)
+
+
+def measured_fragment(scope: str) -> Callable:
+    """Decorate a function as a Streamlit fragment whose runs are recorded under scope."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with measure(scope):
+                return fn(*args, **kwargs)
+        return st.fragment(run)
+    return decorator
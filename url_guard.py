@@ -0,0 +1,48 @@
+"""Refuse job URLs that would make the server fetch from private networks.
+
+Job descriptions can be given as URLs, which the server then fetches. Only
+http(s) URLs whose host resolves exclusively to public addresses are
+allowed, so a caller cannot make it read cloud metadata endpoints,
+localhost services or hosts on the internal network. Redirects are checked
+the same way before they are followed. The host is resolved again by the
+HTTP client, so a DNS record that changes between the check and the fetch
+is not caught; run the server behind an egress firewall where that matters.
+"""
+import ipaddress
+import socket
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+
+class UnsafeURL(ValueError):
+    """A URL that is not http(s) or points at a non-public address."""
+
+
+def check_public_url(url: str) -> str:
+    """Return url if it is an http(s) URL of a public host, else raise UnsafeURL."""
+    parts = urlsplit(str(url).strip())
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UnsafeURL("Job URLs must be http or https URLs")
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)}
+    except (ValueError, socket.gaierror):
+        raise UnsafeURL(f"Cannot resolve the host of {url}")
+    for address in addresses:
+        # Drop an IPv6 zone index ("fe80::1%eth0")
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise UnsafeURL(f"Job URLs must point to public hosts; {parts.hostname} resolves to {address}")
+    return url
+
+
+def _check_redirect(response, *args, **kwargs):
+    if response.is_redirect:
+        check_public_url(urljoin(response.url, response.headers['location']))
+
+
+def public_session() -> requests.Session:
+    """Return a requests session that refuses redirects to non-public URLs."""
+    session = requests.Session()
+    session.hooks['response'].append(_check_redirect)
+    return session
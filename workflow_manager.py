@@ -7,10 +7,18 @@ class WorkflowManager:
     
     @staticmethod
     def handle_file_upload(file_types: list) -> Optional[str]:
-        """Handle file upload with error checking."""
+        """Handle file upload with error checking.
+
+        The extracted text is kept in the session per uploaded file, so reruns
+        caused by other widgets do not parse the file again.
+        """
         try:
             uploaded_file = st.file_uploader("Upload your resume", type=file_types)
             if uploaded_file:
+                cached = st.session_state.get('uploaded_resume')
+                if cached and cached[0] == uploaded_file.file_id:
+                    return cached[1]
+                text = None
                 file_type = uploaded_file.type
                 if "pdf" in file_types and file_type == "application/pdf":
                     from PyPDF2 import PdfReader
@@ -18,12 +26,13 @@ class WorkflowManager:
                     text = ""
                     for page in reader.pages:
                         text += page.extract_text()
-                    return text
                 elif "docx" in file_types and file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
                     from docx import Document
                     doc = Document(uploaded_file)
                     text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-                    return text
+                if text is not None:
+                    st.session_state.uploaded_resume = (uploaded_file.file_id, text)
+                return text
             return None
         except Exception as e:
             st.error(f"Error processing file: {str(e)}")